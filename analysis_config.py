@@ -0,0 +1,213 @@
+import dataclasses
+import hashlib
+import json
+import cv2
+import numpy as np
+import env_vars
+
+# ===================================
+#  Analysis settings of a run
+# ===================================
+# The settings that affect the measurements are read from Env_Vars once per run, checked, and converted to the
+# types the frame loop uses (uint8 color bounds, the morphology kernels with their iterations folded in), so
+# the frame loop never reads or re-checks a mutable setting. Pool workers get the config of the parent through
+# their initializer and install it, so they analyze with exactly the settings the run started with.
+#
+#     config = analysis_config.install(analysis_config.from_settings())   # once per run, in every process
+#     config = analysis_config.current()                                   # wherever the settings are needed
+
+# Mask engines selectable with the MASK_ENGINE setting
+MASK_ENGINES = ('contour', 'external', 'compare')
+# Classifiers selectable with the COLOR_CLASSIFIER setting
+COLOR_CLASSIFIERS = ('hsv', 'lut')
+
+# Settings that do not change the analysis results, so editing them does not force a video to be reprocessed
+NON_ANALYSIS_SETTINGS = {'VIDEO_FOLDER', 'QUIT_KEY', 'ANALYSIS_THREADS', 'FRAME_QUEUE_SIZE', 'CSV_FLUSH_SECONDS',
+                         'CHECKPOINT_SECONDS', 'PROFILE_STAGES', 'PROFILE_FRAMES', 'LOG_LEVEL', 'FRAME_LOG_INTERVAL',
+                         'MASK_ENGINE', 'COLOR_CLASSIFIER', 'PROGRESS_INTERVAL', 'PREVIEW_WIDTH',
+                         'THUMBNAIL_HEIGHT', 'THUMBNAIL_CACHE_SIZE'}
+
+_current = None
+
+
+def iterated_kernel(kernel, iterations):
+    """Single structuring element that dilates (or erodes) like kernel applied iterations times.
+
+    Returns None for 0 iterations, and kernel itself for 1 or when its size is even (no centered anchor).
+    """
+    if iterations <= 0:
+        return None
+    if iterations == 1 or kernel.shape[0] % 2 == 0 or kernel.shape[1] % 2 == 0:
+        return kernel
+    # Dilating the kernel by itself iterations - 1 times gives their Minkowski sum. cv2.dilate applies the
+    # reflection of its kernel, so the kernel is flipped to get the sum of asymmetric kernels right
+    kernel_h, kernel_w = kernel.shape
+    canvas = np.zeros(((kernel_h - 1) * iterations + 1, (kernel_w - 1) * iterations + 1), np.uint8)
+    center_y, center_x = canvas.shape[0] // 2, canvas.shape[1] // 2
+    canvas[center_y - kernel_h // 2:center_y + kernel_h // 2 + 1,
+           center_x - kernel_w // 2:center_x + kernel_w // 2 + 1] = kernel != 0
+    return cv2.dilate(canvas, cv2.flip(kernel, -1), iterations=iterations - 1)
+
+
+def _color_bound(name, value, upper):
+    bound = np.asarray(value)
+    if bound.shape != (3,) or not np.issubdtype(bound.dtype, np.number):
+        raise ValueError(f"{name} must be three numbers (hue, saturation, value), not {value!r}")
+    if bound.min() < 0 or (not upper and bound.max() > 255):
+        raise ValueError(f"{name} must be between 0 and 255, not {bound.tolist()}")
+    # Upper bounds above 255 select the same pixels as 255 on 8-bit images
+    return np.minimum(bound, 255).astype(np.uint8)
+
+
+def _iterations(name, value):
+    if int(value) != value or value < 0:
+        raise ValueError(f"{name} must be a whole number of at least 0, not {value!r}")
+    return int(value)
+
+
+def _check_scale(span, dbPerHLine):
+    if not span or not dbPerHLine:
+        raise ValueError(f"SPAN and dbPerHLine must not be 0 (SPAN {span!r}, dbPerHLine {dbPerHLine!r})")
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class AnalysisConfig:
+    """Checked, precompiled analysis settings. Build with from_settings; the arrays are read-only."""
+    span: float
+    center: float
+    dbPerHLine: float
+    # HSV color bounds of the wave and of the grid
+    lower_wave: np.ndarray
+    upper_wave: np.ndarray
+    lower_grid: np.ndarray
+    upper_grid: np.ndarray
+    # Morphology of the contour engine (kernel applied iterations times) ...
+    kernel: np.ndarray
+    dilate_iterations: int
+    erode_iterations: int
+    # ... and of the external engine: the same, as one pass of a larger kernel when possible (None for no pass)
+    dilate_kernel: np.ndarray
+    dilate_passes: int
+    erode_kernel: np.ndarray
+    erode_passes: int
+    mask_engine: str
+    color_classifier: str
+    grid_divisions: int
+    grid_search_frames: int
+    roi_margin: int
+    change_threshold: float
+    change_scale: int
+    trace_output: bool
+    # Hash of every setting that affects the results, recorded by the manifest to decide what to resume
+    settings_hash: str
+    # The settings behind settings_hash, as canonical JSON
+    settings_json: str
+
+    def __post_init__(self):
+        for field in dataclasses.fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+    def __reduce__(self):
+        # Rebuilt through __init__, so the arrays of an unpickled config are read-only too
+        return AnalysisConfig, tuple(getattr(self, field.name) for field in dataclasses.fields(self))
+
+    def px_per_hz(self, grid_width):
+        """Pixels per unit of frequency across a grid grid_width pixels wide (hzPxWidth of Utilities)."""
+        return grid_width / self.span
+
+    def px_per_db(self, grid_height):
+        """Pixels per dB up a grid grid_height pixels high (dbPxHeight of Utilities)."""
+        return grid_height / (self.dbPerHLine * 10)
+
+    def with_scale(self, span, center, dbPerHLine):
+        """This config for another span, center and dbPerHLine (itself if they are the same)."""
+        if (span, center, dbPerHLine) == (self.span, self.center, self.dbPerHLine):
+            return self
+        _check_scale(span, dbPerHLine)
+        settings = json.loads(self.settings_json)
+        settings.update({'SPAN': span, 'center': center, 'dbPerHLine': dbPerHLine})
+        settings_json = json.dumps(settings, sort_keys=True)
+        return dataclasses.replace(self, span=span, center=center, dbPerHLine=dbPerHLine,
+                                   settings_hash=hashlib.sha1(settings_json.encode()).hexdigest(),
+                                   settings_json=settings_json)
+
+
+def analysis_settings(span=None, center=None, dbPerHLine=None):
+    """Every setting that affects the results, as JSON-compatible values; span/center/dbPerHLine override."""
+    settings = {attr: value for attr, value in env_vars.snapshot().items() if attr not in NON_ANALYSIS_SETTINGS}
+    for attr, value in (('SPAN', span), ('center', center), ('dbPerHLine', dbPerHLine)):
+        if value is not None:
+            settings[attr] = value
+    return settings
+
+
+def build(settings, mask_engine, color_classifier):
+    """AnalysisConfig of analysis_settings() values. Raises ValueError for a setting that cannot be used."""
+    settings_json = json.dumps(settings, sort_keys=True)
+    if mask_engine not in MASK_ENGINES:
+        raise ValueError(f"MASK_ENGINE must be one of {', '.join(MASK_ENGINES)}, not {mask_engine!r}")
+    if color_classifier not in COLOR_CLASSIFIERS:
+        raise ValueError(
+            f"COLOR_CLASSIFIER must be one of {', '.join(COLOR_CLASSIFIERS)}, not {color_classifier!r}"
+        )
+    _check_scale(settings['SPAN'], settings['dbPerHLine'])
+
+    kernel = np.asarray(settings['KERNEL_SIZE'])
+    if kernel.ndim != 2 or kernel.size == 0:
+        raise ValueError(f"KERNEL_SIZE must be a 2D array, not {settings['KERNEL_SIZE']!r}")
+    # OpenCV uses the nonzero elements of a structuring element
+    kernel = (kernel != 0).astype(np.uint8)
+    dilate_iterations = _iterations('DILATE_ITERATIONS', settings['DILATE_ITERATIONS'])
+    erode_iterations = _iterations('ERODE_ITERATIONS', settings['ERODE_ITERATIONS'])
+    dilate_kernel = iterated_kernel(kernel, dilate_iterations)
+    erode_kernel = iterated_kernel(kernel, erode_iterations)
+
+    return AnalysisConfig(
+        span=settings['SPAN'],
+        center=settings['center'],
+        dbPerHLine=settings['dbPerHLine'],
+        lower_wave=_color_bound('LOWER_WAVE_COLOR', settings['LOWER_WAVE_COLOR'], False),
+        upper_wave=_color_bound('UPPER_WAVE_COLOR', settings['UPPER_WAVE_COLOR'], True),
+        lower_grid=_color_bound('LOWER_GRID_COLOR', settings['LOWER_GRID_COLOR'], False),
+        upper_grid=_color_bound('UPPER_GRID_COLOR', settings['UPPER_GRID_COLOR'], True),
+        kernel=kernel,
+        dilate_iterations=dilate_iterations,
+        erode_iterations=erode_iterations,
+        dilate_kernel=dilate_kernel,
+        dilate_passes=1 if dilate_kernel is not kernel else dilate_iterations,
+        erode_kernel=erode_kernel,
+        erode_passes=1 if erode_kernel is not kernel else erode_iterations,
+        mask_engine=mask_engine,
+        color_classifier=color_classifier,
+        grid_divisions=int(settings['GRID_DIVISIONS']),
+        grid_search_frames=int(settings['GRID_SEARCH_FRAMES']),
+        roi_margin=int(settings['ROI_MARGIN']),
+        change_threshold=settings['CHANGE_THRESHOLD'],
+        change_scale=int(settings['CHANGE_SCALE']),
+        trace_output=bool(settings['TRACE_OUTPUT'] or settings['WATERFALL_OUTPUT']),
+        settings_hash=hashlib.sha1(settings_json.encode()).hexdigest(),
+        settings_json=settings_json,
+    )
+
+
+def from_settings(span=None, center=None, dbPerHLine=None):
+    """AnalysisConfig of the current Env_Vars settings; span, center and dbPerHLine override the settings."""
+    return build(analysis_settings(span, center, dbPerHLine), env_vars.Env_Vars.MASK_ENGINE,
+                 env_vars.Env_Vars.COLOR_CLASSIFIER)
+
+
+def install(config):
+    """Make config the one current() returns in this process, and return it."""
+    global _current
+    _current = config
+    return config
+
+
+def current():
+    """The installed AnalysisConfig; without one, a config of the settings as they are on first use."""
+    config = _current
+    if config is None:
+        config = install(from_settings())
+    return config
@@ -0,0 +1,727 @@
+import tkinter as tk
+from PIL import Image, ImageTk
+from tkinter import ttk, filedialog, simpledialog, colorchooser
+import env_vars
+import logging
+import numpy as np
+import progress
+import thumbnail_cache
+import os
+import threading
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Class for creating tooltips
+class Tooltip:
+    # Initialize the tooltip
+    def __init__(self, widget, text):
+        self.widget = widget
+        self.text = text
+        self.tooltip_window = None
+        widget.bind("<Enter>", self.enter)
+        widget.bind("<Leave>", self.leave)
+            
+    # Create the tooltip window
+    def enter(self, event=None):
+        x = y = 0
+        x, y, _, _ = self.widget.bbox("insert")
+        x += self.widget.winfo_rootx() + 25
+        y += self.widget.winfo_rooty() + 20
+        self.tooltip_window = tw = tk.Toplevel(self.widget)
+        tw.wm_overrideredirect(True)
+        tw.wm_geometry(f"+{x}+{y}")
+        label = tk.Label(
+            tw,
+            text=self.text,
+            justify="left",
+            background="#ffffff",
+            relief="solid",
+            borderwidth=1,
+            wraplength=200,
+        )
+        label.pack(ipadx=1)
+
+    # Destroy the tooltip window
+    def leave(self, event=None):
+        if self.tooltip_window:
+            self.tooltip_window.destroy()
+            self.tooltip_window = None
+
+# Class for the main GUI window
+class SpectrumAnalyzerGUI(tk.Tk):
+    # Height in pixels of the thumbnails in the video list
+    VIDEO_ICON_HEIGHT = 40
+    # Height in pixels of the image in the video display
+    DISPLAY_HEIGHT = 400
+    # Width in pixels of the image of the waterfall page; its height is DISPLAY_HEIGHT
+    WATERFALL_WIDTH = 480
+    # Frames shown at once on the waterfall page, by zoom choice (None for the whole video)
+    WATERFALL_ZOOMS = {"Whole video": None, "4096 frames": 4096, "1024 frames": 1024, "256 frames": 256}
+
+    # Initialize the window
+    def __init__(self):
+        super().__init__()
+        env_vars.load_settings()
+        self.title("Spectrum Analyzer - Team 5")
+
+        # Thumbnails of the videos, shared by every rebuild of the main page
+        self.thumbnails = thumbnail_cache.ThumbnailCache()
+        # First frames at the size of the video display, decoded when a video is first shown and cached like the
+        # thumbnails, so the display never shows a small thumbnail scaled up
+        self.display_frames = thumbnail_cache.ThumbnailCache(height=self.DISPLAY_HEIGHT)
+        # Decodes them on a background thread; poll_display_frames shows them once they are ready
+        self.display_frame_loader = thumbnail_cache.FrameLoader(self.display_frames)
+        self.display_frame_polling = False
+        self.thumbnail_loader = None
+        self.video_icons = {}
+        self.shown_video = None
+        self.analysis_thread = None
+        
+        # Main frame that will hold everything
+        self.main_frame = ttk.Frame(self)
+        self.main_frame.pack(expand=True, fill=tk.BOTH)
+
+        # Create a dedicated frame for the video display
+        self.video_frame = ttk.Frame(self.main_frame)
+        self.video_frame.pack(side="left", fill=tk.Y, expand=False)
+        self.create_video_display()
+        self.create_progress_display()
+
+        # Frame for changing screens (settings, main page, etc.)
+        self.screen_frame = ttk.Frame(self.main_frame)
+        self.screen_frame.pack(side="right", fill=tk.BOTH, expand=True)
+
+        self.create_main_page()  # Create the main page in the screen frame
+
+        # Protocol handler for window close event
+        self.protocol("WM_DELETE_WINDOW", self.safe_close)
+
+    # Method to safely close the application
+    def safe_close(self):
+        #
+
+        if self.winfo_exists():  # Check if the window exists
+            self.destroy()  # Destroy the window
+
+    def create_video_display(self):
+        # This function should only be called once to set up the video display initially
+        # The thumbnail of the first video is shown once the main page has loaded it
+        self.image_label = ttk.Label(self.video_frame)
+        self.image_label.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
+
+    def create_progress_display(self):
+        # One progress bar per video under the video display, filled in while an analysis runs
+        self.progress_frame = ttk.Frame(self.video_frame)
+        self.progress_frame.pack(pady=10, padx=10, fill=tk.X)
+        self.progress_rows = {}
+
+    # Create the main page
+    def create_main_page(self):
+        self.clear_frame(self.screen_frame)
+
+        # Paned window for frame display by gui
+        paned_window = ttk.PanedWindow(self.screen_frame, orient=tk.HORIZONTAL)
+        paned_window.pack(fill=tk.BOTH, expand=True)
+
+        left_frame = ttk.Frame(paned_window)
+        paned_window.add(left_frame, weight=1)
+
+        self.right_frame = ttk.Frame(paned_window)
+        paned_window.add(self.right_frame, weight=1)
+
+        # Main label with the application title
+        ttk.Label(
+            left_frame, text="Spectrum Analyzer - Team 5", font=("Helvetica", 16)
+        ).pack(pady=10, padx=10, fill=tk.X)
+
+        # Welcome label
+        ttk.Label(
+            left_frame,
+            text="Welcome to the Spectrum Analyzer application.\nPlease select an option below to get started.",
+        ).pack(pady=10, padx=10, fill=tk.X)
+
+        # Button to start analysis
+        ttk.Button(
+            left_frame, text="Start Analysis", command=self.start_analysis
+        ).pack(pady=10, padx=10, fill=tk.X)
+
+        # Button to open settings
+        ttk.Button(
+            left_frame, text="Settings", command=self.create_settings_page
+        ).pack(pady=10, padx=10, fill=tk.X)
+
+        # Button to browse the waterfalls of the analyzed videos
+        ttk.Button(
+            left_frame, text="Waterfalls", command=self.create_waterfall_page
+        ).pack(pady=10, padx=10, fill=tk.X)
+
+        # Help/Guide button
+        ttk.Button(left_frame, text="Help/Guide", command=self.show_help).pack(
+            pady=10, padx=10, fill=tk.X
+        )
+
+        # Label showing the number of videos, once the folder is listed
+        self.video_info_label = ttk.Label(left_frame, text="Number of Videos in Folder: ...")
+        self.video_info_label.pack(pady=5, padx=10)
+
+        # Create a bottom frame for the Exit button
+        bottom_frame = ttk.Frame(left_frame)
+        bottom_frame.pack(side="bottom", fill=tk.X, expand=False)
+
+        # Exit button at the bottom
+        ttk.Button(bottom_frame, text="Exit", command=self.destroy).pack(
+            side="bottom", pady=30, padx=10, fill=tk.X
+        )
+
+        self.create_video_list(self.right_frame)
+        self.update()
+
+    # Scrollable list of the videos in the folder with their thumbnails, frame counts and durations
+    def create_video_list(self, parent):
+        style = ttk.Style(self)
+        style.configure("Videos.Treeview", rowheight=self.VIDEO_ICON_HEIGHT + 4)
+        self.video_list = ttk.Treeview(parent, columns=("frames", "duration"), style="Videos.Treeview")
+        self.video_list.heading("#0", text="Video")
+        self.video_list.heading("frames", text="Frames")
+        self.video_list.heading("duration", text="Duration")
+        self.video_list.column("frames", width=70, anchor="e", stretch=False)
+        self.video_list.column("duration", width=70, anchor="e", stretch=False)
+        scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.video_list.yview)
+        self.video_list.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill=tk.Y)
+        self.video_list.pack(side="left", fill=tk.BOTH, expand=True, pady=10)
+        self.video_list.bind("<<TreeviewSelect>>", self.on_video_selected)
+
+        # The folder is listed and the thumbnails are loaded on a background thread, then polled from here
+        if self.thumbnail_loader is not None:
+            self.thumbnail_loader.stop()
+        self.thumbnail_loader = thumbnail_cache.ThumbnailLoader(self.thumbnails, env_vars.Env_Vars.VIDEO_FOLDER)
+        self.after(50, self.poll_thumbnails, self.thumbnail_loader)
+
+    def poll_thumbnails(self, loader):
+        # A rebuilt main page has its own loader
+        if loader is not self.thumbnail_loader or not self.video_list.winfo_exists():
+            return
+        listing, loaded = loader.poll()
+        if listing is not None:
+            self.video_info_label.configure(text=f"Number of Videos in Folder: {len(listing)}")
+            for path in listing:
+                self.video_list.insert("", "end", iid=path, text=os.path.basename(path),
+                                       image=self.video_icons.get(path, ""))
+            if not listing:
+                self.display_video_frame(None)
+        for info, thumbnail in loaded:
+            self.add_video_info(info, thumbnail)
+        if not loader.finished:
+            self.after(100, self.poll_thumbnails, loader)
+
+    def add_video_info(self, info, thumbnail):
+        if not self.video_list.exists(info.path):
+            return
+        seconds = thumbnail_cache.duration(info)
+        duration = f"{int(seconds // 60)}:{seconds % 60:04.1f}" if seconds is not None else "?"
+        self.video_list.item(info.path, values=(info.frames or "?", duration))
+        if thumbnail is not None:
+            icon = Image.fromarray(cv2.cvtColor(thumbnail, cv2.COLOR_BGR2RGB))
+            icon.thumbnail((4 * self.VIDEO_ICON_HEIGHT, self.VIDEO_ICON_HEIGHT))
+            # Tk only keeps the images Python holds a reference to
+            self.video_icons[info.path] = ImageTk.PhotoImage(icon)
+            self.video_list.item(info.path, image=self.video_icons[info.path])
+        # The first video is shown until one is selected
+        if self.shown_video is None:
+            self.display_video_frame(info.path)
+
+    def on_video_selected(self, event=None):
+        selection = self.video_list.selection()
+        if selection:
+            self.display_video_frame(selection[0])
+
+    # Show the first frame of a video, or where to put videos if there are none
+    def display_video_frame(self, video_path):
+        # The video display shows the live preview while an analysis runs
+        if self.analysis_thread is not None and self.analysis_thread.is_alive():
+            return
+        if video_path is None:
+            video_folder_path = env_vars.Env_Vars.VIDEO_FOLDER
+            self.shown_video = None
+            self.image_label.config(image="", text="No videos found in the video folder.\nClick here to open the video folder.",
+                                    cursor="hand2")
+            self.image_label.image = None
+            self.image_label.bind("<Button-1>", lambda e: self.open_video_folder(video_folder_path))
+            return
+
+        # Opening the video can take a while on a network share, so it is never done on this thread
+        self.shown_video = video_path
+        self.display_frame_loader.request(video_path)
+        if not self.display_frame_polling:
+            self.display_frame_polling = True
+            self.after(20, self.poll_display_frames)
+
+    def poll_display_frames(self):
+        for video_path, entry, error in self.display_frame_loader.poll():
+            # Only the last video asked for is shown, and never over the preview of a running analysis
+            if video_path != self.shown_video or (self.analysis_thread is not None and self.analysis_thread.is_alive()):
+                continue
+            if error is not None:
+                logger.warning("Could not open %s: %s", video_path, error)
+            elif entry[1] is None:
+                logger.warning("Failed to read a frame from %s", video_path)
+            else:
+                self.image_label.config(text="", cursor="")
+                self.image_label.unbind("<Button-1>")
+                # Convert the color from BGR to RGB
+                frame = cv2.cvtColor(entry[1], cv2.COLOR_BGR2RGB)
+                # Convert to PIL format
+                self.show_image(Image.fromarray(frame))
+        self.display_frame_polling = self.display_frame_loader.pending > 0
+        if self.display_frame_polling:
+            self.after(50, self.poll_display_frames)
+    
+    # Show a PIL image in the video display, scaled to its height
+    def show_image(self, frame_image):
+        # Convert to ImageTk format
+        baseheight = self.DISPLAY_HEIGHT
+        hpercent = (baseheight / float(frame_image.size[1]))
+        wsize = int((float(frame_image.size[0]) * float(hpercent)))
+        frame_image = frame_image.resize((wsize, baseheight), Image.Resampling.LANCZOS)
+        frame_image = ImageTk.PhotoImage(frame_image)
+
+        # Assuming you have a label to display the image
+        self.image_label.configure(image=frame_image)
+        self.image_label.image = frame_image  # Keep a reference!
+        self.image_label.pack(pady=10, padx=10)
+
+    def open_video_folder(self, path):
+        import webbrowser
+        webbrowser.open(path)
+
+    # Create the settings page
+    def create_settings_page(self):
+        self.clear_frame(self.screen_frame)
+
+        settings_frame = ttk.Frame(self.screen_frame)  # Use self.screen_frame here
+        settings_frame.pack(expand=True, fill=tk.BOTH)
+
+        self.create_edit_buttons(settings_frame)
+        self.create_color_buttons(settings_frame)
+
+        ttk.Button(
+            settings_frame,
+            text="Back",
+            command=lambda: self.switch_frame(settings_frame, self.create_main_page),
+        ).pack(pady=10, padx=10, fill=tk.X)
+
+    # Waterfall page: the WATERFALL_OUTPUT of the analyzed videos, read window by window from the files on disk
+    def create_waterfall_page(self):
+        # Imported when the page is first opened, like the analysis modules
+        import csv_output
+        import waterfall
+
+        self.clear_frame(self.screen_frame)
+        waterfall_frame = ttk.Frame(self.screen_frame)
+        waterfall_frame.pack(expand=True, fill=tk.BOTH)
+        self.waterfall_reader = None
+        directories = waterfall.list_waterfalls(csv_output.COMPLETED_DIRECTORY)
+
+        ttk.Label(waterfall_frame, text="Waterfalls", font=("Helvetica", 16)).pack(pady=10, padx=10, fill=tk.X)
+        if not directories:
+            ttk.Label(waterfall_frame, text="No waterfalls yet. Set WATERFALL_OUTPUT to true in env_settings.json\n"
+                                            "and analyze a video to make one.").pack(pady=10, padx=10, fill=tk.X)
+        else:
+            controls = ttk.Frame(waterfall_frame)
+            controls.pack(pady=5, padx=10, fill=tk.X)
+            self.waterfall_choice = ttk.Combobox(controls, state="readonly",
+                                                 values=[os.path.basename(path) for path in directories])
+            self.waterfall_choice.pack(side="left", fill=tk.X, expand=True)
+            self.waterfall_zoom = ttk.Combobox(controls, state="readonly", width=12,
+                                               values=list(self.WATERFALL_ZOOMS))
+            self.waterfall_zoom.current(0)
+            self.waterfall_zoom.pack(side="left", padx=5)
+            # Refresh picks up the rows written since, while a video is still being analyzed
+            ttk.Button(controls, text="Refresh", command=self.show_waterfall).pack(side="left")
+
+            # Start of the window shown, as a fraction of the video
+            self.waterfall_position = tk.DoubleVar(value=0.0)
+            ttk.Scale(waterfall_frame, from_=0.0, to=1.0, variable=self.waterfall_position,
+                      command=lambda _: self.show_waterfall(refresh=False)).pack(padx=10, fill=tk.X)
+            self.waterfall_info = ttk.Label(waterfall_frame, text="")
+            self.waterfall_info.pack(pady=5, padx=10, fill=tk.X)
+            self.waterfall_label = ttk.Label(waterfall_frame)
+            self.waterfall_label.pack(pady=5, padx=10)
+
+            self.waterfall_choice.bind("<<ComboboxSelected>>",
+                                       lambda _: self.open_waterfall(directories[self.waterfall_choice.current()]))
+            self.waterfall_zoom.bind("<<ComboboxSelected>>", lambda _: self.show_waterfall(refresh=False))
+            self.waterfall_choice.current(0)
+            self.open_waterfall(directories[0])
+
+        ttk.Button(
+            waterfall_frame,
+            text="Back",
+            command=lambda: self.leave_waterfall_page(waterfall_frame),
+        ).pack(pady=10, padx=10, fill=tk.X)
+
+    def leave_waterfall_page(self, waterfall_frame):
+        # Unmap the files, so a writer can resize them (Windows refuses while they are mapped)
+        self.waterfall_reader = None
+        self.switch_frame(waterfall_frame, self.create_main_page)
+
+    def open_waterfall(self, directory):
+        import waterfall
+        try:
+            self.waterfall_reader = waterfall.WaterfallReader(directory)
+        except (OSError, ValueError) as e:
+            self.waterfall_reader = None
+            self.waterfall_label.configure(image="")
+            self.waterfall_info.configure(text=f"Could not read {os.path.basename(directory)}")
+            logger.warning("Could not read the waterfall %s: %s", directory, e)
+            return
+        self.show_waterfall(refresh=False)
+
+    def show_waterfall(self, refresh=True):
+        reader = self.waterfall_reader
+        if reader is None:
+            return
+        if refresh:
+            try:
+                reader.refresh()
+            except (OSError, ValueError) as e:
+                logger.warning("Could not refresh the waterfall %s: %s", reader.directory, e)
+                return
+        total = max(reader.rows, 1)
+        frames = min(self.WATERFALL_ZOOMS[self.waterfall_zoom.get()] or total, total)
+        start = int(round(self.waterfall_position.get() * (total - frames)))
+        image = reader.image(start, frames, self.WATERFALL_WIDTH, self.DISPLAY_HEIGHT)
+        photo = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+        self.waterfall_label.configure(image=photo)
+        self.waterfall_label.image = photo  # Keep a reference!
+        frequencies = reader.frequencies
+        span = f", {frequencies[0]:.6g} to {frequencies[-1]:.6g}" if frequencies.size else ""
+        state = "" if reader.header.get('complete') else " (still being written)"
+        self.waterfall_info.configure(text=f"Frames {start} to {start + frames} of {reader.rows}{span}{state}")
+
+    # Create buttons for editing numeric and string variables
+    def create_edit_buttons(self, parent):
+        button_labels = [
+            "Edit SPAN",
+            "Edit Center",
+            "Edit dbPerHLine",
+            "Edit Video Folder",
+            "Edit Quit Key",
+            "Edit Dilation Iterations",
+            "Edit Erosion Iterations",
+        ]
+        command_funcs = [
+            self.edit_span,
+            self.edit_center,
+            self.edit_dbPerHLine,
+            self.edit_video_folder,
+            self.edit_quit_key,
+            self.edit_dilate_iterations,
+            self.edit_erode_iterations,
+        ]
+        tooltips = [
+            "Set the SPAN value, defining the frequency range",
+            "Set the Center frequency around which to analyze",
+            "Define decibels per horizontal line in the analysis",
+            "Set the folder path containing video files",
+            "Define the key to press for quitting the analysis",
+            "Set the number of dilation iterations for video processing",
+            "Set the number of erosion iterations for video processing",
+        ]
+
+        for label, command, tooltip_text in zip(button_labels, command_funcs, tooltips):
+            btn = ttk.Button(parent, text=label, command=command)
+            btn.pack(pady=5, padx=10, fill=tk.X)
+            Tooltip(btn, tooltip_text)
+
+    # Create buttons for editing color variables
+    def create_color_buttons(self, parent):
+        color_vars = [
+            "LOWER_GREEN",
+            "UPPER_GREEN",
+            "LOWER_WAVE_COLOR",
+            "UPPER_WAVE_COLOR",
+            "LOWER_GRID_COLOR",
+            "UPPER_GRID_COLOR",
+        ]
+        tooltips = [
+            "Set the lower threshold color for green detection",
+            "Set the upper threshold color for green detection",
+            "Set the lower threshold color for wave detection",
+            "Set the upper threshold color for wave detection",
+            "Set the lower threshold color for grid detection",
+            "Set the upper threshold color for grid detection",
+        ]
+
+        for var, tooltip_text in zip(color_vars, tooltips):
+            btn = ttk.Button(
+                parent,
+                text=f"Edit {var}",
+                command=lambda var_name=var: self.edit_color(var_name),
+            )
+            btn.pack(pady=5, padx=10, fill=tk.X)
+            Tooltip(btn, tooltip_text)
+
+    # Switch between frames
+    def switch_frame(self, current_frame, new_frame_func):
+        self.clear_frame(current_frame)
+        new_frame_func()
+
+    # Clear a frame
+    def clear_frame(self, frame):
+        for widget in frame.winfo_children():
+            widget.destroy()
+
+    # Show the help/guide window
+    def show_help(self):
+        help_window = tk.Toplevel(self)
+        help_window.title("Help/Guide")
+        help_window.geometry("400x360")
+
+        # Create a Text widget with a scrollbar
+        help_text_widget = tk.Text(help_window, wrap="word", height=15, width=50)
+        scrollbar = tk.Scrollbar(help_window, command=help_text_widget.yview)
+        help_text_widget.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        help_text_widget.pack(side="left", fill="both", expand=True)
+
+        # Inserting text
+        help_text = (
+            "Welcome to the Spectrum Analyzer Help Guide:\n\n"
+            "Start Analysis: Begin processing your video files for spectrum analysis.\n\n"
+            "Settings: Customize application settings including video paths, color thresholds, and keybindings.\n\n"
+            "Exiting: Click 'Exit' to close the application.\n\n"
+            "For more detailed instructions on each feature, please refer to the user manual or contact support.\n\n"
+            "Additional Resources:\n"
+        )
+        help_text_widget.insert("end", help_text)
+
+        # Inserting clickable links
+        def open_link(url):
+            import webbrowser
+
+            webbrowser.open_new(url)
+
+        help_text_widget.insert("end", "Project Website: ")
+        help_text_widget.insert(
+            "end",
+            "https://main.d21hsol1os28ah.amplifyapp.com/\n",
+            ("link", "https://main.d21hsol1os28ah.amplifyapp.com/"),
+        )
+        help_text_widget.insert("end", "GitHub Repository: ")
+        help_text_widget.insert(
+            "end",
+            "https://github.com/JoeyThompson10/spectrumAnalyzerProject\n",
+            ("link", "https://github.com/JoeyThompson10/spectrumAnalyzerProject"),
+        )
+
+        help_text_widget.tag_config("link", foreground="blue", underline=1)
+        help_text_widget.tag_bind(
+            "link",
+            "<Button-1>",
+            lambda e, url=help_text_widget.tag_get("link", "current")[0]: open_link(
+                url
+            ),
+        )
+
+        # Make the text widget read-only
+        help_text_widget.config(state="disabled")
+
+    def start_analysis(self):
+        # Disable the GUI and update the title
+        self.toggle_gui_state(disabled=True)
+        self.title("Spectrum Analyzer - Analyzing...")
+
+        self.add_quit_label()
+
+        env_vars.save_settings()
+
+        # Workers report their progress and previews to the monitor instead of opening video windows
+        self.monitor = progress.ProgressMonitor()
+        self.clear_frame(self.progress_frame)
+        self.progress_rows = {}
+        self.bind("<Key>", self.on_quit_key)
+
+        # Run the analysis in a separate thread; the Tk main loop polls its progress
+        self.analysis_thread = threading.Thread(target=self.run_analysis, daemon=True)
+        self.analysis_thread.start()
+        self.after(100, self.poll_progress)
+
+    def run_analysis(self):
+        # Run the analysis; Tk is only touched from the main loop, in poll_progress
+        # The analysis modules are imported on the first run, so the window opens without waiting for them
+        import main
+        main.main(self.monitor)
+
+    # Render the latest progress of every video and the latest preview, until the analysis thread is done
+    def poll_progress(self):
+        running = self.analysis_thread.is_alive()
+        updates, preview = self.monitor.poll()
+        for update in updates:
+            self.update_progress_row(update)
+        if preview is not None:
+            # Previews are BGR frames or single channel masks
+            if preview.ndim == 3:
+                preview = cv2.cvtColor(preview, cv2.COLOR_BGR2RGB)
+            self.show_image(Image.fromarray(preview))
+
+        if running:
+            self.after(100, self.poll_progress)
+            return
+        # The last events were sent before the thread ended, so the poll above got them all
+        self.monitor.close()
+        self.unbind("<Key>")
+        # Re-enable the GUI and update the title after analysis
+        self.toggle_gui_state(disabled=False)
+        self.title("Spectrum Analyzer - Team 5")
+
+    def update_progress_row(self, update):
+        row = self.progress_rows.get(update.video)
+        if row is None:
+            frame = ttk.Frame(self.progress_frame)
+            frame.pack(pady=2, fill=tk.X)
+            ttk.Label(frame, text=update.video).pack(anchor="w")
+            bar = ttk.Progressbar(frame, orient=tk.HORIZONTAL, length=300, mode="determinate")
+            bar.pack(fill=tk.X)
+            status = ttk.Label(frame)
+            status.pack(anchor="w")
+            row = self.progress_rows[update.video] = (bar, status)
+        bar, status = row
+
+        # Videos of unknown length show the frames done so far as a full bar
+        bar.configure(maximum=max(update.total, update.done, 1), value=update.done)
+        if update.state == 'skipped':
+            bar.configure(value=bar.cget("maximum"))
+            text = "Already analyzed"
+        else:
+            text = f"{update.done}/{update.total or '?'} frames, {update.fps:.1f} FPS"
+            if update.center_freq is not None:
+                text += f", {update.center_freq:.4f} GHz, {update.amplitude:.2f} dB"
+            if update.state == 'done':
+                text = "Done: " + text
+            elif update.state == 'stopped':
+                text = "Stopped: " + text
+        status.configure(text=text)
+
+    # The quit key stops every video after its current frame; stopped videos resume on the next run
+    def on_quit_key(self, event):
+        if event.char == env_vars.Env_Vars.QUIT_KEY:
+            self.monitor.stop()
+            self.title("Spectrum Analyzer - Stopping...")
+
+    def toggle_gui_state(self, disabled):
+        state = 'disabled' if disabled else 'normal'
+        for widget in self.main_frame.winfo_children():
+            if isinstance(widget, ttk.Button):
+                widget.configure(state=state)
+
+        # Update window title instead of changing frame background
+        if disabled:
+            self.title("Spectrum Analyzer - Analyzing...")
+        else:
+            self.title("Spectrum Analyzer - Team 5")
+            # removes instructions to quit the analysis to the greyed out GUI
+            self.destroy_quit_label()
+            
+    # adds instructions to quit the analysis to the greyed out GUI
+    def add_quit_label(self):
+        ttk.Label(
+            self.main_frame,
+            text="Press the Q key to quit the analysis",
+            foreground="red",
+        ).pack(pady=10, padx=10, fill=tk.X)
+
+    # removes instructions to quit the analysis to the greyed out GUI
+    def destroy_quit_label(self):
+        for widget in self.main_frame.winfo_children():
+                if isinstance(widget, ttk.Label):
+                    if widget.cget("text") == "Press the Q key to quit the analysis":
+                        widget.destroy()
+
+
+    # Methods for editing numeric and string variables
+    def edit_span(self):
+        self.edit_numeric_var("SPAN", "Enter new SPAN value:")
+
+    def edit_center(self):
+        self.edit_numeric_var("center", "Enter new CENTER value:")
+
+    def edit_dbPerHLine(self):
+        self.edit_numeric_var("dbPerHLine", "Enter new dbPerHLine value:")
+
+    def edit_video_folder(self):
+        # Create a new window for editing the video folder
+        edit_window = tk.Toplevel(self)
+        edit_window.title("Edit Video Folder")
+
+        # Entry for manual path input
+        path_var = tk.StringVar(value=env_vars.Env_Vars.VIDEO_FOLDER)
+        entry = ttk.Entry(edit_window, textvariable=path_var, width=50)
+        entry.pack(pady=5, padx=10)
+
+        # Function to open a file dialog and update the entry
+        def browse_folder():
+            folder_path = filedialog.askdirectory(
+                initialdir=env_vars.Env_Vars.VIDEO_FOLDER
+            )
+            if folder_path:
+                path_var.set(folder_path)
+
+        # Browse button
+        browse_button = ttk.Button(edit_window, text="Browse", command=browse_folder)
+        browse_button.pack(pady=5, padx=10)
+
+        # Function to update the VIDEO_FOLDER variable
+        def update_video_folder():
+            folder = path_var.get()
+            if os.path.isdir(folder):
+                env_vars.Env_Vars.VIDEO_FOLDER = folder
+                edit_window.destroy()
+            else:
+                tk.messagebox.showerror("Error", "Invalid folder path")
+
+        # OK and Cancel buttons
+        ttk.Button(edit_window, text="OK", command=update_video_folder).pack(
+            side=tk.LEFT, pady=10, padx=10
+        )
+        ttk.Button(edit_window, text="Cancel", command=edit_window.destroy).pack(
+            side=tk.RIGHT, pady=10, padx=10
+        )
+
+        edit_window.grab_set()  # Make the window modal
+
+    def edit_quit_key(self):
+        self.edit_string_var("QUIT_KEY", "Enter new quit key:")
+
+    def edit_dilate_iterations(self):
+        self.edit_numeric_var("DILATE_ITERATIONS", "Enter new dilation iterations:")
+
+    def edit_erode_iterations(self):
+        self.edit_numeric_var("ERODE_ITERATIONS", "Enter new erosion iterations:")
+
+    # Helper methods
+    def edit_numeric_var(self, var_name, prompt):
+        new_value = simpledialog.askinteger(
+            var_name, prompt, initialvalue=getattr(env_vars.Env_Vars, var_name)
+        )
+        if new_value is not None:
+            setattr(env_vars.Env_Vars, var_name, new_value)
+
+    def edit_string_var(self, var_name, prompt):
+        new_value = simpledialog.askstring(
+            var_name, prompt, initialvalue=getattr(env_vars.Env_Vars, var_name)
+        )
+        if new_value:
+            setattr(env_vars.Env_Vars, var_name, new_value)
+
+    def edit_color(self, color_var_name):
+        initial_color = getattr(env_vars.Env_Vars, color_var_name)
+        color_code = colorchooser.askcolor(
+            title=f"Choose color for {color_var_name}",
+            initialcolor=(initial_color[0], initial_color[1], initial_color[2]),
+        )
+        if color_code[1]:
+            new_color = np.array([int(val) for val in color_code[0]])
+            setattr(env_vars.Env_Vars, color_var_name, new_color)
@@ -0,0 +1,219 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+from time import perf_counter
+import cv2
+import numpy as np
+import env_vars
+import frame_analysis
+import grid_detector
+import log_config
+import main
+import synthetic_video
+import utilities
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ===================================
+#  Throughput benchmark suite
+# ===================================
+# Renders synthetic videos, times the pipeline stages and the full headless video_to_csv path,
+# and saves the results as JSON so versions can be compared.
+#
+# Usage:
+#     python benchmark.py                                   # default cases, results in benchmark_results/
+#     python benchmark.py --resolutions 1920x1080 --frames 600
+#     python benchmark.py --compare benchmark_results/old.json
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def latency_summary(latencies):
+    """Frames per second and latency percentiles (ms) of a list of per-frame durations in seconds."""
+    latencies_ms = np.array(latencies) * 1000
+    if latencies_ms.size == 0:
+        return {'calls': 0}
+    return {
+        'calls': int(latencies_ms.size),
+        'fps': float(1000 / latencies_ms.mean()) if latencies_ms.mean() > 0 else None,
+        'mean_ms': float(latencies_ms.mean()),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p90_ms': float(np.percentile(latencies_ms, 90)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'max_ms': float(latencies_ms.max()),
+    }
+
+
+def read_frames(video_path, count):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def time_calls(function, items):
+    latencies = []
+    for item in items:
+        start = perf_counter()
+        function(item)
+        latencies.append(perf_counter() - start)
+    return latencies
+
+
+def benchmark_stages(video_path, sample_frames):
+    """Per-call latency of the individual Utilities stages and of the full per-frame analysis."""
+    frames = read_frames(video_path, sample_frames)
+    span, center, dbPerHLine = env_vars.Env_Vars.SPAN, env_vars.Env_Vars.center, env_vars.Env_Vars.dbPerHLine
+    results = {
+        'find_wave': latency_summary(time_calls(utilities.Utilities.find_wave, frames)),
+        'findGrid': latency_summary(time_calls(utilities.Utilities.findGrid, frames)),
+        'detect_grid': latency_summary(time_calls(grid_detector.detect_grid, frames)),
+    }
+
+    # process_wave on the real find_wave outputs, with the grid and baseline of the first frame
+    calibration = grid_detector.detect_grid(frames[0])
+    waves = [utilities.Utilities.find_wave(frame) for frame in frames]
+    initial_y = next((wave[3] for wave in waves if wave[3] is not None), None)
+    initial_x = next((wave[2] for wave in waves if wave[2] is not None), None)
+
+    def process(item):
+        frame, (mask, (wave_y, wave_x), leftmost_x, leftmost_y, _, _) = item
+        utilities.Utilities.process_wave(frame, mask, span, center, dbPerHLine, calibration.height, wave_x, wave_y,
+                                         initial_x, leftmost_y, initial_y, calibration.width, calibration.center_x)
+
+    results['process_wave'] = latency_summary(time_calls(process, list(zip(frames, waves))))
+
+    # Everything done per frame by video_to_csv, inside the calibrated screen region
+    analyzer = frame_analysis.FrameAnalyzer(calibration, span, center, dbPerHLine, frames[0].shape,
+                                            initial_x, initial_y)
+    results['frame_analysis'] = latency_summary(time_calls(analyzer.analyze, frames))
+    return results
+
+
+def benchmark_full_path(video_path):
+    """Run the headless video_to_csv path in a scratch folder; runs in a fresh process so peak RSS is its own."""
+    # A spawned process starts with the default settings
+    env_vars.ensure_loaded()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        cap = cv2.VideoCapture(video_path)
+        stats = main.video_to_csv(cap, 'benchmark.mp4', env_vars.Env_Vars.SPAN, env_vars.Env_Vars.center,
+                                  env_vars.Env_Vars.dbPerHLine, show_video=False)
+    stats['peak_rss_mb'] = peak_rss_mb()
+    return stats
+
+
+# Spawned, so the full path starts without the memory of this process; the log queue must come from this context
+SPAWN = multiprocessing.get_context('spawn')
+
+
+def run_full_path_isolated(video_path, log_queue):
+    with SPAWN.Pool(1, maxtasksperchild=1, initializer=log_config.configure_worker, initargs=(log_queue,)) as pool:
+        return pool.apply(benchmark_full_path, (os.path.abspath(video_path),))
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': multiprocessing.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+    }
+
+
+def compare(current, previous_path):
+    """Print the fps of every case against a previous results file."""
+    with open(previous_path, 'r') as file:
+        previous = json.load(file)
+    previous_cases = {case['name']: case for case in previous['cases']}
+    print(f"Compared with {previous_path}:")
+    for case in current['cases']:
+        old = previous_cases.get(case['name'])
+        if old is None:
+            continue
+        for stage, stats in case['stages'].items():
+            old_fps = old['stages'].get(stage, {}).get('fps')
+            if old_fps and stats.get('fps'):
+                print(f"  {case['name']} {stage}: {old_fps:.1f} -> {stats['fps']:.1f} FPS ({stats['fps'] / old_fps:.2f}x)")
+        old_fps, new_fps = old['full_path'].get('fps'), case['full_path'].get('fps')
+        if old_fps and new_fps:
+            print(f"  {case['name']} video_to_csv: {old_fps:.1f} -> {new_fps:.1f} FPS ({new_fps / old_fps:.2f}x)")
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the spectrum analyzer pipeline on synthetic videos.")
+    parser.add_argument("--resolutions", default="1280x720,1920x1080", help="Comma separated WIDTHxHEIGHT list")
+    parser.add_argument("--frames", type=int, nargs="+", default=[300], help="Video length(s) in frames")
+    parser.add_argument("--sample-frames", type=int, default=60, help="Frames used for the per-stage timings")
+    parser.add_argument("--hold-frames", type=int, default=1, help="Frames the synthetic trace stays still")
+    parser.add_argument("--clear-every", type=int, default=150, help="Clear and redraw the trace every N frames")
+    parser.add_argument("--videos", default=os.path.join(tempfile.gettempdir(), "spectrum_benchmark_videos"),
+                        help="Folder where the synthetic videos are cached")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmark_results/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="Previous results file to compare against")
+    args = parser.parse_args(argv)
+    env_vars.load_settings()
+
+    output = args.output or os.path.join(
+        "benchmark_results", datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    output = os.path.abspath(output)
+    os.makedirs(args.videos, exist_ok=True)
+    log_queue = log_config.start_listener(SPAWN)
+
+    results = {'created': datetime.now().isoformat(timespec='seconds'), 'environment': environment(), 'cases': []}
+    for width, height in synthetic_video.parse_resolutions(args.resolutions):
+        for frames in args.frames:
+            name = f"{width}x{height}_{frames}f_hold{args.hold_frames}_clear{args.clear_every}"
+            video_path = os.path.join(args.videos, f"synthetic_{name}.mp4")
+            if not os.path.exists(video_path):
+                print(f"Rendering {video_path}")
+                synthetic_video.generate_video(video_path, width, height, frames, hold_frames=args.hold_frames,
+                                               clear_every=args.clear_every)
+
+            print(f"Benchmarking {name}")
+            case = {
+                'name': name,
+                'stages': benchmark_stages(video_path, args.sample_frames),
+                'full_path': run_full_path_isolated(video_path, log_queue),
+            }
+            results['cases'].append(case)
+            for stage, stats in case['stages'].items():
+                print(f"  {stage}: {stats.get('fps', 0):.1f} calls/s, p50 {stats.get('p50_ms', 0):.2f} ms, "
+                      f"p99 {stats.get('p99_ms', 0):.2f} ms")
+            full = case['full_path']
+            print(f"  video_to_csv: {full['fps']:.1f} FPS, peak RSS {full['peak_rss_mb']} MB")
+
+    log_config.stop_listener()
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return results
+
+
+if __name__ == "__main__":
+    run()
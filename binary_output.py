@@ -0,0 +1,268 @@
+import json
+import logging
+import os
+from time import perf_counter
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Total size reserved for the .npy header, so the final shape can be written in place once the row count is known
+NPY_HEADER_SIZE = 128
+
+# Fixed-width columns of the binary output, in the same order as the CSV
+COLUMNS = [
+    ('timestamp', np.float64),
+    ('center_frequency', np.float64),
+    ('min_amplitude', np.float64),
+    ('max_amplitude', np.float64),
+    ('center_amplitude', np.float64),
+    ('frame', np.int64),
+]
+
+
+def npy_header(dtype, shape):
+    """Version 1.0 .npy header for an array of dtype and shape, padded to NPY_HEADER_SIZE bytes."""
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (np.lib.format.dtype_to_descr(dtype), shape)
+    # magic string (6) + version (2) + header length (2)
+    header_length = NPY_HEADER_SIZE - 10
+    if len(header) + 1 > header_length:
+        raise ValueError(f"Shape {shape} does not fit in the reserved .npy header.")
+    header = header.ljust(header_length - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + header_length.to_bytes(2, 'little') + header.encode('latin1')
+
+
+class NpyAppender:
+    """Streams rows into a .npy file that np.load(mmap_mode='r') can open without copying.
+
+    Rows are appended to a .part file whose header is updated on every flush;
+    close() writes the final row count and renames it to path.
+    resume_rows continues an interrupted file from its first resume_rows rows.
+    """
+
+    def __init__(self, path, dtype, row_shape=(), resume_rows=None):
+        self.path = path
+        self.part_path = path + '.part'
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        if resume_rows is not None:
+            if not os.path.exists(self.part_path):
+                os.replace(self.path, self.part_path)
+            self.rows = resume_rows
+            self._file = open(self.part_path, 'r+b')
+            self._file.truncate(NPY_HEADER_SIZE + resume_rows * self.dtype.itemsize * int(np.prod(self.row_shape)))
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self.rows = 0
+            self._file = open(self.part_path, 'wb')
+            self._file.write(npy_header(self.dtype, (0,) + self.row_shape))
+
+    def append(self, rows):
+        """Append an array of rows, shaped (n,) + row_shape."""
+        rows = np.ascontiguousarray(rows, dtype=self.dtype).reshape((-1,) + self.row_shape)
+        self._file.write(rows.tobytes())
+        self.rows += rows.shape[0]
+
+    def flush(self):
+        """Write the current row count into the header and push the file to disk."""
+        self._file.seek(0)
+        self._file.write(npy_header(self.dtype, (self.rows,) + self.row_shape))
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        os.replace(self.part_path, self.path)
+
+
+class MappedNpy:
+    """A .npy file of capacity rows allocated up front and written in place through np.memmap.
+
+    The file is created sparse, so unwritten rows cost no disk space or time. grow() makes room for more rows
+    and finish() cuts the file down to the rows actually used. np.load(mmap_mode='r') opens it at any time.
+    resume=True keeps the rows already in an existing file.
+    """
+
+    def __init__(self, path, dtype, columns, capacity, resume=False):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.columns = columns
+        self.array = None
+        with open(path, 'r+b' if resume and os.path.exists(path) else 'wb'):
+            pass
+        self._map(capacity)
+
+    def _map(self, capacity):
+        with open(self.path, 'r+b') as file:
+            file.write(npy_header(self.dtype, (capacity, self.columns)))
+            file.truncate(NPY_HEADER_SIZE + capacity * self.columns * self.dtype.itemsize)
+        self.capacity = capacity
+        self.array = np.memmap(self.path, self.dtype, 'r+', offset=NPY_HEADER_SIZE, shape=(capacity, self.columns))
+
+    def grow(self, capacity):
+        """Make room for at least capacity rows, keeping the rows written so far."""
+        if capacity > self.capacity:
+            self.array.flush()
+            self.array = None
+            self._map(capacity)
+
+    def flush(self):
+        self.array.flush()
+
+    def finish(self, rows):
+        """Keep only the first rows rows and release the mapping."""
+        if self.array is None:
+            return
+        self.array.flush()
+        self.array = None
+        with open(self.path, 'r+b') as file:
+            file.write(npy_header(self.dtype, (rows, self.columns)))
+            file.truncate(NPY_HEADER_SIZE + rows * self.columns * self.dtype.itemsize)
+
+
+class ColumnarWriter:
+    """Writes result rows as one fixed-width .npy file per column, plus a header.json with the settings used.
+
+    Has the same write_row/flush/checkpoint/close interface as csv_output.StreamingCsvWriter.
+    """
+    name = 'columns'
+
+    def __init__(self, directory, settings, flush_seconds=5.0, buffer_rows=1024, resume=None):
+        self.directory = directory
+        self.settings = settings
+        self.flush_seconds = flush_seconds
+        self.buffer_rows = buffer_rows
+        os.makedirs(directory, exist_ok=True)
+        resume_rows = resume['rows'] if resume is not None else None
+        self._columns = [NpyAppender(os.path.join(directory, name + '.npy'), dtype, resume_rows=resume_rows)
+                         for name, dtype in COLUMNS]
+        self._buffer = []
+        self._last_flush = perf_counter()
+
+    def write_row(self, timestamp, center_freq, min_amplitude, max_amplitude, center_amplitude, frame_index):
+        self._buffer.append((timestamp, center_freq, min_amplitude, max_amplitude, center_amplitude, frame_index))
+        if len(self._buffer) >= self.buffer_rows:
+            self._write_buffer()
+        if perf_counter() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def _write_buffer(self):
+        if not self._buffer:
+            return
+        # Transpose the buffered rows into columns
+        for column, values in zip(self._columns, zip(*self._buffer)):
+            column.append(np.array(values))
+        self._buffer = []
+
+    def flush(self):
+        self._write_buffer()
+        for column in self._columns:
+            column.flush()
+        self._last_flush = perf_counter()
+
+    def checkpoint(self):
+        """Flush and return the state needed to resume writing after the rows written so far."""
+        self.flush()
+        return {'rows': self._columns[0].rows}
+
+    def close(self):
+        self._write_buffer()
+        for column in self._columns:
+            column.close()
+        header = dict(self.settings)
+        header['columns'] = [name for name, _ in COLUMNS]
+        header['rows'] = self._columns[0].rows
+        with open(os.path.join(self.directory, 'header.json'), 'w') as file:
+            json.dump(header, file)
+        logger.info("Binary output created successfully: %s", self.directory)
+
+
+def load_columns(directory):
+    """Open a ColumnarWriter output without copying it into memory.
+
+    Returns the header dictionary and a dictionary of read-only memory-mapped column arrays.
+    """
+    with open(os.path.join(directory, 'header.json'), 'r') as file:
+        header = json.load(file)
+    columns = {
+        name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+        for name in header['columns']
+    }
+    return header, columns
+
+
+class TraceWriter:
+    """Writes the calibrated trace of every measured frame.
+
+    frame.npy holds the frame index of each row and trace.npy the amplitude in dB of every grid column
+    (NaN where there was no trace), one row per frame; frequencies.npy holds the frequency of each column.
+    Rows line up with the CSV rows. Has the same flush/checkpoint/close interface as ColumnarWriter.
+    """
+    name = 'trace'
+
+    def __init__(self, directory, frequencies, settings, flush_seconds=5.0, buffer_rows=256, resume=None):
+        self.directory = directory
+        self.settings = settings
+        self.flush_seconds = flush_seconds
+        self.buffer_rows = buffer_rows
+        os.makedirs(directory, exist_ok=True)
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        np.save(os.path.join(directory, 'frequencies.npy'), frequencies)
+        resume_rows = resume['rows'] if resume is not None else None
+        self._frames = NpyAppender(os.path.join(directory, 'frame.npy'), np.int64, resume_rows=resume_rows)
+        self._trace = NpyAppender(os.path.join(directory, 'trace.npy'), np.float32, (frequencies.size,), resume_rows)
+        self._buffer = []
+        self._last_flush = perf_counter()
+
+    def write_trace(self, frame_index, spectrum):
+        self._buffer.append((frame_index, spectrum))
+        if len(self._buffer) >= self.buffer_rows:
+            self._write_buffer()
+        if perf_counter() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def _write_buffer(self):
+        if not self._buffer:
+            return
+        frames, spectra = zip(*self._buffer)
+        self._frames.append(np.array(frames))
+        self._trace.append(np.stack(spectra))
+        self._buffer = []
+
+    def flush(self):
+        self._write_buffer()
+        self._frames.flush()
+        self._trace.flush()
+        self._last_flush = perf_counter()
+
+    def checkpoint(self):
+        """Flush and return the state needed to resume writing after the rows written so far."""
+        self.flush()
+        return {'rows': self._frames.rows}
+
+    def close(self):
+        self._write_buffer()
+        self._frames.close()
+        self._trace.close()
+        header = dict(self.settings)
+        header['rows'] = self._frames.rows
+        header['columns'] = self._trace.row_shape[0]
+        with open(os.path.join(self.directory, 'header.json'), 'w') as file:
+            json.dump(header, file)
+        logger.info("Trace output created successfully: %s", self.directory)
+
+
+def load_trace(directory):
+    """Open a TraceWriter output without copying it into memory.
+
+    Returns the header dictionary, the column frequencies, and read-only memory-mapped frame and trace arrays.
+    """
+    with open(os.path.join(directory, 'header.json'), 'r') as file:
+        header = json.load(file)
+    frequencies = np.load(os.path.join(directory, 'frequencies.npy'))
+    frames = np.load(os.path.join(directory, 'frame.npy'), mmap_mode='r')
+    trace = np.load(os.path.join(directory, 'trace.npy'), mmap_mode='r')
+    return header, frequencies, frames, trace
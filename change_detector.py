@@ -0,0 +1,31 @@
+import cv2
+
+
+class FrameChangeDetector:
+    """Tells whether the screen region of a frame changed enough to be worth analyzing again.
+
+    The region is shrunk by scale with area averaging (which also averages out compression noise) and
+    compared with the last frame that was reported as changed. A frame counts as changed when any
+    downsampled pixel differs by more than threshold intensity levels. Comparing against the last
+    analyzed frame rather than the previous one means slow drift still triggers a new analysis.
+    """
+
+    def __init__(self, roi, threshold, scale=8):
+        self.roi = roi
+        self.threshold = threshold
+        self.scale = scale
+        self.frames_skipped = 0
+        self._reference = None
+
+        x0, y0, x1, y1 = roi
+        self._size = (max((x1 - x0) // scale, 1), max((y1 - y0) // scale, 1))
+
+    def changed(self, frame):
+        """Return True if the frame should be analyzed, False if the previous measurement still holds."""
+        x0, y0, x1, y1 = self.roi
+        small = cv2.resize(frame[y0:y1, x0:x1], self._size, interpolation=cv2.INTER_AREA)
+        if self._reference is not None and cv2.absdiff(small, self._reference).max() <= self.threshold:
+            self.frames_skipped += 1
+            return False
+        self._reference = small
+        return True
@@ -0,0 +1,103 @@
+import logging
+import threading
+from time import perf_counter
+import cv2
+import numpy as np
+import analysis_config
+
+logger = logging.getLogger(__name__)
+
+# ===================================
+#  BGR lookup table color classifier
+# ===================================
+# The HSV color bounds select a fixed set of BGR colors, so all 2^24 BGR colors are classified once, with the
+# same cvtColor + inRange as the HSV filter, and frames are then labeled with one table lookup per pixel
+# without converting them to HSV. The masks are identical to the HSV filter ones.
+#
+# Used when COLOR_CLASSIFIER is 'lut'; the table takes 16 MB per process and is built on first use.
+
+# Label bits of a pixel; a color can have both (the default wave and grid bounds share a corner)
+WAVE = 0x80
+GRID = 0x01
+
+# Colors classified per cvtColor call while building the table, to bound the memory used
+_BUILD_CHUNK = 1 << 20
+
+_current = None
+_lock = threading.Lock()
+
+
+def bounds(label, config=None):
+    """(lower, upper) uint8 HSV bounds of the WAVE or GRID label in config (default: the current AnalysisConfig)."""
+    config = config if config is not None else analysis_config.current()
+    if label == WAVE:
+        return config.lower_wave, config.upper_wave
+    return config.lower_grid, config.upper_grid
+
+
+def label_mask(labels, label):
+    """0/255 mask of the pixels of a label image with the label bit (WAVE or GRID), as cv2.inRange returns."""
+    return cv2.compare(cv2.bitwise_and(labels, label), 0, cv2.CMP_GT)
+
+
+def build_table(lower_wave, upper_wave, lower_grid, upper_grid):
+    """WAVE/GRID label bits of every BGR color, indexed by b + (g << 8) + (r << 16)."""
+    table = np.empty(1 << 24, np.uint8)
+    for start in range(0, table.size, _BUILD_CHUNK):
+        codes = np.arange(start, start + _BUILD_CHUNK, dtype=np.uint32)
+        # The low three bytes of the little-endian codes are b, g, r
+        colors = np.ascontiguousarray(codes.view(np.uint8).reshape(-1, 1, 4)[..., :3])
+        hsv = cv2.cvtColor(colors, cv2.COLOR_BGR2HSV)
+        wave = cv2.inRange(hsv, lower_wave, upper_wave)
+        grid = cv2.inRange(hsv, lower_grid, upper_grid)
+        table[start:start + _BUILD_CHUNK] = ((wave & WAVE) | (grid & GRID)).ravel()
+    return table
+
+
+def bounds_key(*bounds):
+    """Hashable value of a set of color bounds."""
+    return tuple(tuple(np.asarray(bound).ravel().tolist()) for bound in bounds)
+
+
+class ColorClassifier:
+    """Labels the pixels of BGR frames as wave and/or grid colored with a precomputed table.
+
+    Safe to share between the analysis threads of a video; each thread keeps its own index buffer.
+    """
+
+    def __init__(self, lower_wave, upper_wave, lower_grid, upper_grid):
+        self.key = bounds_key(lower_wave, upper_wave, lower_grid, upper_grid)
+        start = perf_counter()
+        self.table = build_table(lower_wave, upper_wave, lower_grid, upper_grid)
+        logger.debug("Built the color lookup table in %.0f ms.", (perf_counter() - start) * 1000)
+        self._buffers = threading.local()
+
+    def labels(self, frame):
+        """WAVE/GRID label bits of every pixel of a BGR frame, in one pass."""
+        shape = frame.shape[:2]
+        buffers = self._buffers
+        if getattr(buffers, 'shape', None) != shape:
+            buffers.shape = shape
+            buffers.index = np.empty(shape, np.int64)
+        # Read as little-endian uint32, a BGRA pixel is b + (g << 8) + (r << 16) + (alpha << 24)
+        bgra = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+        np.bitwise_and(bgra.view(np.uint32)[..., 0], 0xFFFFFF, out=buffers.index)
+        return self.table.take(buffers.index)
+
+    def mask(self, frame, label):
+        """0/255 mask of the pixels of frame with the label bit (WAVE or GRID), as cv2.inRange returns."""
+        return label_mask(self.labels(frame), label)
+
+
+def current(config=None):
+    """Classifier for the color bounds of config (default: the current AnalysisConfig), rebuilt when they change."""
+    global _current
+    color_bounds = bounds(WAVE, config) + bounds(GRID, config)
+    classifier = _current
+    if classifier is None or classifier.key != bounds_key(*color_bounds):
+        with _lock:
+            # Another analysis thread may have built it while this one waited
+            if _current is None or _current.key != bounds_key(*color_bounds):
+                _current = ColorClassifier(*color_bounds)
+            classifier = _current
+    return classifier
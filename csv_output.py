@@ -0,0 +1,117 @@
+import csv
+import logging
+import os
+from time import perf_counter
+import binary_output
+import env_vars
+import waterfall
+
+logger = logging.getLogger(__name__)
+
+COMPLETED_DIRECTORY = 'Completed'
+CSV_HEADER = ['Timestamp (s)', 'Center Frequency', 'Minimum Amplitude', 'Maximum Amplitude', 'Center Amplitude',
+              'Frame']
+
+
+def output_path(fileName, extension='.csv'):
+    """Path in the Completed folder for the output of a video file, creating the folder if needed."""
+    if not os.path.exists(COMPLETED_DIRECTORY):
+        os.makedirs(COMPLETED_DIRECTORY)
+    return os.path.join(COMPLETED_DIRECTORY, fileName.replace('.mp4', extension))
+
+
+class StreamingCsvWriter:
+    """Writes result rows to disk as they are produced.
+
+    Rows go to a .part file that is flushed to disk every flush_seconds, so a crash only loses the
+    last few seconds of results. close() renames it to the final name in one atomic step.
+    With a resume state from checkpoint(), the file is cut back to that point and rows are appended to it.
+    """
+    name = 'csv'
+
+    def __init__(self, path, flush_seconds=5.0, resume=None):
+        self.path = path
+        self.part_path = path + '.part'
+        self.flush_seconds = flush_seconds
+        self.rows_written = 0
+        if resume is not None:
+            # A stopped run may already have renamed its output to the final name
+            if not os.path.exists(self.part_path):
+                os.replace(self.path, self.part_path)
+            with open(self.part_path, 'r+b') as file:
+                file.truncate(resume['offset'])
+            self.rows_written = resume['rows']
+            self._file = open(self.part_path, mode='a', newline='')
+            self._writer = csv.writer(self._file)
+        else:
+            self._file = open(self.part_path, mode='w', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(CSV_HEADER)
+        self._last_flush = perf_counter()
+
+    def write_row(self, timestamp, center_freq, min_amplitude, max_amplitude, center_amplitude, frame_index):
+        self._writer.writerow([timestamp, center_freq, min_amplitude, max_amplitude, center_amplitude, frame_index])
+        self.rows_written += 1
+        if perf_counter() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Push everything written so far to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_flush = perf_counter()
+
+    def checkpoint(self):
+        """Flush and return the state needed to resume writing after the rows written so far."""
+        self.flush()
+        return {'offset': os.fstat(self._file.fileno()).st_size, 'rows': self.rows_written}
+
+    def close(self):
+        """Finish the file and move it to its final name."""
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        os.replace(self.part_path, self.path)
+        logger.info("CSV file created successfully: %s", self.path)
+
+
+def output_exists(fileName):
+    """True if a finished or partial CSV for fileName is on disk."""
+    path = output_path(fileName)
+    return os.path.exists(path) or os.path.exists(path + '.part')
+
+
+def open_result_writers(fileName, span, center, dbPerHLine, resume=None):
+    """Open the CSV writer for a video, plus the columnar binary writer when BINARY_OUTPUT is enabled.
+
+    resume maps writer names to the states returned by their checkpoint() in an interrupted run.
+    """
+    resume = resume or {}
+    flush_seconds = env_vars.Env_Vars.CSV_FLUSH_SECONDS
+    writers = [StreamingCsvWriter(output_path(fileName), flush_seconds, resume.get(StreamingCsvWriter.name))]
+    if env_vars.Env_Vars.BINARY_OUTPUT:
+        settings = {'video': fileName, 'SPAN': span, 'center': center, 'dbPerHLine': dbPerHLine}
+        writers.append(binary_output.ColumnarWriter(output_path(fileName, '_columns'), settings, flush_seconds,
+                                                    resume=resume.get(binary_output.ColumnarWriter.name)))
+    return writers
+
+
+def open_trace_writers(fileName, analyzer, frame_count, fps, span, center, dbPerHLine, resume=None):
+    """Open the calibrated trace writer (TRACE_OUTPUT) and the waterfall writer (WATERFALL_OUTPUT) that are enabled.
+
+    analyzer is the calibrated frame_analysis.FrameAnalyzer of the video, and frame_count its expected length.
+    """
+    resume = resume or {}
+    settings = {'video': fileName, 'SPAN': span, 'center': center, 'dbPerHLine': dbPerHLine}
+    flush_seconds = env_vars.Env_Vars.CSV_FLUSH_SECONDS
+    writers = []
+    if env_vars.Env_Vars.TRACE_OUTPUT:
+        writers.append(binary_output.TraceWriter(output_path(fileName, '_trace'), analyzer.frequencies(), settings,
+                                                 flush_seconds, resume=resume.get(binary_output.TraceWriter.name)))
+    if env_vars.Env_Vars.WATERFALL_OUTPUT:
+        writers.append(waterfall.WaterfallWriter(output_path(fileName, '_waterfall'), analyzer.frequencies(),
+                                                 frame_count, dict(settings, fps=fps),
+                                                 env_vars.Env_Vars.WATERFALL_DTYPE, analyzer.amplitude_range(),
+                                                 flush_seconds, resume.get(waterfall.WaterfallWriter.name)))
+    return writers
@@ -19,13 +19,75 @@ class Env_Vars:
     KERNEL_SIZE = np.ones((5, 5), np.uint8)
     DILATE_ITERATIONS = 1
     ERODE_ITERATIONS = 1
+    # Wave mask engine: 'contour' (original), 'external' (same results, less work per frame),
+    # or 'compare' (runs both and logs any difference)
+    MASK_ENGINE = 'contour'
+    # Color classification: 'hsv' (cvtColor + inRange per frame) or 'lut' (a 16 MB table over every BGR color,
+    # same masks without the HSV conversion)
+    COLOR_CLASSIFIER = 'hsv'
+
+    # Grid detection
+    GRID_DIVISIONS = 10  # number of divisions between the outer graticule lines
+    GRID_SEARCH_FRAMES = 30  # frames to search for the grid before giving up on a video
+    ROI_MARGIN = 16  # pixels around the grid that are still analyzed on every frame
+
+    # Frame pipeline: analysis threads per video (0 analyzes on the reading thread) and bounded queue size
+    ANALYSIS_THREADS = 2
+    FRAME_QUEUE_SIZE = 8
+
+    # Frames whose screen region (shrunk CHANGE_SCALE times) differs from the last analyzed frame by no more than
+    # CHANGE_THRESHOLD intensity levels reuse its measurement; 0 (the default) analyzes every frame
+    CHANGE_THRESHOLD = 0
+    CHANGE_SCALE = 8
+
+    # Analyze every SAMPLE_STRIDE-th frame, or the first frame of every 1/SAMPLE_RATE seconds of video when
+    # SAMPLE_RATE > 0; skipped frames are never decoded into an image. ANALYSIS_WINDOW is the [start, end] in
+    # seconds of the part of each video to analyze (end 0 reads to the end)
+    SAMPLE_STRIDE = 1
+    SAMPLE_RATE = 0
+    ANALYSIS_WINDOW = [0, 0]
+
+    # Seconds between flushes of the CSV output to disk, and between resume checkpoints in the manifest
+    CSV_FLUSH_SECONDS = 5
+    CHECKPOINT_SECONDS = 10
+    # Also write memory-mappable .npy columns next to the CSV
+    BINARY_OUTPUT = False
+    # Also write the calibrated trace of every measured frame (dB per grid column) as .npy files
+    TRACE_OUTPUT = False
+    # Also write a memory-mapped waterfall (one row per frame) with zoomed-out overviews; 'float32' dB or 'uint8'
+    WATERFALL_OUTPUT = False
+    WATERFALL_DTYPE = 'float32'
+
+    # Per-stage timings written to Completed/profile, and a [first, last) frame range to dump cProfile stats for
+    PROFILE_STAGES = False
+    PROFILE_FRAMES = [0, 0]
+
+    # Console logging level, and frames between two per-frame detail records (0 turns per-frame detail off)
+    LOG_LEVEL = 'INFO'
+    FRAME_LOG_INTERVAL = 0
+
+    # Seconds between two progress updates (and downscaled previews) a worker sends to the GUI, and the largest
+    # width or height of a preview in pixels
+    PROGRESS_INTERVAL = 0.25
+    PREVIEW_WIDTH = 320
 
     # Video configuration
     VIDEO_FOLDER = 'Videos'
+    # Height in pixels of the cached video thumbnails, and how many of them are kept in memory
+    THUMBNAIL_HEIGHT = 240
+    THUMBNAIL_CACHE_SIZE = 256
 
     QUIT_KEY = 'q'
 
-def save_settings():
+# Importing this module never touches the disk: the entry points (GUI, headless, benchmark, tuner) call
+# load_settings(), and pool workers are given the settings of their parent.
+# Set once the saved settings were loaded (or the parent's settings applied, in a pool worker)
+_loaded = False
+
+def snapshot():
+        """Every setting as a JSON-compatible dict, as save_settings writes them."""
+        # Never hand out (or save over env_settings.json) the defaults in place of the saved settings
+        ensure_loaded()
         settings = {}
         for attr in dir(Env_Vars):
             if not callable(getattr(Env_Vars, attr)) and not attr.startswith("__"):
@@ -33,24 +95,39 @@ def save_settings():
                 if isinstance(value, np.ndarray):
                     value = value.tolist()  # Convert numpy array to list
                 settings[attr] = value
+        return settings
+
+def save_settings():
+        settings = snapshot()
         with open('env_settings.json', 'w') as file:
             json.dump(settings, file)
 
+def apply_settings(settings):
+    """Set every setting of a snapshot() (or of env_settings.json) on Env_Vars."""
+    global _loaded
+    _loaded = True
+    for attr in settings:
+        value = settings[attr]
+        if isinstance(value, list):
+            value = np.array(value)  # Convert list to numpy array
+        elif isinstance(value, str):
+            value = value.replace('\\', '/')
+        elif isinstance(value, bool):
+            value = value
+
+        setattr(Env_Vars, attr, value)
+
 def load_settings():
+    """Load env_settings.json into Env_Vars, or create it with the defaults. Called by every entry point."""
+    global _loaded
+    _loaded = True
     if os.path.exists('env_settings.json'):
         with open('env_settings.json', 'r') as file:
-            settings = json.load(file)
-            for attr in settings:
-                value = settings[attr]
-                if isinstance(value, list):
-                    value = np.array(value)  # Convert list to numpy array
-                elif isinstance(value, str):
-                    value = value.replace('\\', '/')
-                elif isinstance(value, bool):
-                    value = value
-                
-                setattr(Env_Vars, attr, value)
+            apply_settings(json.load(file))
     else:
         save_settings()
 
-load_settings()
\ No newline at end of file
+def ensure_loaded():
+    """load_settings(), unless the settings were already loaded or applied in this process."""
+    if not _loaded:
+        load_settings()
@@ -0,0 +1,164 @@
+import logging
+from collections import namedtuple
+import numpy as np
+import analysis_config
+import change_detector
+import frame_context
+import grid_detector
+import profiler
+import utilities
+import wave_trace
+
+logger = logging.getLogger(__name__)
+
+# Measurement of one frame; spectrum is the calibrated trace (dB per grid column) when TRACE_OUTPUT or
+# WATERFALL_OUTPUT is on (AnalysisConfig.trace_output), else None
+WaveMeasurement = namedtuple("WaveMeasurement", ["center_freq", "amplitude", "spectrum"])
+
+
+class FrameAnalyzer:
+    """Measures the wave on the frames of one video, restricted to the calibrated screen region.
+
+    config is the AnalysisConfig of the run (by default analysis_config.current()), for span, center and dbPerHLine.
+    """
+
+    def __init__(self, calibration, span, center, dbPerHLine, frame_shape, initial_x=None, initial_y=None,
+                 config=None):
+        self.calibration = calibration
+        self.config = (config if config is not None else analysis_config.current()).with_scale(span, center,
+                                                                                               dbPerHLine)
+        self.span = span
+        self.center = center
+        self.dbPerHLine = dbPerHLine
+        # leftmost point of the wave at the start of the video, used to detect when the trace is being cleared;
+        # set by calibrate before any frame is analyzed, and None only if the video never shows a wave
+        self.initial_x = initial_x
+        self.initial_y = initial_y
+        # Scale of this video's grid, computed once instead of on every frame
+        self.px_per_hz = self.config.px_per_hz(calibration.width)
+        self.px_per_db = self.config.px_per_db(calibration.height)
+
+        # Pad the grid by the configured margin plus the reach of the dilation, so the dilated mask is never clipped
+        dilation_reach = (max(self.config.kernel.shape) // 2) * self.config.dilate_iterations
+        self.roi = grid_detector.screen_roi(calibration, frame_shape, self.config.roi_margin + dilation_reach)
+
+        # Frame columns covered by the grid, one spectrum bin each
+        self.trace_output = self.config.trace_output
+        self.grid_columns = (int(round(calibration.left)), int(round(calibration.right)) + 1)
+
+    def frequencies(self):
+        """Frequency of every spectrum bin, with the same conversion as Utilities.getCenterFreq."""
+        x = np.arange(*self.grid_columns, dtype=np.float64)
+        return utilities.Utilities.frequency_at(x, self.center, self.px_per_hz, self.calibration.center_x)
+
+    def spectrum(self, trace):
+        """Amplitude in dB above the baseline of the trace on every grid column (NaN where there is no trace)."""
+        top = wave_trace.resample(trace, *self.grid_columns)
+        return utilities.Utilities.amplitude_at(self.initial_y - top + 1, self.px_per_db).astype(np.float32)
+
+    def amplitude_range(self):
+        """Amplitude in dB of a trace on the bottom and on the top line of the grid, and of one pixel of height."""
+        # A video without a wave has nothing to convert; its baseline is taken as the bottom of the grid
+        baseline = self.initial_y if self.initial_y is not None else self.calibration.bottom
+        heights = (baseline - self.calibration.bottom + 1, baseline - self.calibration.top + 1, 1)
+        return tuple(float(utilities.Utilities.amplitude_at(height, self.px_per_db)) for height in heights)
+
+    def make_change_detector(self):
+        """A FrameChangeDetector for this video's screen region, or None if CHANGE_THRESHOLD disables it."""
+        if self.config.change_threshold <= 0:
+            return None
+        return change_detector.FrameChangeDetector(self.roi, self.config.change_threshold, self.config.change_scale)
+
+    def context(self, frame, whole_frame=None):
+        """FrameContext of the screen region of frame, reusing the one of the calling thread.
+
+        whole_frame is a FrameContext of the full frame whose color conversion the region can share.
+        Its coordinates (bounds, nonzero, trace) are in the full frame; its masks are cropped.
+        """
+        if whole_frame is not None:
+            return whole_frame.crop(self.roi, frame_context.for_thread())
+        x0, y0, x1, y1 = self.roi
+        return frame_context.for_thread().load(frame[y0:y1, x0:x1], x0, y0, self.config)
+
+    def analyze(self, frame):
+        """Return the displayed mask and the WaveMeasurement of the frame, or None if there is none."""
+        context = self.context(frame)
+        with profiler.stage('find_wave'):
+            bounds = context.bounds
+        leftmost_y = bounds.leftmost_y if bounds is not None else None
+
+        # One value per column instead of every mask pixel
+        with profiler.stage('trace'):
+            trace = context.trace
+        with profiler.stage('process_wave'):
+            result = utilities.Utilities.measure_trace(
+                trace, self.center, self.px_per_hz, self.px_per_db,
+                leftmost_y, self.initial_y, self.calibration.center_x,
+            )
+        if result is None:
+            return context.mask, None
+        center_freq, amplitude = result
+        spectrum = self.spectrum(trace) if self.trace_output else None
+        return context.mask, WaveMeasurement(center_freq, amplitude, spectrum)
+
+
+class AmplitudeTracker:
+    """Running minimum/maximum of the measured amplitude, carried across the frames of a video in order."""
+
+    def __init__(self):
+        self.min_amplitude = 1000
+        self.max_amplitude = 0
+
+    def update(self, amplitude):
+        """Add an amplitude and return the (minimum, maximum, center) amplitude so far."""
+        if amplitude > self.max_amplitude:
+            self.max_amplitude = amplitude
+        if amplitude < self.min_amplitude:
+            self.min_amplitude = amplitude
+        center_amplitude = (self.min_amplitude + self.max_amplitude) / 2
+        return self.min_amplitude, self.max_amplitude, center_amplitude
+
+
+def calibrate(cap, first_frame, span, center, dbPerHLine, config=None):
+    """Locate the grid and the starting wave position on the first frames of the video.
+
+    Returns a FrameAnalyzer that can be shared by every frame (or chunk of frames) of the video; analysis starts
+    after the frame the starting wave position was taken from. The grid is searched on the first GRID_SEARCH_FRAMES
+    frames (an exception is raised if it is not found there), then the frames are read until one shows the wave.
+    The analyzer is never changed afterwards, so threads and chunks analyzing later frames all see the same one.
+    config is the AnalysisConfig to use, by default analysis_config.current().
+    """
+    config = (config if config is not None else analysis_config.current()).with_scale(span, center, dbPerHLine)
+    analyzer = None
+    frame = first_frame
+    # The grid and the wave are found on the same color conversion of each frame
+    whole_frame = frame_context.FrameContext(config=config)
+    frames_searched = 0
+    while analyzer is not None or frames_searched < config.grid_search_frames:
+        whole_frame.load(frame, config=config)
+        if analyzer is None:
+            frames_searched += 1
+            calibration = grid_detector.detect_grid(frame, config.grid_divisions, mask=whole_frame.grid_mask)
+            if calibration is not None:
+                logger.info("Grid found at x=%s-%s, y=%s-%s.",
+                            calibration.left, calibration.right, calibration.top, calibration.bottom)
+                analyzer = FrameAnalyzer(calibration, span, center, dbPerHLine, frame.shape, config=config)
+
+        if analyzer is not None:
+            # The starting wave position is the baseline used to detect when the trace is being cleared
+            bounds = analyzer.context(frame, whole_frame).bounds
+            if bounds is not None:
+                analyzer.initial_x = bounds.leftmost_x
+                analyzer.initial_y = bounds.leftmost_y
+                logger.info("Initial x: %s", analyzer.initial_x)
+                break
+
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+    if analyzer is None:
+        raise Exception(f"Unable to locate the grid in the first {config.grid_search_frames} frames.")
+    if analyzer.initial_y is None:
+        logger.warning("No wave found on any frame of the video.")
+    return analyzer
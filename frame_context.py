@@ -0,0 +1,156 @@
+import threading
+from collections import namedtuple
+import cv2
+import numpy as np
+import analysis_config
+import color_classifier
+import profiler
+import utilities
+import wave_trace
+
+# Leftmost point, horizontal center and width of the wave blob, in frame coordinates
+WaveBounds = namedtuple("WaveBounds", ["leftmost_x", "leftmost_y", "center_x", "mask_width"])
+
+_thread_contexts = threading.local()
+
+
+def _reuse(buffer, shape):
+    """buffer if it is a uint8 array of shape, otherwise a new one."""
+    return buffer if buffer is not None and buffer.shape == shape else np.empty(shape, np.uint8)
+
+
+class FrameContext:
+    """The images and measurements derived from one frame, each computed at most once, when first used.
+
+    The frame may be a region of a larger frame whose top-left pixel is at (x_offset, y_offset); bounds,
+    nonzero and trace are in the coordinates of the larger frame, the masks in those of the region.
+    load() moves a context on to the next frame and keeps its HSV and color mask buffers, so consecutive
+    frames of the same size convert into the same memory. A context belongs to one thread at a time.
+    config is the AnalysisConfig the frame is analyzed with, by default analysis_config.current().
+    """
+    __slots__ = ('frame', 'x_offset', 'y_offset', 'config', '_hsv', '_labels', '_wave_mask', '_grid_mask', '_mask',
+                 '_bounds', '_nonzero', '_trace', '_hsv_buffer', '_wave_buffer')
+
+    def __init__(self, frame=None, x_offset=0, y_offset=0, config=None):
+        self._hsv_buffer = None
+        self._wave_buffer = None
+        self.load(frame, x_offset, y_offset, config)
+
+    def load(self, frame, x_offset=0, y_offset=0, config=None):
+        """Start over on a new frame, forgetting everything computed on the previous one. Returns the context."""
+        self.frame = frame
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+        self.config = config if config is not None else analysis_config.current()
+        self._hsv = None
+        self._labels = None
+        self._wave_mask = None
+        self._grid_mask = None
+        self._mask = None
+        self._bounds = None
+        self._nonzero = None
+        self._trace = None
+        return self
+
+    def crop(self, roi, context=None):
+        """Context of the (x0, y0, x1, y1) region of this frame, sharing the color conversion already done on it.
+
+        context is loaded with the region instead of creating a new one, so its buffers are reused.
+        """
+        x0, y0, x1, y1 = roi
+        context = context if context is not None else FrameContext()
+        context.load(self.frame[y0:y1, x0:x1], self.x_offset + x0, self.y_offset + y0, self.config)
+        if self._hsv is not None:
+            context._hsv = self._hsv[y0:y1, x0:x1]
+        if self._labels is not None:
+            context._labels = self._labels[y0:y1, x0:x1]
+        return context
+
+    @property
+    def hsv(self):
+        """The frame converted to HSV."""
+        if self._hsv is None:
+            self._hsv_buffer = cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV,
+                                            dst=_reuse(self._hsv_buffer, self.frame.shape))
+            self._hsv = self._hsv_buffer
+        return self._hsv
+
+    @property
+    def labels(self):
+        """color_classifier WAVE/GRID label bits of every pixel."""
+        if self._labels is None:
+            self._labels = color_classifier.current(self.config).labels(self.frame)
+        return self._labels
+
+    def _color_mask(self, label, buffer=None):
+        if self.config.color_classifier == 'lut':
+            return color_classifier.label_mask(self.labels, label)
+        lower_bound, upper_bound = color_classifier.bounds(label, self.config)
+        return cv2.inRange(self.hsv, lower_bound, upper_bound, dst=_reuse(buffer, self.frame.shape[:2]))
+
+    @property
+    def wave_mask(self):
+        """Pixels within the wave color bounds, as Utilities.color_mask returns."""
+        if self._wave_mask is None:
+            with profiler.stage('color_filter'):
+                self._wave_buffer = self._color_mask(color_classifier.WAVE, self._wave_buffer)
+            self._wave_mask = self._wave_buffer
+        return self._wave_mask
+
+    @property
+    def grid_mask(self):
+        """Pixels within the grid color bounds with specks removed, as Utilities.grid_mask returns."""
+        if self._grid_mask is None:
+            self._grid_mask = cv2.morphologyEx(self._color_mask(color_classifier.GRID), cv2.MORPH_OPEN,
+                                               np.ones((5, 5), np.uint8))
+        return self._grid_mask
+
+    def _find_wave(self):
+        mask, _, leftmost_x, leftmost_y, center_x, mask_width = utilities.Utilities.find_wave(
+            self.frame, False, self.wave_mask, self.config
+        )
+        if mask is self._wave_buffer:
+            # Without a wave the engines return the color mask, whose buffer is overwritten by the next frame
+            mask = mask.copy()
+        self._mask = mask
+        if leftmost_x is not None:
+            self._bounds = WaveBounds(leftmost_x + self.x_offset, leftmost_y + self.y_offset,
+                                      center_x + self.x_offset, mask_width)
+
+    @property
+    def mask(self):
+        """The wave mask found by the config's mask engine (the color mask if there is no wave), as shown to the user."""
+        if self._mask is None:
+            self._find_wave()
+        return self._mask
+
+    @property
+    def bounds(self):
+        """WaveBounds of the wave, or None if there is no wave on the frame."""
+        if self._mask is None:
+            self._find_wave()
+        return self._bounds
+
+    @property
+    def nonzero(self):
+        """(rows, columns) of every pixel of the wave mask."""
+        if self._nonzero is None:
+            with profiler.stage('nonzero'):
+                rows, columns = np.nonzero(self.mask)
+            self._nonzero = (rows + self.y_offset, columns + self.x_offset)
+        return self._nonzero
+
+    @property
+    def trace(self):
+        """wave_trace.ColumnTrace of the wave mask."""
+        if self._trace is None:
+            self._trace = wave_trace.extract(self.mask, self.x_offset, self.y_offset)
+        return self._trace
+
+
+def for_thread():
+    """The FrameContext of the calling thread, reused for every frame analyzed on it."""
+    context = getattr(_thread_contexts, 'context', None)
+    if context is None:
+        context = _thread_contexts.context = FrameContext()
+    return context
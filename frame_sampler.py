@@ -0,0 +1,63 @@
+import math
+import env_vars
+
+
+class FrameSampler:
+    """Chooses the frames of a video to analyze, inside a [start_seconds, end_seconds) window.
+
+    With rate > 0, the first frame of every 1/rate seconds of video (counted from start_seconds, on the real
+    frame timestamps) is analyzed; otherwise every stride-th frame from the start of the window.
+    end_seconds <= 0 reads to the end of the video. fps is only used to place the window on frame numbers.
+    """
+
+    def __init__(self, fps, stride=1, rate=0, start_seconds=0, end_seconds=0):
+        self.fps = fps
+        self.stride = max(int(stride), 1)
+        self.rate = rate if rate > 0 else 0
+        self.start_seconds = max(start_seconds, 0)
+        self.end_seconds = end_seconds if end_seconds > 0 else None
+        self._last_slot = None
+
+    def start_frame(self):
+        """Frame number to seek to for the start of the window (0 when fps is unknown)."""
+        return int(self.start_seconds * self.fps) if self.fps > 0 else 0
+
+    def end_frame(self):
+        """Frame number just past the end of the window, or None when the window runs to the end of the video."""
+        if self.end_seconds is None or self.fps <= 0:
+            return None
+        return math.ceil(self.end_seconds * self.fps)
+
+    def is_trivial(self):
+        """True if every frame of the video is analyzed."""
+        return self.stride == 1 and self.rate == 0 and self.start_seconds == 0 and self.end_seconds is None
+
+    def finished(self, timestamp):
+        """True once timestamp (seconds) is past the end of the window."""
+        return self.end_seconds is not None and timestamp >= self.end_seconds
+
+    def _slot(self, timestamp):
+        return math.floor((timestamp - self.start_seconds) * self.rate + 1e-9)
+
+    def wants(self, frame_index, timestamp):
+        """True if the frame should be decoded and analyzed. Frames must be passed in order."""
+        if timestamp < self.start_seconds:
+            return False
+        if self.rate == 0:
+            return (frame_index - self.start_frame()) % self.stride == 0
+        if self._last_slot is None and self.fps > 0:
+            # The first frame seen (at the window start, a resume point or a chunk boundary) only starts a new
+            # slot if the frame before it was in an earlier one
+            self._last_slot = self._slot(timestamp - 1 / self.fps)
+        slot = self._slot(timestamp)
+        sample = slot != self._last_slot
+        self._last_slot = slot
+        return sample
+
+
+def from_settings(fps):
+    """FrameSampler for the SAMPLE_STRIDE, SAMPLE_RATE and ANALYSIS_WINDOW settings, or None to analyze every frame."""
+    start_seconds, end_seconds = env_vars.Env_Vars.ANALYSIS_WINDOW
+    sampler = FrameSampler(fps, env_vars.Env_Vars.SAMPLE_STRIDE, env_vars.Env_Vars.SAMPLE_RATE,
+                           float(start_seconds), float(end_seconds))
+    return None if sampler.is_trivial() else sampler
@@ -0,0 +1,75 @@
+import numpy as np
+from collections import namedtuple
+import utilities
+
+# Pixel geometry of the instrument graticule found on a frame.
+# left/top/right/bottom are the centers of the outer graticule lines,
+# center_x/center_y are the center lines of the grid (center_x correlates with the CENTER frequency).
+GridCalibration = namedtuple(
+    "GridCalibration",
+    ["left", "top", "right", "bottom", "width", "height", "px_per_div_x", "px_per_div_y", "center_x", "center_y"],
+)
+
+
+def find_lines(profile, min_line_fraction):
+    """Return the center index of every run of profile values at or above min_line_fraction of its peak."""
+    peak = profile.max() if profile.size else 0
+    if peak == 0:
+        return []
+    on_line = profile >= peak * min_line_fraction
+
+    # Edges of each run of consecutive line rows/columns
+    padded = np.concatenate(([False], on_line, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = changes[0::2], changes[1::2]
+    return [(start + end - 1) / 2 for start, end in zip(starts, ends)]
+
+
+def detect_grid(frame, divisions=10, min_line_fraction=0.5, mask=None):
+    """Locate the graticule with one pass of row and column projection profiles.
+
+    mask is the Utilities.grid_mask of the frame, if the caller already has it.
+    Returns a GridCalibration, or None if fewer than two horizontal or vertical lines are found.
+    """
+    if mask is None:
+        mask = utilities.Utilities.grid_mask(frame)
+
+    # Number of grid pixels in every row and every column; graticule lines show up as peaks
+    row_profile = np.count_nonzero(mask, axis=1)
+    column_profile = np.count_nonzero(mask, axis=0)
+
+    rows = find_lines(row_profile, min_line_fraction)
+    columns = find_lines(column_profile, min_line_fraction)
+    if len(rows) < 2 or len(columns) < 2:
+        return None
+
+    # The outer lines bound the grid; inner lines may be dotted or faint, so divisions come from the bounds
+    left, right = columns[0], columns[-1]
+    top, bottom = rows[0], rows[-1]
+    width = right - left
+    height = bottom - top
+    if width <= 0 or height <= 0:
+        return None
+
+    return GridCalibration(
+        left=left,
+        top=top,
+        right=right,
+        bottom=bottom,
+        width=width,
+        height=height,
+        px_per_div_x=width / divisions,
+        px_per_div_y=height / divisions,
+        center_x=(left + right) / 2,
+        center_y=(top + bottom) / 2,
+    )
+
+
+def screen_roi(calibration, frame_shape, margin):
+    """Return the (x0, y0, x1, y1) crop of the grid padded by margin pixels, clamped to the frame."""
+    frame_height, frame_width = frame_shape[:2]
+    x0 = max(int(calibration.left - margin), 0)
+    y0 = max(int(calibration.top - margin), 0)
+    x1 = min(int(calibration.right + margin) + 1, frame_width)
+    y1 = min(int(calibration.bottom + margin) + 1, frame_height)
+    return x0, y0, x1, y1
@@ -0,0 +1,110 @@
+import argparse
+import logging
+import os
+import multiprocessing
+from datetime import datetime
+from time import perf_counter
+import analysis_config
+import env_vars
+import log_config
+import main
+import scheduler
+import worker
+
+# ===================================
+#  Headless batch entry point
+# ===================================
+# Runs the same analysis as the GUI without any OpenCV window or waitKey pacing,
+# so videos are processed as fast as the machine can decode them.
+#
+# Usage:
+#     python headless.py                      # every .mp4 in Env_Vars.VIDEO_FOLDER
+#     python headless.py a.mp4 b.mp4          # specific files
+#     python headless.py --preview-interval 2 # show a preview frame every 2 seconds
+#     python headless.py --chunks 8 long.mp4  # split each video into 8 frame ranges analyzed in parallel
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze spectrum analyzer videos without the GUI.")
+    parser.add_argument("videos", nargs="*", help="Video files to analyze (default: every .mp4 in the video folder)")
+    parser.add_argument("--folder", default=None, help="Folder to search for .mp4 files (default: VIDEO_FOLDER setting)")
+    parser.add_argument("--processes", type=int, default=0, help="Number of worker processes (default: one per CPU core)")
+    parser.add_argument("--preview-interval", type=float, default=0,
+                        help="Show a preview frame every N seconds of wall-clock time (default: no preview)")
+    parser.add_argument("--chunks", type=int, default=1,
+                        help="Split each video into N frame ranges analyzed by separate processes (default: 1)")
+    return parser.parse_args(argv)
+
+
+def find_videos(args):
+    """Resolve the command line arguments to a list of video paths."""
+    if args.videos:
+        return [os.path.abspath(video) for video in args.videos]
+
+    video_folder_path = args.folder or env_vars.Env_Vars.VIDEO_FOLDER
+    if not os.path.exists(video_folder_path):
+        raise Exception(f"The specified folder does not exist: {video_folder_path}")
+    return [os.path.join(video_folder_path, f) for f in sorted(os.listdir(video_folder_path)) if f.endswith('.mp4')]
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    env_vars.load_settings()
+    video_files = find_videos(args)
+    if not video_files:
+        print("No videos found to analyze.")
+        return []
+
+    log_queue = log_config.start_listener()
+    try:
+        return run_videos(args, video_files, log_queue)
+    finally:
+        log_config.stop_listener()
+
+
+def run_videos(args, video_files, log_queue):
+    span = env_vars.Env_Vars.SPAN
+    center = env_vars.Env_Vars.center
+    dbPerHLine = env_vars.Env_Vars.dbPerHLine
+    # Settings are checked once, and every worker analyzes with this snapshot of them
+    config = analysis_config.install(analysis_config.from_settings())
+
+    start_time = perf_counter()
+    if args.chunks > 1:
+        # One long video at a time, its frame ranges spread over every core
+        num_processes = args.processes or multiprocessing.cpu_count()
+        with multiprocessing.Pool(processes=num_processes, initializer=worker.initialize,
+                                  initargs=worker.initargs(log_queue, config=config)) as pool:
+            results = []
+            for video in video_files:
+                fileName = datetime.now().strftime("%Y%m%d_%H%M%S") + "_CSV_" + os.path.basename(video)
+                results.append(main.video_to_csv_chunked(video, fileName, span, center, dbPerHLine, pool, args.chunks))
+            # Let the workers exit on their own so their last log records are sent
+            pool.close()
+            pool.join()
+    else:
+        num_processes = args.processes or min(multiprocessing.cpu_count(), len(video_files))
+        jobs = [(video, span, center, dbPerHLine, False, args.preview_interval) for video in video_files]
+        with multiprocessing.Pool(processes=num_processes, initializer=worker.initialize,
+                                  initargs=worker.initargs(log_queue, config=config)) as pool:
+            # Longest videos first, so a long capture never starts after the short ones
+            results = scheduler.run(pool, num_processes, worker.video_to_csv, jobs, video_files)
+            pool.close()
+            pool.join()
+    elapsed = perf_counter() - start_time
+
+    # Per-video and aggregate throughput, comparable with the real-time mode
+    total_frames = 0
+    for result in results:
+        total_frames += result["frames"]
+        logger.info("%s: %d frames, %.1f FPS", result['video'], result['frames'], result['fps'])
+    overall_fps = total_frames / elapsed if elapsed > 0 else 0.0
+    logger.info("Processed %d video(s), %d frames in %.2f s (%.1f FPS overall).",
+                len(results), total_frames, elapsed, overall_fps)
+    return results
+
+
+if __name__ == "__main__":
+    run()
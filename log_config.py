@@ -0,0 +1,87 @@
+import logging
+import logging.handlers
+import multiprocessing
+import sys
+import env_vars
+
+# ===================================
+#  Logging shared by every process
+# ===================================
+# Every process (the GUI/CLI process and each pool worker) logs through a QueueHandler, so the frame loop
+# never blocks on the console. A single QueueListener thread in the main process formats the records and
+# writes them to stdout, one line at a time, so the output of several workers never interleaves.
+#
+#     log_queue = log_config.start_listener()
+#     with multiprocessing.Pool(processes, initializer=log_config.configure_worker, initargs=(log_queue,)) as pool:
+#         ...
+#
+# Per-frame detail is logged on the 'frames' logger every FRAME_LOG_INTERVAL frames (0 turns it off).
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(processName)s] %(message)s'
+
+_log_queue = None
+_listener = None
+# Handlers and level of this process's root logger before start_listener, put back by stop_listener
+_root_state = None
+
+
+def log_level():
+    """Level named by the LOG_LEVEL setting, INFO if it is not a valid level name."""
+    level = logging.getLevelName(str(env_vars.Env_Vars.LOG_LEVEL).upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+def configure_worker(log_queue):
+    """Send every log record of this process to log_queue. Used as the multiprocessing.Pool initializer."""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(log_level())
+
+
+def start_listener(context=None):
+    """Start writing queued log records to stdout and route this process's logging through the queue.
+
+    Returns the queue to pass to configure_worker. context is the multiprocessing context of the pools the queue
+    is given to (the default start method if None); a queue can only be shared with processes of its own context.
+    Calling it again reuses the running listener and its queue.
+    """
+    global _log_queue, _listener, _root_state
+    if _listener is None:
+        root = logging.getLogger()
+        _root_state = (list(root.handlers), root.level)
+        _log_queue = (context or multiprocessing).Queue(-1)
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        _listener = logging.handlers.QueueListener(_log_queue, handler)
+        _listener.start()
+    configure_worker(_log_queue)
+    return _log_queue
+
+
+def stop_listener():
+    """Write out any queued records, stop the listener thread and give the root logger its handlers back.
+
+    Records logged afterwards go to the handlers the process had before start_listener, not to a queue that is
+    no longer read.
+    """
+    global _log_queue, _listener, _root_state
+    if _listener is not None:
+        _listener.stop()
+        root = logging.getLogger()
+        handlers, level = _root_state
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+        _listener = None
+        _log_queue = None
+        _root_state = None
+
+
+def frame_log_interval():
+    """Frames between two per-frame detail records, or 0 if per-frame detail is off."""
+    interval = int(env_vars.Env_Vars.FRAME_LOG_INTERVAL)
+    return interval if interval > 0 else 0
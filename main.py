@@ -15,27 +15,64 @@
 # ===================================
 # Import necessary libraries
 # ===================================
+import logging
 import os
 import cv2
-import csv
+import analysis_config
 import utilities
+import frame_analysis
+import frame_sampler
+import pipeline
+import csv_output
+import manifest
+import profiler
+import progress
+import scheduler
+import worker
+import log_config
 import env_vars
 import numpy as np
 from datetime import datetime
-from time import sleep
+from time import sleep, perf_counter
 import multiprocessing
-import SpectrumAnalyzerGUI
 import webbrowser
 
+logger = logging.getLogger(__name__)
+
 # ===================================
 #  Main execution functions
 # ===================================
 
 #Takes in the new parameters from multiprocessing span, center, dbPerHLine
-def video_to_csv(cap, fileName, span, center, dbPerHLine): 
+# show_video=False runs headless: no OpenCV window and no waitKey pacing, so frames are processed as fast as they decode.
+# preview_interval (seconds) optionally shows a headless preview at a fixed wall-clock rate instead.
+# checkpoint (a manifest.VideoCheckpoint) records progress so an interrupted video resumes where it stopped.
+# With PROFILE_STAGES / PROFILE_FRAMES set, stage timings and cProfile stats are written to Completed/profile.
+# When the process reports to the GUI (progress.configure_worker), progress and previews are sent as video_name.
+def video_to_csv(cap, fileName, span, center, dbPerHLine, show_video=True, preview_interval=0, checkpoint=None,
+                 video_name=None):
     """Main execution function for analyzing the video."""
-    
+    resume = checkpoint.resume_state() if checkpoint is not None else None
+    last_frame = resume['last_frame'] if resume is not None else None
+    completed = False
+    frames_processed = 0
+    start_time = perf_counter()
+    frame_pipeline = None
+    result_writers = []
+    output_writers = []
+    trace_writers = []
+    last_preview = None
+    window_opened = False
+    video_profiler = profiler.start_video(fileName)
+
     try:
+        # Results are streamed to the CSV file (and the optional binary output) as frames are processed
+        result_writers = csv_output.open_result_writers(fileName, span, center, dbPerHLine,
+                                                        resume['writers'] if resume is not None else None)
+        output_writers = list(result_writers)
+        if checkpoint is not None:
+            checkpoint.start(fileName)
+
         # Open the video file for processing
         # Check if the video file opened successfully
         if not cap.isOpened():
@@ -49,143 +86,317 @@ def video_to_csv(cap, fileName, span, center, dbPerHLine):
         # Get video properties like width, height, and FPS
         frame_width, frame_height = int(cap.get(3)), int(cap.get(4))
         fps = int(cap.get(cv2.CAP_PROP_FPS))
-        print(f"Playing video with dimensions: {frame_width}x{frame_height} and {fps} FPS.")
-        rect_cnt = 0
-        gridheight = 0
-        gridwidth = 0
-        center_x = 0  # x value of the center line of the grid which correlates with CENTER value from the spectrum analyzer
-        min_amplitude = 1000
-        max_amplitude = 0
-        center_amplitude = 0
-        # initialize y coordinate of the wave to check for when wave data is being cleared
-        initial_y = 0
-
-        # List to store detected signals' information
-        detected_signals = []
+        logger.info("Playing video with dimensions: %dx%d and %d FPS.", frame_width, frame_height, fps)
+
+        # Locate the grid once; every later frame is only analyzed inside the grid region
+        analyzer = frame_analysis.calibrate(cap, first_frame, span, center, dbPerHLine)
+        gridheight = analyzer.calibration.height
+        amplitudes = frame_analysis.AmplitudeTracker()
+
+        # The calibrated trace outputs need the grid position, so they are opened after calibration
+        trace_writers = csv_output.open_trace_writers(fileName, analyzer, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+                                                      fps, span, center, dbPerHLine,
+                                                      resume['writers'] if resume is not None else None)
+        output_writers.extend(trace_writers)
+
+        # SAMPLE_STRIDE / SAMPLE_RATE / ANALYSIS_WINDOW pick the frames to analyze; None analyzes every frame
+        sampler = frame_sampler.from_settings(cap.get(cv2.CAP_PROP_FPS))
+        if resume is not None:
+            # Continue after the last checkpointed frame with the running min/max of the interrupted run
+            amplitudes.min_amplitude = resume['min_amplitude']
+            amplitudes.max_amplitude = resume['max_amplitude']
+            cap.set(cv2.CAP_PROP_POS_FRAMES, last_frame + 1)
+            logger.info("Resuming %s from frame %d.", fileName, last_frame + 1)
+        elif sampler is not None and sampler.start_frame() > cap.get(cv2.CAP_PROP_POS_FRAMES):
+            # The grid was found at the start of the video; jump to the start of the analysis window
+            cap.set(cv2.CAP_PROP_POS_FRAMES, sampler.start_frame())
+        progress.start_video(video_name or fileName, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), sampler)
+        last_checkpoint = perf_counter()
+        # Per-frame detail is off by default, and only every frame_log_interval-th frame is logged when it is on
+        frame_log_interval = log_config.frame_log_interval()
+
         # Main loop to process each frame in the video
-        while cap.isOpened():
-            ret, frame = cap.read()
-            # If there's no more frame to read, exit the loop
-            if not ret:
+        # Frames are decoded and analyzed on background threads and come back here in order
+        # Frames whose screen has not changed reuse the previous measurement
+        # cProfile only sees the thread that enables it, so a profiled frame range analyzes on this thread
+        analysis_threads = env_vars.Env_Vars.ANALYSIS_THREADS
+        if video_profiler is not None and video_profiler.cprofile_frames is not None:
+            analysis_threads = 0
+        frame_pipeline = pipeline.FramePipeline(cap, analyzer.analyze, analysis_threads,
+                                                env_vars.Env_Vars.FRAME_QUEUE_SIZE,
+                                                change_detector=analyzer.make_change_detector(), sampler=sampler)
+        for frame_index, timestamp, frame, mask, result in frame_pipeline:
+            frames_processed += 1
+            # Each frame was processed by identifying the wave using color filtering and contour detection
+            # mask will be displayed to the user to show the detected wave (cropped to the grid region)
+            # result is the WaveMeasurement of the frame, or None if no wave was measured on this frame
+
+            # If a valid result is obtained, print and store it with the timestamp of the frame it came from
+            if result:
+                with profiler.stage('output'):
+                    center_freq, amplitude = result.center_freq, result.amplitude
+                    min_amplitude, max_amplitude, center_amplitude = amplitudes.update(amplitude)
+                    if frame_log_interval and frame_index % frame_log_interval == 0:
+                        utilities.Utilities.log_wave_characteristics(min_amplitude, max_amplitude, center_freq,
+                                                                     frame_index + 1, fps, gridheight)
+                    for writer in result_writers:
+                        writer.write_row(timestamp, center_freq, min_amplitude, max_amplitude, center_amplitude,
+                                         frame_index)
+                    for writer in trace_writers:
+                        writer.write_trace(frame_index, result.spectrum)
+
+            # Periodically record how far the video got, so an interrupted run can resume from here
+            last_frame = frame_index
+            if checkpoint is not None and perf_counter() - last_checkpoint >= env_vars.Env_Vars.CHECKPOINT_SECONDS:
+                with profiler.stage('checkpoint'):
+                    checkpoint.save(last_frame, output_writers, amplitudes)
+                last_checkpoint = perf_counter()
+            profiler.frame_done(frame_index)
+            # The GUI gets a few updates and downscaled previews per second; its stop button ends the video here
+            progress.frame_done(frame_index, result, mask if mask is not None else frame)
+            if progress.stop_requested():
                 break
 
-            if frame is not None:
-                # Process and identify the wave from the frame using color filtering and contour detection
-                # mask will be displayed to the user to show the detected wave
-                # wave_x and wave_y will be used to extract wave characteristics
-                # mask will be None if no wave is detected
-                # leftmost_x is used to check position in the video where the wave data begins
-                # leftmost_y is to check the y position of the wave data to determine when wave data is being cleared and should be ignored
-                mask, (wave_y, wave_x), leftmost_x, leftmost_y, center_x, mask_width = utilities.Utilities.find_wave(frame)
-
-                while rect_cnt <= 10:
-                    contours, (grid_y, grid_x) = utilities.Utilities.findGrid(frame)
-                    for contour in contours:
-                        perimeter = cv2.arcLength(contour, True)
-                        approx = cv2.approxPolyDP(contour, 0.02 * perimeter, True)
-                        if len(approx) == 4:
-                            x, y, w, h = cv2.boundingRect(approx)
-                            if 50 < h < 100:
-                                if rect_cnt <= 10:
-                                    gridwidth += w
-                                    gridheight += h
-                                    rect_cnt += 1
-                    initial_y = leftmost_y  # initialize the y value of the wave based on the start of the video
-                    initial_x = leftmost_x  # initialize the x value of the wave based on the start of the video
-                print(f"initial x: {initial_x}")
-                # center_x = initial_x + (gridwidth/2) #establish center x position of the center of the spectrum analyzer
-                gridheight = grid_y[len(grid_y) - 1] - grid_y[0] - 252  # 252px is the distance between the actual grid and the top and bottom of the
-                print(f"gridwidth: {gridwidth}")
-                gridwidth = mask_width  # Since the width of the wave mask is the same as the width of the grid, we can use this as the basis for the grid width to determine the pixel to HZ ratio
-
-                # Get detailed information from the processed wave
-
-                result = utilities.Utilities.process_wave(frame, mask, span, center, dbPerHLine, gridheight, wave_x,
-                                                           wave_y, initial_x, leftmost_y, initial_y, gridwidth, center_x)
-
-                if result:
-                    center_freq, amplitude = result
-                    if amplitude > max_amplitude:
-                        max_amplitude = amplitude
-                    if amplitude < min_amplitude:
-                        min_amplitude = amplitude
-
-                # If a valid result is obtained, print and store it
-                if result:
-                    center_amplitude = (min_amplitude + max_amplitude) / 2
-                    data = center_freq, min_amplitude, max_amplitude, center_amplitude
-                    utilities.Utilities.print_wave_characteristics(min_amplitude, max_amplitude, center_freq,
-                                                                   cap.get(cv2.CAP_PROP_POS_FRAMES), fps, gridheight)
-                    detected_signals.append(data)
-
-                if mask is not None:
-                    # Show the cropped frame with the wave to the user
-                    cv2.imshow('Video', mask)
-
-                else:
-                    # If screen is not detected, simply show the entire frame
-                    cv2.imshow('Video', frame)
-
-            # Allow for user intervention to quit video playback
-            if cv2.waitKey(1000 // fps) & 0xFF == ord(env_vars.Env_Vars.QUIT_KEY):
-                break
+            if show_video:
+                show_preview = True
+            elif preview_interval > 0:
+                # Headless preview is sampled on wall-clock time so it never paces the analysis
+                now = perf_counter()
+                show_preview = last_preview is None or now - last_preview >= preview_interval
+                if show_preview:
+                    last_preview = now
+            else:
+                show_preview = False
+
+            if show_preview:
+                window_opened = True
+                with profiler.stage('display'):
+                    if mask is not None:
+                        # Show the cropped frame with the wave to the user
+                        cv2.imshow('Video', mask)
+
+                    else:
+                        # If screen is not detected, simply show the entire frame
+                        cv2.imshow('Video', frame)
+
+                    # Allow for user intervention to quit video playback
+                    # Real-time mode waits one frame period, headless preview only pumps the window events
+                    delay = 1000 // fps if show_video else 1
+                    key = cv2.waitKey(delay)
+                if key & 0xFF == ord(env_vars.Env_Vars.QUIT_KEY):
+                    break
+        else:
+            completed = True
 
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error("Error: %s", e)
         sleep(5)
 
     finally:
-        # Store detected signals' information to a CSV file after removing mp4 extension from the video file name
-        csv_file = fileName.replace('.mp4', '.csv')
-
-        # Check if the Completed folder exists, if not, create it
-        completed_directory = 'Completed'
-        if not os.path.exists(completed_directory):
-            os.makedirs(completed_directory)
-        csvLocation = os.path.join(completed_directory, csv_file)
-
-        csvLocation = os.path.join('Completed', csv_file)
-        try:
-            with open(csvLocation, mode='w', newline='') as file:
-                writer = csv.writer(file)
-                # Define the CSV columns
-                writer.writerow(['Timestamp (s)', 'Center Frequency', 'Minimum Amplitude', 'Maximum Amplitude',
-                                 'Center Amplitude'])
-                for signal in detected_signals:
-                    frame_number = cap.get(cv2.CAP_PROP_POS_FRAMES) - len(detected_signals) + detected_signals.index(
-                        signal)
-                    timestamp = frame_number / fps
-
-                    # center_freq, min_amplitude, max_amplitude, center_amplitude = signal
-                    max_amplitude = signal
-
-                    # writer.writerow([timestamp, center_freq, min_amplitude, max_amplitude, center_amplitude])
-                    writer.writerow([timestamp, max_amplitude[0], max_amplitude[1], max_amplitude[2], max_amplitude[3]])
-
-            print("CSV file created successfully.")
-        except Exception as e:
-            print(f"Error writing to CSV file: {e}")
+        if frame_pipeline is not None:
+            frame_pipeline.close()
+            logger.info(frame_pipeline.report())
+
+        if checkpoint is not None and last_frame is not None and output_writers:
+            try:
+                checkpoint.save(last_frame, output_writers, amplitudes)
+            except Exception as e:
+                logger.error("Error saving the checkpoint: %s", e)
+
+        for writer in output_writers:
+            try:
+                writer.close()
+            except Exception as e:
+                logger.error("Error writing output file: %s", e)
+
+        if checkpoint is not None and checkpoint.entry is not None:
+            # A stopped video (quit key or error) resumes from its last checkpoint on the next run
+            checkpoint.finish('done' if completed else 'stopped')
+        progress.finish_video('done' if completed else 'stopped')
 
         # Properly release the video and close any GUI windows
         cap.release()
-        cv2.destroyAllWindows()
-        print("Video playback is done.")
+        if window_opened:
+            cv2.destroyAllWindows()
+        logger.info("Video playback is done.")
+
+        # Report the throughput so headless and real-time runs can be compared
+        elapsed = perf_counter() - start_time
+        processing_fps = frames_processed / elapsed if elapsed > 0 else 0.0
+        logger.info("Processed %d frames in %.2f s (%.1f FPS).", frames_processed, elapsed, processing_fps)
+        profiler.finish_video(frames_processed)
+
+    return {"video": fileName, "frames": frames_processed, "seconds": elapsed, "fps": processing_fps}
+
+# Splits frames [start, end) into chunks frame ranges of near equal size; end is the frame count (an int) the
+# split is based on, and the last range is returned with end None so it reads to the end of the video
+def split_frame_range(start, end, chunks):
+    chunks = max(1, min(chunks, end - start))
+    bounds = [start + (end - start) * i // chunks for i in range(chunks + 1)]
+    ranges = list(zip(bounds[:-1], bounds[1:]))
+    # The frame count reported by the container can be off, so the last chunk always reads to the end
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+# Worker for one chunk of a video: opens its own capture, seeks to start_frame and analyzes up to end_frame
+# Returns the number of frames read and a (frame index, timestamp in seconds, center frequency, amplitude, spectrum)
+# tuple for every measured frame, in order; spectrum is None unless TRACE_OUTPUT or WATERFALL_OUTPUT is enabled
+def analyze_frame_range(video_file, start_frame, end_frame, analyzer):
+    cap = cv2.VideoCapture(video_file)
+    frames_read = 0
+    measurements = []
+    # Stage timings are recorded per chunk; cProfile frame ranges only apply to unchunked runs
+    profiler.start_video(f"{os.path.splitext(os.path.basename(video_file))[0]}_chunk_{start_frame}.mp4",
+                         use_cprofile=False)
+    try:
+        if not cap.isOpened():
+            raise Exception(f"Could not open the video file: {video_file}")
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        # Sampling decisions depend only on frame numbers and timestamps, so chunks sample like a single pass
+        frame_pipeline = pipeline.FramePipeline(cap, analyzer.analyze, env_vars.Env_Vars.ANALYSIS_THREADS,
+                                                env_vars.Env_Vars.FRAME_QUEUE_SIZE, end_frame,
+                                                analyzer.make_change_detector(),
+                                                frame_sampler.from_settings(cap.get(cv2.CAP_PROP_FPS)))
+        for frame_index, timestamp, _, _, result in frame_pipeline:
+            frames_read += 1
+            if result:
+                measurements.append((frame_index, timestamp, result.center_freq, result.amplitude, result.spectrum))
+        if frame_pipeline.change_detector is not None:
+            # How many frames of the chunk reused a measurement instead of being analyzed
+            logger.info(frame_pipeline.report())
+    finally:
+        cap.release()
+        profiler.finish_video(frames_read)
+    return frames_read, measurements
+
+# Analyzes one video split into frame-range chunks over the given pool, writing each chunk to the CSV as it arrives
+# An interrupted run resumes after the last chunk written, into the output file of that run (the fileName returned)
+def video_to_csv_chunked(video_file, fileName, span, center, dbPerHLine, pool, chunks):
+    start_time = perf_counter()
+    frames_processed = 0
+    completed = False
+    checkpoint = None
+    try:
+        # Finished videos are skipped
+        checkpoint = manifest.VideoCheckpoint(video_file, span, center, dbPerHLine)
+        if checkpoint.is_done():
+            logger.info("Skipping %s, it was already analyzed with the current settings.", video_file)
+            return {"video": fileName, "frames": 0, "seconds": 0.0, "fps": 0.0, "skipped": True}
+        resume = checkpoint.resume_state()
+        if resume is not None:
+            fileName = checkpoint.output_name()
+
+        cap = cv2.VideoCapture(video_file)
+        try:
+            if not cap.isOpened():
+                raise Exception("Error: Could not open the video file.")
+            ret0, first_frame = cap.read()
+            if not ret0:
+                raise Exception("Unable to read the first frame.")
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps = int(cap.get(cv2.CAP_PROP_FPS))
+
+            # Calibrate once in the parent; every chunk shares the same grid and starting wave position
+            analyzer = frame_analysis.calibrate(cap, first_frame, span, center, dbPerHLine)
+            first_analyzed = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+            sampler = frame_sampler.from_settings(cap.get(cv2.CAP_PROP_FPS))
+        finally:
+            cap.release()
+
+        # Only the frames of the analysis window are split between the chunks
+        if sampler is not None:
+            first_analyzed = max(first_analyzed, sampler.start_frame())
+            if sampler.end_frame() is not None:
+                frame_count = min(frame_count, sampler.end_frame())
+        amplitudes = frame_analysis.AmplitudeTracker()
+        if resume is not None:
+            # Continue after the last chunk written with the running min/max of the interrupted run
+            amplitudes.min_amplitude = resume['min_amplitude']
+            amplitudes.max_amplitude = resume['max_amplitude']
+            first_analyzed = max(first_analyzed, resume['last_frame'] + 1)
+            logger.info("Resuming %s from frame %d.", fileName, first_analyzed)
+        frame_ranges = split_frame_range(first_analyzed, max(frame_count, first_analyzed + 1), chunks)
+        logger.info("Splitting %s into %d chunks from frame %d.", fileName, len(frame_ranges), first_analyzed)
+
+        writer_states = resume['writers'] if resume is not None else None
+        result_writers = csv_output.open_result_writers(fileName, span, center, dbPerHLine, writer_states)
+        trace_writers = csv_output.open_trace_writers(fileName, analyzer, frame_count, fps, span, center, dbPerHLine,
+                                                      writer_states)
+        output_writers = result_writers + trace_writers
+        checkpoint.start(fileName)
+        try:
+            # imap returns the chunks in order as they finish, so each one is written and released before the next
+            # and the running min/max carries across chunk boundaries
+            chunk_results = pool.imap(worker.analyze_chunk,
+                                      [(video_file, start, end, analyzer) for start, end in frame_ranges])
+            for (_, end), (chunk_frames, measurements) in zip(frame_ranges, chunk_results):
+                frames_processed += chunk_frames
+                for frame_index, timestamp, center_freq, amplitude, spectrum in measurements:
+                    min_amplitude, max_amplitude, center_amplitude = amplitudes.update(amplitude)
+                    for writer in result_writers:
+                        writer.write_row(timestamp, center_freq, min_amplitude, max_amplitude, center_amplitude,
+                                         frame_index)
+                    for writer in trace_writers:
+                        writer.write_trace(frame_index, spectrum)
+                del measurements
+                if end is not None:
+                    checkpoint.save(end - 1, output_writers, amplitudes)
+            completed = True
+        finally:
+            for writer in output_writers:
+                writer.close()
+
+    except Exception as e:
+        logger.error("Error: %s", e)
+
+    finally:
+        if checkpoint is not None and checkpoint.entry is not None:
+            # A stopped video resumes after its last written chunk on the next run
+            checkpoint.finish('done' if completed else 'stopped')
+
+    elapsed = perf_counter() - start_time
+    processing_fps = frames_processed / elapsed if elapsed > 0 else 0.0
+    logger.info("Processed %d frames in %.2f s (%.1f FPS).", frames_processed, elapsed, processing_fps)
+    return {"video": fileName, "frames": frames_processed, "seconds": elapsed, "fps": processing_fps}
 
 # Takes the video and converts to CSV file with the new parameters from multiprocessing
-def video_to_csv_worker(video_file, span, center, dbPerHLine):
+def video_to_csv_worker(video_file, span, center, dbPerHLine, show_video=True, preview_interval=0):
+    # Videos still waiting for a worker when the GUI asks to stop are left for the next run
+    if progress.stop_requested():
+        progress.video_not_started(os.path.basename(video_file), 'stopped')
+        return {"video": os.path.basename(video_file), "frames": 0, "seconds": 0.0, "fps": 0.0, "skipped": True}
+    # The manifest in the Completed folder tells whether this video is finished or can be resumed
+    try:
+        checkpoint = manifest.VideoCheckpoint(video_file, span, center, dbPerHLine)
+    except OSError as e:
+        logger.error("Error reading the manifest for %s: %s", video_file, e)
+        checkpoint = None
+    if checkpoint is not None and checkpoint.is_done():
+        logger.info("Skipping %s, it was already analyzed with the current settings.", video_file)
+        progress.video_not_started(os.path.basename(video_file))
+        return {"video": os.path.basename(video_file), "frames": 0, "seconds": 0.0, "fps": 0.0, "skipped": True}
+
+    # An interrupted video keeps writing to the output file of the run that started it
+    fileName = checkpoint.output_name() if checkpoint is not None else None
+    if fileName is None:
+        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+        fileName = current_time + "_CSV_" + os.path.basename(video_file)
     cap = cv2.VideoCapture(video_file)
-    fileName = os.path.basename(video_file)
-    current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-    fileName = current_time + "_CSV_" + fileName
-    video_to_csv(cap, fileName, span, center, dbPerHLine)
+    return video_to_csv(cap, fileName, span, center, dbPerHLine, show_video, preview_interval, checkpoint,
+                        os.path.basename(video_file))
 
 # This function is what each worker executes to process the video and uses the video_to_CSV to make the CSV files
-def process_video_file_worker(video_file, span, center, dbPerHLine):
+def process_video_file_worker(video_file, span, center, dbPerHLine, show_video=True, preview_interval=0):
     full_video_path = os.path.join(env_vars.Env_Vars.VIDEO_FOLDER, video_file)
-    print("Processing video: " + full_video_path)
-    video_to_csv_worker(full_video_path, span, center, dbPerHLine)
-
-def main():
+    logger.info("Processing video: %s", full_video_path)
+    return video_to_csv_worker(full_video_path, span, center, dbPerHLine, show_video, preview_interval)
+
+# monitor is the progress.ProgressMonitor of the GUI: the workers then report to it instead of opening video windows
+def main(monitor=None):
+    # Run from the GUI the settings are loaded already, maybe with unsaved edits
+    env_vars.ensure_loaded()
+    # Workers log through a queue to this process, so their output never interleaves
+    log_queue = log_config.start_listener()
     try:
         # Specify the folder containing the videos
         video_folder_path = env_vars.Env_Vars.VIDEO_FOLDER
@@ -208,22 +419,39 @@ def main():
         span = env_vars.Env_Vars.SPAN
         center = env_vars.Env_Vars.center
         dbPerHLine = env_vars.Env_Vars.dbPerHLine
+        # Settings are checked once, and every worker analyzes with this snapshot of them
+        config = analysis_config.install(analysis_config.from_settings())
 
         # Use multiprocessing.Pool to process videos in parallel, can iterate through the list of videos and apply the video_file_worker function to each element
-        with multiprocessing.Pool(processes=num_processes) as pool:  # Creates a pool of worker processes and the parameter process is based on the number of worker processes
-            pool.starmap(process_video_file_worker,
-                         [(video, span, center, dbPerHLine) for video in video_files])  # starmap is used to apply video_file_worker to each element and each element is a tuple containing the video file name and the new parameters
+        # Workers start from the lightweight worker module with the settings of this process
+        show_video = monitor is None
+        with multiprocessing.Pool(processes=num_processes, initializer=worker.initialize,
+                                  initargs=worker.initargs(log_queue, monitor, num_processes, config)) as pool:  # Creates a pool of worker processes and the parameter process is based on the number of worker processes
+            # The longest videos start first and each result comes back as soon as its video is done
+            scheduler.run(pool, num_processes, worker.process_video_file,
+                          [(video, span, center, dbPerHLine, show_video) for video in video_files],
+                          [os.path.join(video_folder_path, video) for video in video_files])
+            # Let the workers exit on their own so their last log records are sent
+            pool.close()
+            pool.join()
 
         # After all video processing is done, open the Completed folder
         completed_folder_path = os.path.abspath("Completed")
         webbrowser.open(completed_folder_path)
 
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error("Error: %s", e)
+
+    finally:
+        log_config.stop_listener()
 
 # ===================================
 # 5. Script entry point
 # ===================================
 if __name__ == "__main__":
-    app = SpectrumAnalyzerGUI.SpectrumAnalyzerGUI() #Creates the GUI
+    multiprocessing.freeze_support()
+    # Imported here so headless entry points can use this module without tkinter/PIL
+    import analyzer_gui
+
+    app = analyzer_gui.SpectrumAnalyzerGUI() #Creates the GUI
     app.mainloop()  # The main analysis starts when the user clicks "Start" in the GUI
\ No newline at end of file
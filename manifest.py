@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+import analysis_config
+import csv_output
+
+# One JSON entry per video, so pool workers never write the same file
+MANIFEST_DIRECTORY = os.path.join('Completed', 'manifest')
+
+
+def video_fingerprint(video_path, sample_size=1 << 20):
+    """Size, modification time and a hash of the start, middle and end of the file."""
+    stat = os.stat(video_path)
+    sample_hash = hashlib.sha1(str(stat.st_size).encode())
+    with open(video_path, 'rb') as file:
+        for offset in (0, stat.st_size // 2, max(stat.st_size - sample_size, 0)):
+            file.seek(offset)
+            sample_hash.update(file.read(sample_size))
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'sample_hash': sample_hash.hexdigest()}
+
+
+def settings_hash(span, center, dbPerHLine, config=None):
+    """Hash of every setting that affects the analysis results (see analysis_config.NON_ANALYSIS_SETTINGS).
+
+    config is the AnalysisConfig of the run, by default analysis_config.current().
+    """
+    config = config if config is not None else analysis_config.current()
+    return config.with_scale(span, center, dbPerHLine).settings_hash
+
+
+class VideoCheckpoint:
+    """Manifest entry of one video: whether it is finished, and where to resume it if it was interrupted.
+
+    A stored entry only counts if the video file and the analysis settings are unchanged since it was written.
+    """
+
+    def __init__(self, video_path, span, center, dbPerHLine, config=None):
+        self.video_path = os.path.abspath(video_path)
+        key = hashlib.sha1(self.video_path.encode()).hexdigest()[:12]
+        self.path = os.path.join(MANIFEST_DIRECTORY, f"{os.path.basename(video_path)}.{key}.json")
+        self.fingerprint = video_fingerprint(video_path)
+        self.settings_hash = settings_hash(span, center, dbPerHLine, config)
+        self.entry = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get('fingerprint') != self.fingerprint or entry.get('settings_hash') != self.settings_hash:
+            return None
+        return entry
+
+    def _save(self):
+        os.makedirs(MANIFEST_DIRECTORY, exist_ok=True)
+        self.entry['updated'] = datetime.now().isoformat(timespec='seconds')
+        # Write then rename, so a crash never leaves a half-written entry
+        with open(self.path + '.tmp', 'w') as file:
+            json.dump(self.entry, file)
+        os.replace(self.path + '.tmp', self.path)
+
+    def is_done(self):
+        return self.entry is not None and self.entry.get('status') == 'done'
+
+    def resume_state(self):
+        """The last checkpoint of an interrupted run, or None to start from the beginning."""
+        if self.entry is None or self.entry.get('status') == 'done':
+            return None
+        # Without the output written so far there is nothing to resume
+        if not csv_output.output_exists(self.entry['fileName']):
+            return None
+        return self.entry.get('checkpoint')
+
+    def output_name(self):
+        """Output file name used by the run being resumed, or None."""
+        return self.entry.get('fileName') if self.resume_state() else None
+
+    def start(self, fileName, restart=False):
+        """Record that processing of the video into fileName has started (or resumed, unless restart is set)."""
+        if restart or self.resume_state() is None:
+            self.entry = {
+                'video': self.video_path,
+                'fingerprint': self.fingerprint,
+                'settings_hash': self.settings_hash,
+                'fileName': fileName,
+                'checkpoint': None,
+            }
+        self.entry['status'] = 'in_progress'
+        self._save()
+
+    def save(self, last_frame, writers, amplitudes):
+        """Flush the writers and record everything needed to continue after last_frame."""
+        self.entry['checkpoint'] = {
+            'last_frame': last_frame,
+            'writers': {writer.name: writer.checkpoint() for writer in writers},
+            'min_amplitude': amplitudes.min_amplitude,
+            'max_amplitude': amplitudes.max_amplitude,
+        }
+        self._save()
+
+    def finish(self, status):
+        """Mark the run as 'done', or as 'stopped' so the next run resumes from the last checkpoint."""
+        self.entry['status'] = status
+        self._save()
@@ -1,79 +1,250 @@
+import argparse
+import dataclasses
+from collections import namedtuple
+from time import perf_counter
 import cv2
 import numpy as np
+import analysis_config
+import color_classifier
 import env_vars
-import os
-
-
-#does nothing but is required by trackbar
-def required_func(x):
-    pass
-
-# Start with a sample image or video frame
-try:
-    # Specify the folder containing the videos
-    video_folder_path = env_vars.Env_Vars.VIDEO_FOLDER
-
-    # Check if the folder exists
-    if not os.path.exists(video_folder_path):
-        raise Exception(f"The specified folder does not exist: {video_folder_path}")
-
-    # List all files in the video folder
-    video_files = [f for f in os.listdir(video_folder_path) if f.endswith('.mp4')]
-
-    # Check if there are any mp4 files in the folder
-    if not video_files:
-        raise Exception(f"No videos found in {video_folder_path}.")
-    
-
-except Exception as e:
-    print(f"Error: {e}")
-
-
-video_path = os.path.join(video_folder_path, video_files[0])
-video_capture = cv2.VideoCapture(video_path)
-print(video_capture.isOpened())
-ret, image = video_capture.read()
-
-# Convert to HSV
-hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-
-# Create trackbars for lower and upper mask limits
-cv2.namedWindow('Set Upper and Lower Bounds', cv2.WINDOW_NORMAL | cv2.WINDOW_KEEPRATIO | cv2.WINDOW_GUI_EXPANDED)
-cv2.createTrackbar('Lower H', 'Set Upper and Lower Bounds', 0, 180, required_func)
-cv2.createTrackbar('Lower S', 'Set Upper and Lower Bounds', 0, 255, required_func)
-cv2.createTrackbar('Lower V', 'Set Upper and Lower Bounds', 0, 255, required_func)
-cv2.createTrackbar('Upper H', 'Set Upper and Lower Bounds', 180, 180, required_func)
-cv2.createTrackbar('Upper S', 'Set Upper and Lower Bounds', 255, 255, required_func)
-cv2.createTrackbar('Upper V', 'Set Upper and Lower Bounds', 255, 255, required_func)
-cv2.setWindowProperty('Set Upper and Lower Bounds', cv2.WND_PROP_TOPMOST, 1)
-
-while True:
-    # Get positions of the trackbars
-    l_h = cv2.getTrackbarPos('Lower H', 'Set Upper and Lower Bounds')
-    l_s = cv2.getTrackbarPos('Lower S', 'Set Upper and Lower Bounds')
-    l_v = cv2.getTrackbarPos('Lower V', 'Set Upper and Lower Bounds')
-    u_h = cv2.getTrackbarPos('Upper H', 'Set Upper and Lower Bounds')
-    u_s = cv2.getTrackbarPos('Upper S', 'Set Upper and Lower Bounds')
-    u_v = cv2.getTrackbarPos('Upper V', 'Set Upper and Lower Bounds')
-
-    # Set the lower and upper from trackbars
-    lower_HSV_bound = np.array([l_h, l_s, l_v])
-    upper_HSV_bound = np.array([u_h, u_s, u_v])
-
-    # Update mask
-    mask = cv2.inRange(hsv, lower_HSV_bound, upper_HSV_bound)
-
-    cv2.namedWindow('Mask', cv2.WINDOW_KEEPRATIO)
-    cv2.imshow('Mask', mask)
-    cv2.resizeWindow('Mask', 1200, 720)
-
-    key = cv2.waitKey(1)
-    if key == 13 or key == 10:  # Esc key to stop
-        #set lower_HSV_bound, upper_HSV_bound
-        break
-
-# Print the final chosen HSV range
-print(f"Chosen Lower HSV: [{l_h}, {l_s}, {l_v}]")
-print(f"Chosen Upper HSV: [{u_h}, {u_s}, {u_v}]")
-
-cv2.destroyAllWindows()
\ No newline at end of file
+import grid_detector
+import thumbnail_cache
+import utilities
+import wave_trace
+
+# ===================================
+#  HSV color bound tuner
+# ===================================
+# Trackbars set the lower and upper HSV bounds of the wave (or grid) color while scrubbing through frames
+# sampled from the videos. As soon as a trackbar moves, the mask of the bounds is redrawn from a downscaled HSV
+# copy of the frame, converted once per frame. Once the trackbars settle, the full resolution frame goes through
+# the real find_wave (or grid detection) with those bounds, and its mask, contour and fitted vertex are drawn
+# next to it. Nothing is recomputed while nothing changes.
+#
+# Usage:
+#     python mask_var_picker.py                  # frames of every .mp4 in Env_Vars.VIDEO_FOLDER
+#     python mask_var_picker.py a.mp4 --grid     # tune the grid color on frames of a.mp4
+#     python mask_var_picker.py --samples 30     # 30 frames of each video to scrub through
+#
+# Keys: Enter saves the bounds to env_settings.json and quits, s saves them, Esc or q quits.
+
+WINDOW = 'Set Upper and Lower Bounds'
+# Trackbar name and maximum of each HSV channel of the bounds
+LOWER_TRACKBARS = (('Lower H', 180), ('Lower S', 255), ('Lower V', 255))
+UPPER_TRACKBARS = (('Upper H', 180), ('Upper S', 255), ('Upper V', 255))
+# Seconds without a trackbar change before the full resolution frame is analyzed
+SETTLE_SECONDS = 0.3
+
+# A frame to tune on: frame_index of the video at path video
+Sample = namedtuple("Sample", ["video", "frame_index"])
+
+
+def sample_frames(video_paths, per_video):
+    """Samples of per_video frames spread evenly over each video, in order."""
+    samples = []
+    for path in video_paths:
+        cap = cv2.VideoCapture(path)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+        cap.release()
+        count = min(per_video, frame_count)
+        samples.extend(Sample(path, frame_count * i // count) for i in range(count))
+    return samples
+
+
+def to_preview(image, scale):
+    """image resized by scale (below 1) for display."""
+    size = (max(int(image.shape[1] * scale), 1), max(int(image.shape[0] * scale), 1))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def tint(image, mask, color, alpha=0.5):
+    """Blend color into image where the mask (of the same size) is set, in place."""
+    colored = image.copy()
+    colored[mask > 0] = color
+    cv2.addWeighted(colored, alpha, image, 1 - alpha, 0, dst=image)
+
+
+class ThresholdTuner:
+    """The frames, bounds and images of the tuner; the trackbar callbacks only record what changed."""
+
+    def __init__(self, samples, label=color_classifier.WAVE, preview_width=640, config=None):
+        self.samples = samples
+        self.label = label
+        self.preview_width = preview_width
+        # Trial bounds are always applied with the HSV filter: the lookup table would be rebuilt on every change
+        config = config if config is not None else analysis_config.from_settings()
+        self.config = dataclasses.replace(config, color_classifier='hsv')
+        lower, upper = color_classifier.bounds(label, self.config)
+        self.lower = [int(value) for value in lower]
+        self.upper = [int(value) for value in upper]
+        self.index = 0
+        self.frame = None
+        self._loaded = None
+        self._captures = {}
+        # Downscaled BGR and HSV of every sample shown so far, by sample index
+        self._previews = {}
+        self._overlay = None
+        # perf_counter() of the last change the full resolution result does not include yet, or None
+        self._changed = perf_counter()
+        self._dirty = True
+
+    def set_bound(self, bound, channel, value):
+        """Trackbar callback: set channel of the 'lower' or 'upper' bound."""
+        (self.lower if bound == 'lower' else self.upper)[channel] = value
+        self._dirty = True
+        self._changed = perf_counter()
+
+    def set_sample(self, index):
+        """Trackbar callback: show the sample at index."""
+        self.index = min(max(index, 0), len(self.samples) - 1)
+        self._dirty = True
+        self._changed = perf_counter()
+
+    def trial_config(self):
+        """The AnalysisConfig of the run with the trackbar bounds in place of the saved ones."""
+        lower, upper = np.array(self.lower, np.uint8), np.array(self.upper, np.uint8)
+        if self.label == color_classifier.WAVE:
+            return dataclasses.replace(self.config, lower_wave=lower, upper_wave=upper)
+        return dataclasses.replace(self.config, lower_grid=lower, upper_grid=upper)
+
+    def _load(self):
+        if self._loaded == self.index:
+            return
+        sample = self.samples[self.index]
+        cap = self._captures.get(sample.video)
+        if cap is None:
+            cap = self._captures[sample.video] = cv2.VideoCapture(sample.video)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, sample.frame_index)
+        ret, frame = cap.read()
+        if not ret:
+            frame = np.zeros((self.preview_width * 9 // 16, self.preview_width, 3), np.uint8)
+        self.frame = frame
+        self._loaded = self.index
+        if self.index not in self._previews:
+            small = to_preview(frame, min(self.preview_width / frame.shape[1], 1.0))
+            self._previews[self.index] = (small, cv2.cvtColor(small, cv2.COLOR_BGR2HSV))
+        self._overlay = None
+
+    def bounds_mask(self):
+        """Mask of the trackbar bounds on the downscaled frame."""
+        return cv2.inRange(self._previews[self.index][1], np.array(self.lower, np.uint8),
+                           np.array(self.upper, np.uint8))
+
+    def pipeline_overlay(self):
+        """Downscaled frame with the result of the analysis of the full resolution frame with the trackbar bounds."""
+        config = self.trial_config()
+        image = self._previews[self.index][0].copy()
+        scale = image.shape[1] / self.frame.shape[1]
+        size = (image.shape[1], image.shape[0])
+        if self.label == color_classifier.WAVE:
+            mask, _, leftmost_x, _, _, _ = utilities.Utilities.find_wave(self.frame, False, None, config)
+            tint(image, cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST), (0, 255, 255))
+            if leftmost_x is not None:
+                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                cv2.drawContours(image, [(contour * scale).astype(np.int32) for contour in contours], -1,
+                                 (255, 0, 255), 1)
+                fit = wave_trace.fit(wave_trace.extract(mask))
+                if fit is not None and np.isfinite(fit.vertex_x) and np.isfinite(fit.vertex_y):
+                    vertex = (int(round(fit.vertex_x * scale)), int(round(fit.vertex_y * scale)))
+                    cv2.drawMarker(image, vertex, (0, 0, 255), cv2.MARKER_CROSS, 15, 2)
+        else:
+            mask = utilities.Utilities.grid_mask(self.frame, config)
+            tint(image, cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST), (0, 255, 255))
+            calibration = grid_detector.detect_grid(self.frame, config.grid_divisions, mask=mask)
+            if calibration is not None:
+                corners = [(int(round(x * scale)), int(round(y * scale))) for x, y in
+                           ((calibration.left, calibration.top), (calibration.right, calibration.bottom))]
+                cv2.rectangle(image, corners[0], corners[1], (255, 0, 255), 1)
+                center_x = int(round(calibration.center_x * scale))
+                cv2.line(image, (center_x, corners[0][1]), (center_x, corners[1][1]), (0, 0, 255), 1)
+        return image
+
+    def compose(self):
+        """The bounds mask next to the pipeline result (or the plain frame while the trackbars settle)."""
+        mask = cv2.cvtColor(self.bounds_mask(), cv2.COLOR_GRAY2BGR)
+        result = self._overlay if self._overlay is not None else self._previews[self.index][0].copy()
+        image = np.hstack([mask, result])
+        sample = self.samples[self.index]
+        text = f"{sample.video} frame {sample.frame_index}  lower {self.lower}  upper {self.upper}"
+        cv2.putText(image, text, (8, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1, cv2.LINE_AA)
+        return image
+
+    def refresh(self):
+        """The image to show if anything changed since the last call, else None."""
+        settled = self._changed is not None and perf_counter() - self._changed >= SETTLE_SECONDS
+        if not self._dirty and not settled:
+            return None
+        self._load()
+        if settled:
+            self._overlay = self.pipeline_overlay()
+            self._changed = None
+        self._dirty = False
+        return self.compose()
+
+    def save(self):
+        """Write the trackbar bounds to Env_Vars and env_settings.json."""
+        names = ('LOWER_WAVE_COLOR', 'UPPER_WAVE_COLOR') if self.label == color_classifier.WAVE \
+            else ('LOWER_GRID_COLOR', 'UPPER_GRID_COLOR')
+        for name, bound in zip(names, (self.lower, self.upper)):
+            setattr(env_vars.Env_Vars, name, np.array(bound))
+        env_vars.save_settings()
+        print(f"Saved {names[0]} {self.lower} and {names[1]} {self.upper} to env_settings.json")
+
+    def open_window(self):
+        """Create the window and its trackbars once; their callbacks update the tuner."""
+        cv2.namedWindow(WINDOW, cv2.WINDOW_NORMAL | cv2.WINDOW_KEEPRATIO | cv2.WINDOW_GUI_EXPANDED)
+        for bound, trackbars, values in (('lower', LOWER_TRACKBARS, self.lower), ('upper', UPPER_TRACKBARS, self.upper)):
+            for channel, (name, maximum) in enumerate(trackbars):
+                cv2.createTrackbar(name, WINDOW, min(values[channel], maximum), maximum,
+                                   lambda value, bound=bound, channel=channel: self.set_bound(bound, channel, value))
+        if len(self.samples) > 1:
+            cv2.createTrackbar('Frame', WINDOW, 0, len(self.samples) - 1, self.set_sample)
+        cv2.resizeWindow(WINDOW, 2 * self.preview_width, self.preview_width * 3 // 4)
+        cv2.setWindowProperty(WINDOW, cv2.WND_PROP_TOPMOST, 1)
+
+    def close(self):
+        for cap in self._captures.values():
+            cap.release()
+        self._captures = {}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the HSV color bounds of the wave or the grid on video frames.")
+    parser.add_argument("videos", nargs="*", help="Video files (default: every .mp4 in VIDEO_FOLDER)")
+    parser.add_argument("--grid", action="store_true", help="Tune the grid color instead of the wave color")
+    parser.add_argument("--samples", type=int, default=20, help="Frames sampled from each video to scrub through")
+    parser.add_argument("--width", type=int, default=640, help="Width in pixels of the downscaled preview")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    env_vars.load_settings()
+    videos = args.videos or [path for path, _ in thumbnail_cache.list_videos(env_vars.Env_Vars.VIDEO_FOLDER)]
+    samples = sample_frames(videos, max(args.samples, 1))
+    if not samples:
+        print("No video frames found to tune on.")
+        return
+    tuner = ThresholdTuner(samples, color_classifier.GRID if args.grid else color_classifier.WAVE, args.width)
+    tuner.open_window()
+    try:
+        while True:
+            image = tuner.refresh()
+            if image is not None:
+                cv2.imshow(WINDOW, image)
+            # Runs the trackbar callbacks; the timeout lets the pipeline run once the trackbars settle
+            key = cv2.waitKey(50) & 0xFF
+            if key in (13, 10):  # Enter
+                tuner.save()
+                break
+            if key == ord('s'):
+                tuner.save()
+            elif key in (27, ord('q')) or cv2.getWindowProperty(WINDOW, cv2.WND_PROP_VISIBLE) < 1:
+                break
+    finally:
+        tuner.close()
+        cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    run()
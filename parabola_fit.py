@@ -0,0 +1,163 @@
+import numpy as np
+from collections import namedtuple
+
+# Result of a quadratic fit y = a*x^2 + b*x + c, with the vertex of the parabola
+ParabolaFit = namedtuple("ParabolaFit", ["a", "b", "c", "vertex_x", "vertex_y"])
+
+
+def moment_sums(x, y, offset=0.0):
+    """Return the running moment sums of the points, with x shifted by offset.
+
+    Order: [n, sum(x), sum(x^2), sum(x^3), sum(x^4), sum(y), sum(x*y), sum(x^2*y)]
+
+    The sums are additive, so sums of several point sets (for example the rows
+    of a mask processed in pieces) can simply be added before calling solve_moments.
+    """
+    dx = np.asarray(x, dtype=np.float64) - offset
+    y = np.asarray(y, dtype=np.float64)
+    dx2 = dx * dx
+    return np.array([
+        dx.size,
+        dx.sum(),
+        dx2.sum(),
+        (dx2 * dx).sum(),
+        (dx2 * dx2).sum(),
+        y.sum(),
+        (dx * y).sum(),
+        (dx2 * y).sum(),
+    ])
+
+
+def column_moment_sums(x, counts, row_sums, offset=0.0):
+    """moment_sums of the pixels of a mask, from its per-column pixel counts and sums of row indices.
+
+    Every pixel of column x contributes x to the x moments, so these equal moment_sums of all the
+    pixels without listing them.
+    """
+    dx = np.asarray(x, dtype=np.float64) - offset
+    counts = np.asarray(counts, dtype=np.float64)
+    row_sums = np.asarray(row_sums, dtype=np.float64)
+    dx2 = dx * dx
+    return np.array([
+        counts.sum(),
+        (counts * dx).sum(),
+        (counts * dx2).sum(),
+        (counts * dx2 * dx).sum(),
+        (counts * dx2 * dx2).sum(),
+        row_sums.sum(),
+        (dx * row_sums).sum(),
+        (dx2 * row_sums).sum(),
+    ])
+
+
+def _normal_equations(sums):
+    """Build the 3x3 normal equations for a (..., 8) array of moment sums."""
+    n, s1, s2, s3, s4, sy, sxy, sx2y = np.moveaxis(sums, -1, 0)
+    lhs = np.stack([
+        np.stack([s4, s3, s2], axis=-1),
+        np.stack([s3, s2, s1], axis=-1),
+        np.stack([s2, s1, n], axis=-1),
+    ], axis=-2)
+    rhs = np.stack([sx2y, sxy, sy], axis=-1)
+    return lhs, rhs
+
+
+def _is_determined(lhs):
+    """True where the normal equations have a unique solution (at least three distinct x values)."""
+    # Relative to the diagonal so the test does not depend on the pixel scale
+    scale = lhs[..., 0, 0] * lhs[..., 1, 1] * lhs[..., 2, 2]
+    det = np.linalg.det(lhs)
+    return (scale > 0) & (np.abs(det) > 1e-12 * scale)
+
+
+def _to_fit(a, b, c, offset):
+    """Convert coefficients fitted on x - offset back to the original x axis."""
+    a_out = a
+    b_out = b - 2 * a * offset
+    c_out = a * offset * offset - b * offset + c
+    if a != 0:
+        vertex_x = offset - b / (2 * a)
+        vertex_y = c - b * b / (4 * a)
+    else:
+        # A straight line has no vertex
+        vertex_x = np.nan
+        vertex_y = np.nan
+    return ParabolaFit(float(a_out), float(b_out), float(c_out), float(vertex_x), float(vertex_y))
+
+
+def solve_moments(sums, offset=0.0):
+    """Solve the least squares parabola from moment sums, or None if it is undetermined."""
+    if sums[0] < 3:
+        return None
+    lhs, rhs = _normal_equations(np.asarray(sums, dtype=np.float64))
+    if not _is_determined(lhs):
+        # Fewer than three distinct x values
+        return None
+    a, b, c = np.linalg.solve(lhs, rhs)
+    return _to_fit(a, b, c, offset)
+
+
+def fit_parabola(x, y):
+    """Least squares fit of y = a*x^2 + b*x + c in closed form.
+
+    Returns a ParabolaFit, or None when there are not enough distinct points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if x.size < 3:
+        return None
+    # Centering x keeps the x^4 sums well conditioned for full-resolution pixel coordinates
+    offset = x.mean()
+    return solve_moments(moment_sums(x, y, offset), offset)
+
+
+def fit_parabola_columns(x, counts, row_sums):
+    """fit_parabola of every pixel of a mask, given its per-column pixel counts and sums of row indices."""
+    x = np.asarray(x, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    if total < 3:
+        return None
+    # Same centering as fit_parabola: the mean x of all the pixels
+    offset = (counts * x).sum() / total
+    return solve_moments(column_moment_sums(x, counts, row_sums, offset), offset)
+
+
+def fit_parabolas(point_sets):
+    """Fit one parabola per (x, y) point set with a single vectorized solve.
+
+    Returns a list with a ParabolaFit (or None) for each point set, in order.
+    """
+    if not point_sets:
+        return []
+    lengths = np.array([len(x) for x, _ in point_sets])
+    x = np.concatenate([np.asarray(x, dtype=np.float64) for x, _ in point_sets])
+    y = np.concatenate([np.asarray(y, dtype=np.float64) for _, y in point_sets])
+    count = len(point_sets)
+    set_ids = np.repeat(np.arange(count), lengths)
+
+    # Per-set centering, as in fit_parabola
+    n = np.bincount(set_ids, minlength=count).astype(np.float64)
+    offsets = np.divide(np.bincount(set_ids, weights=x, minlength=count), n, out=np.zeros(count), where=n > 0)
+    dx = x - offsets[set_ids]
+    dx2 = dx * dx
+
+    sums = np.stack([
+        n,
+        np.bincount(set_ids, weights=dx, minlength=count),
+        np.bincount(set_ids, weights=dx2, minlength=count),
+        np.bincount(set_ids, weights=dx2 * dx, minlength=count),
+        np.bincount(set_ids, weights=dx2 * dx2, minlength=count),
+        np.bincount(set_ids, weights=y, minlength=count),
+        np.bincount(set_ids, weights=dx * y, minlength=count),
+        np.bincount(set_ids, weights=dx2 * y, minlength=count),
+    ], axis=-1)
+    lhs, rhs = _normal_equations(sums)
+
+    # Only solve the systems that are well determined; the rest stay None
+    results = [None] * count
+    solvable = (n >= 3) & _is_determined(lhs)
+    if solvable.any():
+        coefficients = np.linalg.solve(lhs[solvable], rhs[solvable][..., None])[..., 0]
+        for index, (a, b, c) in zip(np.flatnonzero(solvable), coefficients):
+            results[index] = _to_fit(a, b, c, offsets[index])
+    return results
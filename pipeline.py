@@ -0,0 +1,227 @@
+import queue
+import threading
+import cv2
+import profiler
+
+# Marks the end of a stage's output
+_DONE = object()
+# Stands in for the analysis of a frame that did not change since the last analyzed one
+_REPEAT = object()
+
+
+class QueueDepth:
+    """Samples the depth of a queue every time a stage takes an item from it."""
+
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = capacity
+        self.samples = 0
+        self.total = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def sample(self, depth):
+        with self._lock:
+            self.samples += 1
+            self.total += depth
+            self.max = max(self.max, depth)
+
+    def __str__(self):
+        mean = self.total / self.samples if self.samples else 0.0
+        return f"{self.name} queue depth mean {mean:.1f}, max {self.max} of {self.capacity}"
+
+
+class FramePipeline:
+    """Decode -> analyze -> ordered output, with each stage on its own thread(s).
+
+    A decoder thread reads frames into a bounded frame queue, analysis_threads threads run
+    analyze(frame) -> (mask, result) on them, and iterating the pipeline yields
+    (frame_index, timestamp, frame, mask, result) in frame order; the iterating thread is the single writer.
+    At most max_in_flight frames are decoded but not yet yielded, so memory stays flat on any video length.
+    With analysis_threads=0 everything runs on the iterating thread, one frame at a time.
+    With a change_detector, frames it reports as unchanged are not analyzed and reuse the previous measurement.
+    With a sampler (a frame_sampler.FrameSampler), only the frames it wants are decoded and yielded; the others
+    are grabbed from the video without being converted to an image.
+    """
+
+    def __init__(self, cap, analyze, analysis_threads=2, queue_size=8, end_frame=None, change_detector=None,
+                 sampler=None):
+        self.cap = cap
+        self.analyze = analyze
+        self.analysis_threads = analysis_threads
+        self.end_frame = end_frame
+        self.change_detector = change_detector
+        self.sampler = sampler
+        self.frames_skipped = 0
+        self.max_in_flight = 2 * queue_size + analysis_threads
+        self._frames = queue.Queue(maxsize=queue_size)
+        self._results = queue.Queue(maxsize=queue_size)
+        self._in_flight = threading.Semaphore(self.max_in_flight)
+        self._stop = threading.Event()
+        self._threads = []
+        self._error = None
+        self.frame_depth = QueueDepth("frame", queue_size)
+        self.result_depth = QueueDepth("result", queue_size)
+
+    def _read(self):
+        """Read the next frame, returning (frame_index, timestamp in seconds, frame, changed) or None at the end.
+
+        Frames the sampler skips are grabbed and never retrieved, which saves their conversion to BGR.
+        """
+        while True:
+            if self.end_frame is not None and self.cap.get(cv2.CAP_PROP_POS_FRAMES) >= self.end_frame:
+                return None
+            with profiler.stage('grab'):
+                if not self.cap.grab():
+                    return None
+            frame_index = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+            # The timestamp the container gives the grabbed frame
+            timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            if self.sampler is None:
+                break
+            if self.sampler.finished(timestamp):
+                return None
+            if self.sampler.wants(frame_index, timestamp):
+                break
+            self.frames_skipped += 1
+        with profiler.stage('decode'):
+            ret, frame = self.cap.retrieve()
+        if not ret:
+            return None
+        # Change detection runs here, on the decoding thread, because it compares consecutive frames
+        if self.change_detector is None:
+            changed = True
+        else:
+            with profiler.stage('change_detection'):
+                changed = self.change_detector.changed(frame)
+        return frame_index, timestamp, frame, changed
+
+    def _put(self, target, item):
+        """Blocking put that gives up when the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, source, depth):
+        """Blocking get that returns _DONE when the pipeline is stopped."""
+        depth.sample(source.qsize())
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _decode(self):
+        try:
+            sequence = 0
+            while not self._stop.is_set():
+                # Backpressure: wait until the writer has consumed a frame before decoding another one
+                if not self._in_flight.acquire(timeout=0.1):
+                    continue
+                item = self._read()
+                if item is None:
+                    break
+                if not self._put(self._frames, (sequence,) + item):
+                    break
+                sequence += 1
+        except Exception as e:
+            self._error = e
+            self._stop.set()
+        finally:
+            for _ in range(self.analysis_threads):
+                self._put(self._frames, _DONE)
+
+    def _analyze_frames(self):
+        try:
+            while True:
+                item = self._get(self._frames, self.frame_depth)
+                if item is _DONE:
+                    break
+                sequence, frame_index, timestamp, frame, changed = item
+                mask, result = self.analyze(frame) if changed else (_REPEAT, _REPEAT)
+                if not self._put(self._results, (sequence, frame_index, timestamp, frame, mask, result)):
+                    break
+        except Exception as e:
+            self._error = e
+            self._stop.set()
+        finally:
+            self._put(self._results, _DONE)
+
+    def _iterate_sequential(self):
+        mask, result = None, None
+        while True:
+            item = self._read()
+            if item is None:
+                return
+            frame_index, timestamp, frame, changed = item
+            if changed:
+                mask, result = self.analyze(frame)
+            yield frame_index, timestamp, frame, mask, result
+
+    def _iterate_threaded(self):
+        self._threads = [threading.Thread(target=self._decode, daemon=True)]
+        self._threads += [threading.Thread(target=self._analyze_frames, daemon=True)
+                          for _ in range(self.analysis_threads)]
+        for thread in self._threads:
+            thread.start()
+
+        # Results arrive out of order from the analysis threads; hold them until their turn
+        pending = {}
+        next_sequence = 0
+        finished = 0
+        last_mask, last_result = None, None
+        try:
+            while finished < self.analysis_threads and not self._stop.is_set():
+                item = self._get(self._results, self.result_depth)
+                if item is _DONE:
+                    finished += 1
+                    continue
+                pending[item[0]] = item[1:]
+                while next_sequence in pending:
+                    frame_index, timestamp, frame, mask, result = pending.pop(next_sequence)
+                    # Unchanged frames take the measurement of the last analyzed frame, which was yielded just before
+                    if result is _REPEAT:
+                        mask, result = last_mask, last_result
+                    last_mask, last_result = mask, result
+                    yield frame_index, timestamp, frame, mask, result
+                    next_sequence += 1
+                    self._in_flight.release()
+            if self._error is not None:
+                raise self._error
+        finally:
+            self.close()
+
+    def __iter__(self):
+        if self.analysis_threads <= 0:
+            return self._iterate_sequential()
+        return self._iterate_threaded()
+
+    def close(self):
+        """Stop every stage and wait for the threads to exit."""
+        self._stop.set()
+        for target in (self._frames, self._results):
+            try:
+                while True:
+                    target.get_nowait()
+            except queue.Empty:
+                pass
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def report(self):
+        """Per-stage queue depth summary, and the number of unchanged frames that were not analyzed."""
+        if self.analysis_threads <= 0:
+            summary = "Pipeline ran sequentially."
+        else:
+            summary = f"Pipeline with {self.analysis_threads} analysis threads: {self.frame_depth}; {self.result_depth}."
+        if self.sampler is not None:
+            summary += f" Skipped {self.frames_skipped} frames without decoding them."
+        if self.change_detector is not None:
+            summary += f" Reused the previous measurement for {self.change_detector.frames_skipped} unchanged frames."
+        return summary
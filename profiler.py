@@ -0,0 +1,264 @@
+import contextlib
+import cProfile
+import json
+import logging
+import os
+import threading
+from time import perf_counter_ns
+import csv_output
+import env_vars
+
+# ===================================
+#  Opt-in per-stage profiling
+# ===================================
+# With PROFILE_STAGES enabled every instrumented stage records its duration into a per-thread table of
+# counters and a logarithmic histogram, so the hot path takes no lock. At the end of a video the tables are merged
+# into a per-video summary and added to the totals of the worker process; both are written to Completed/profile.
+# PROFILE_FRAMES = [first, last] also dumps cProfile stats for the frames first..last-1 of each video.
+#
+# Instrumented code wraps a stage in:
+#     with profiler.stage('morphology'):
+#         ...
+# which costs one function call when profiling is off.
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIRECTORY = os.path.join(csv_output.COMPLETED_DIRECTORY, 'profile')
+
+# Returned by stage() when profiling is off; nullcontext can be entered any number of times
+_NULL_STAGE = contextlib.nullcontext()
+
+# Profiler of the video being processed by this process, or None when profiling is off
+_active = None
+# Stage totals of every video processed by this worker process
+_worker_totals = {}
+_worker_videos = 0
+
+
+def _bucket(duration_ns):
+    """Histogram bucket of a duration: four buckets per power of two, so percentiles are within 25%."""
+    bits = duration_ns.bit_length()
+    if bits < 3:
+        return duration_ns
+    return bits * 4 + ((duration_ns >> (bits - 3)) & 3)
+
+
+def _bucket_limit_ns(bucket):
+    """Largest duration that falls in a bucket."""
+    if bucket < 4:
+        return bucket
+    bits, quarter = divmod(bucket, 4)
+    return ((5 + quarter) << (bits - 3)) - 1
+
+
+class StageStats:
+    """Call count, total/min/max duration and a logarithmic histogram of the durations of one stage."""
+    __slots__ = ('count', 'total_ns', 'min_ns', 'max_ns', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = [0] * 256
+
+    def add(self, duration_ns):
+        self.count += 1
+        self.total_ns += duration_ns
+        if self.min_ns is None or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.buckets[_bucket(duration_ns)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total_ns += other.total_ns
+        if other.min_ns is not None and (self.min_ns is None or other.min_ns < self.min_ns):
+            self.min_ns = other.min_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def percentile_ms(self, fraction):
+        """Upper bound of the histogram bucket holding the given fraction of the calls, in milliseconds."""
+        target = fraction * self.count
+        seen = 0
+        for bucket, calls in enumerate(self.buckets):
+            seen += calls
+            if calls and seen >= target:
+                return min(_bucket_limit_ns(bucket), self.max_ns) / 1e6
+        return self.max_ns / 1e6
+
+    def summary(self, elapsed_ns=None):
+        summary = {
+            'count': self.count,
+            'total_ms': self.total_ns / 1e6,
+            'mean_ms': self.total_ns / self.count / 1e6 if self.count else 0.0,
+            'min_ms': (self.min_ns or 0) / 1e6,
+            'max_ms': self.max_ns / 1e6,
+            'p50_ms': self.percentile_ms(0.5),
+            'p90_ms': self.percentile_ms(0.9),
+            'p99_ms': self.percentile_ms(0.99),
+        }
+        if elapsed_ns:
+            summary['share_of_wall_time'] = self.total_ns / elapsed_ns
+        return summary
+
+
+class _Stage:
+    """Context manager timing one stage into a thread's table."""
+    __slots__ = ('table', 'name', 'start')
+
+    def __init__(self, table, name):
+        self.table = table
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+
+    def __exit__(self, *exc):
+        duration = perf_counter_ns() - self.start
+        stats = self.table.get(self.name)
+        if stats is None:
+            stats = self.table[self.name] = StageStats()
+        stats.add(duration)
+
+
+class VideoProfiler:
+    """Stage timings of one video, recorded by any number of threads, and the optional cProfile frame range."""
+
+    def __init__(self, name, cprofile_frames=None):
+        self.name = name
+        self.start_ns = perf_counter_ns()
+        self.cprofile_frames = cprofile_frames
+        self._cprofile = None
+        self._cprofile_done = False
+        self._local = threading.local()
+        self._tables = []
+        self._lock = threading.Lock()
+
+    def _table(self):
+        table = getattr(self._local, 'table', None)
+        if table is None:
+            table = self._local.table = {}
+            # Only taken once per thread
+            with self._lock:
+                self._tables.append(table)
+        return table
+
+    def stage(self, name):
+        return _Stage(self._table(), name)
+
+    def totals(self):
+        """Stage statistics merged over every thread."""
+        merged = {}
+        with self._lock:
+            tables = list(self._tables)
+        for table in tables:
+            for name, stats in list(table.items()):
+                merged.setdefault(name, StageStats()).merge(stats)
+        return merged
+
+    def frame_done(self, frame_index):
+        """Start or stop the cProfile capture so it covers the frames in cprofile_frames."""
+        if self.cprofile_frames is None or self._cprofile_done:
+            return
+        first, last = self.cprofile_frames
+        if self._cprofile is None and first <= frame_index + 1 < last:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        elif self._cprofile is not None and frame_index + 1 >= last:
+            self._dump_cprofile()
+
+    def _dump_cprofile(self):
+        self._cprofile.disable()
+        first, last = self.cprofile_frames
+        os.makedirs(PROFILE_DIRECTORY, exist_ok=True)
+        path = os.path.join(PROFILE_DIRECTORY, f"{self.name}.frames_{first}-{last}.pstats")
+        self._cprofile.dump_stats(path)
+        logger.info("cProfile stats for frames %d-%d saved to %s", first, last - 1, path)
+        self._cprofile = None
+        self._cprofile_done = True
+
+
+def enabled():
+    return bool(env_vars.Env_Vars.PROFILE_STAGES)
+
+
+def cprofile_frames():
+    """The [first, last) frame range to run cProfile over, or None if PROFILE_FRAMES is empty."""
+    first, last = (int(value) for value in env_vars.Env_Vars.PROFILE_FRAMES)
+    return (first, last) if last > first else None
+
+
+def stage(name):
+    """Context manager timing the enclosed code as stage name of the current video."""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name)
+
+
+def start_video(name, use_cprofile=True):
+    """Start recording the stages of a video in this process; returns the profiler, or None if profiling is off."""
+    global _active
+    frames = cprofile_frames() if use_cprofile else None
+    if not enabled() and frames is None:
+        _active = None
+        return None
+    _active = VideoProfiler(os.path.splitext(name)[0], frames)
+    return _active
+
+
+def frame_done(frame_index):
+    if _active is not None:
+        _active.frame_done(frame_index)
+
+
+def _format_table(title, stages):
+    lines = [title, f"  {'stage':<18}{'calls':>8}{'total ms':>12}{'mean ms':>10}{'p50':>9}{'p99':>9}{'max ms':>10}"]
+    for name, summary in sorted(stages.items(), key=lambda item: -item[1]['total_ms']):
+        lines.append(f"  {name:<18}{summary['count']:>8}{summary['total_ms']:>12.1f}{summary['mean_ms']:>10.3f}"
+                     f"{summary['p50_ms']:>9.3f}{summary['p99_ms']:>9.3f}{summary['max_ms']:>10.2f}")
+    return "\n".join(lines)
+
+
+def _write_json(path, data):
+    os.makedirs(PROFILE_DIRECTORY, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2)
+
+
+def finish_video(frames):
+    """Write the summary of the current video, add it to the worker totals and stop recording."""
+    global _active, _worker_videos
+    video, _active = _active, None
+    if video is None:
+        return None
+    if video._cprofile is not None:
+        video._dump_cprofile()
+    if not enabled():
+        return None
+
+    elapsed_ns = perf_counter_ns() - video.start_ns
+    totals = video.totals()
+    summary = {
+        'video': video.name,
+        'worker': os.getpid(),
+        'frames': frames,
+        'seconds': elapsed_ns / 1e9,
+        'stages': {name: stats.summary(elapsed_ns) for name, stats in totals.items()},
+    }
+    _write_json(os.path.join(PROFILE_DIRECTORY, f"{video.name}.stages.json"), summary)
+    logger.info(_format_table(f"Stage timings for {video.name} ({frames} frames, {elapsed_ns / 1e9:.2f} s):",
+                              summary['stages']))
+
+    # The worker file is rewritten after every video, so it is complete whenever the pool shuts down
+    _worker_videos += 1
+    for name, stats in totals.items():
+        _worker_totals.setdefault(name, StageStats()).merge(stats)
+    _write_json(os.path.join(PROFILE_DIRECTORY, f"worker_{os.getpid()}.stages.json"), {
+        'worker': os.getpid(),
+        'videos': _worker_videos,
+        'stages': {name: stats.summary() for name, stats in _worker_totals.items()},
+    })
+    return summary
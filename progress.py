@@ -0,0 +1,202 @@
+import multiprocessing
+import queue
+from collections import namedtuple
+from multiprocessing import shared_memory
+from time import perf_counter
+import env_vars
+import log_config
+
+# ===================================
+#  Live progress and previews from the workers to the GUI
+# ===================================
+# Workers send Progress events over a multiprocessing queue a few times per second, and a downscaled preview
+# of the frame being analyzed through a shared memory block, so no worker opens an OpenCV window. The GUI
+# creates a ProgressMonitor, hands it to main.main, and polls it from the Tk main loop:
+#
+#     monitor = progress.ProgressMonitor()
+#     # analysis thread: pool initializer=progress.configure_worker, initargs=(log_queue,) + monitor.worker_args(n)
+#     # Tk main loop, every 100 ms: updates, preview = monitor.poll()
+#
+# Every worker owns one shared memory block of two preview buffers and writes them in turn; the event of a
+# preview names the buffer, so the GUI copies a preview while the worker fills the other buffer.
+
+# Progress of one video; done and total count frames of the analysis window (total 0 when unknown),
+# center_freq and amplitude are the latest measurement (None before the first one).
+# state is 'running', 'done', 'stopped' (quit or error; the video resumes on the next run) or 'skipped'
+Progress = namedtuple("Progress", ["video", "done", "total", "fps", "center_freq", "amplitude", "state"])
+# A preview image of video, of shape (rows, columns[, 3]) BGR, at offset bytes into the shared memory block
+Preview = namedtuple("Preview", ["video", "block", "offset", "shape"])
+
+# Worker side: the reporter of this process and the video it is analyzing, None when nobody is listening
+_reporter = None
+_active = None
+
+
+def _preview_bytes(preview_width):
+    # A preview fits in a preview_width square, in color
+    return preview_width * preview_width * 3
+
+
+class ProgressMonitor:
+    """GUI side: the queue the workers report to, their preview buffers and the stop request."""
+
+    def __init__(self):
+        self.events = multiprocessing.Queue()
+        self.stop_event = multiprocessing.Event()
+        self._blocks = {}
+
+    def worker_args(self, workers):
+        """Pool initializer arguments after the log queue, with a preview buffer for each of workers processes."""
+        preview_width = int(env_vars.Env_Vars.PREVIEW_WIDTH)
+        names = []
+        for _ in range(workers):
+            block = shared_memory.SharedMemory(create=True, size=2 * _preview_bytes(preview_width))
+            self._blocks[block.name] = block
+            names.append(block.name)
+        # Workers take the blocks in the order they start; a worker started to replace one gets no previews
+        return self.events, self.stop_event, names, multiprocessing.Value('i', 0), preview_width
+
+    def stop(self):
+        """Ask every worker to stop its video after the current frame."""
+        self.stop_event.set()
+
+    def poll(self):
+        """Take every pending event: the latest Progress of each video, and a copy of the latest preview or None."""
+        updates = {}
+        preview = None
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(event, Preview):
+                preview = event
+            else:
+                updates[event.video] = event
+        image = None
+        if preview is not None and preview.block in self._blocks:
+            import numpy as np
+            buffer = self._blocks[preview.block].buf
+            image = np.ndarray(preview.shape, np.uint8, buffer=buffer, offset=preview.offset).copy()
+        return list(updates.values()), image
+
+    def close(self):
+        """Free the preview buffers once the workers are gone."""
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks = {}
+
+
+class ProgressReporter:
+    """Worker side: sends the Progress events and previews of this process."""
+
+    def __init__(self, events, stop_event, block_names, next_block, preview_width):
+        self.events = events
+        self.stop_event = stop_event
+        self.preview_width = preview_width
+        with next_block.get_lock():
+            index = next_block.value
+            next_block.value += 1
+        self.block = shared_memory.SharedMemory(name=block_names[index]) if index < len(block_names) else None
+        self._buffer = 0
+
+    def send_preview(self, video, image):
+        """Downscale image into the next preview buffer and announce it."""
+        if self.block is None:
+            return
+        # Imported here so starting a worker does not wait for OpenCV
+        import cv2
+        import numpy as np
+        rows, columns = image.shape[:2]
+        scale = min(self.preview_width / columns, self.preview_width / rows, 1.0)
+        size = (max(int(columns * scale), 1), max(int(rows * scale), 1))
+        offset = self._buffer * _preview_bytes(self.preview_width)
+        self._buffer ^= 1
+        target = np.ndarray((size[1], size[0]) + image.shape[2:], np.uint8, buffer=self.block.buf, offset=offset)
+        cv2.resize(image, size, dst=target, interpolation=cv2.INTER_AREA)
+        self.events.put(Preview(video, self.block.name, offset, target.shape))
+
+
+class VideoProgress:
+    """Progress of the video a worker is analyzing, sent at most every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, reporter, video, first_frame, end_frame):
+        self.reporter = reporter
+        self.video = video
+        self.first_frame = first_frame
+        self.total = max(end_frame - first_frame, 0)
+        self.interval = float(env_vars.Env_Vars.PROGRESS_INTERVAL)
+        self.start = perf_counter()
+        self.frames = 0
+        self.done = 0
+        self.measurement = None
+        self._last_sent = None
+
+    def event(self, state):
+        elapsed = perf_counter() - self.start
+        fps = self.frames / elapsed if elapsed > 0 else 0.0
+        center_freq, amplitude = self.measurement if self.measurement is not None else (None, None)
+        return Progress(self.video, self.done, self.total, fps, center_freq, amplitude, state)
+
+    def frame_done(self, frame_index, result, image):
+        self.frames += 1
+        self.done = frame_index + 1 - self.first_frame
+        if result:
+            self.measurement = (result.center_freq, result.amplitude)
+        now = perf_counter()
+        if self._last_sent is not None and now - self._last_sent < self.interval:
+            return
+        self._last_sent = now
+        self.reporter.events.put(self.event('running'))
+        if image is not None:
+            self.reporter.send_preview(self.video, image)
+
+
+def configure_worker(log_queue, events=None, stop_event=None, block_names=(), next_block=None, preview_width=0):
+    """Pool initializer: log through log_queue and report progress to the ProgressMonitor of worker_args."""
+    global _reporter
+    log_config.configure_worker(log_queue)
+    _reporter = ProgressReporter(events, stop_event, block_names, next_block, preview_width) \
+        if events is not None else None
+
+
+def start_video(video, frame_count, sampler=None):
+    """Start reporting the progress of video, over the frames of the sampler's window; None if nobody listens."""
+    global _active
+    if _reporter is None:
+        _active = None
+        return None
+    first_frame, end_frame = 0, max(frame_count, 0)
+    if sampler is not None:
+        first_frame = sampler.start_frame()
+        if sampler.end_frame() is not None:
+            end_frame = min(end_frame, sampler.end_frame()) if end_frame > 0 else sampler.end_frame()
+    _active = VideoProgress(_reporter, video, first_frame, end_frame)
+    _reporter.events.put(_active.event('running'))
+    return _active
+
+
+def frame_done(frame_index, result, image):
+    """Count a frame with its WaveMeasurement (or None), and the image to preview (not copied unless sent)."""
+    if _active is not None:
+        _active.frame_done(frame_index, result, image)
+
+
+def stop_requested():
+    """True once the GUI asked the workers to stop."""
+    return _reporter is not None and _reporter.stop_event.is_set()
+
+
+def finish_video(state):
+    """Send the final state of the current video and stop reporting it."""
+    global _active
+    video, _active = _active, None
+    if video is not None:
+        _reporter.events.put(video.event(state))
+
+
+def video_not_started(video, state='skipped'):
+    """Report a video that is not analyzed: 'skipped' if it needs no analysis, 'stopped' after a stop request."""
+    if _reporter is not None:
+        _reporter.events.put(Progress(video, 0, 0, 0.0, None, None, state))
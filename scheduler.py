@@ -0,0 +1,109 @@
+import heapq
+import logging
+from collections import namedtuple
+from time import perf_counter
+import cv2
+import frame_sampler
+import thumbnail_cache
+import worker
+
+logger = logging.getLogger(__name__)
+
+# ===================================
+#  Longest-first scheduling of videos over a process pool
+# ===================================
+# The frame count and size of every video are looked up before the videos start, and the longest ones are handed
+# out first, so one long capture does not start last and keep a single core busy after the others are idle. They
+# come from the GUI's thumbnail cache when it has the video, else the pool's workers open the videos in parallel.
+#
+#     results = scheduler.run(pool, processes, worker.video_to_csv, [(path, span, ...), ...], paths)
+
+# A video to analyze; cost is the number of pixels to decode (frames to read x frame size), None if unknown
+VideoJob = namedtuple("VideoJob", ["path", "frames", "width", "height", "cost"])
+
+
+def probe(video_path, info=None):
+    """VideoJob of a video file, from its container header or from its thumbnail_cache.VideoInfo."""
+    if info is not None:
+        frames, width, height, fps = info.frames, info.width, info.height, info.fps
+    else:
+        cap = cv2.VideoCapture(video_path)
+        try:
+            frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            fps = cap.get(cv2.CAP_PROP_FPS)
+        finally:
+            cap.release()
+    # Only the frames of the analysis window are read
+    sampler = frame_sampler.from_settings(fps)
+    if sampler is not None and frames > 0:
+        end_frame = sampler.end_frame()
+        frames = max(min(frames, end_frame if end_frame is not None else frames) - sampler.start_frame(), 0)
+    cost = frames * width * height if frames > 0 and width > 0 and height > 0 else None
+    return VideoJob(video_path, frames, width, height, cost)
+
+
+def probe_all(pool, video_paths):
+    """VideoJob of every video, from the thumbnail cache when it has the video, else probed over pool."""
+    cache = thumbnail_cache.ThumbnailCache()
+    infos = []
+    for path in video_paths:
+        try:
+            infos.append(cache.info(path))
+        except OSError:
+            infos.append(None)
+    uncached = [path for path, info in zip(video_paths, infos) if info is None]
+    probed = iter(pool.map(worker.probe, uncached) if uncached else [])
+    return [probe(path, info) if info is not None else next(probed) for path, info in zip(video_paths, infos)]
+
+
+def longest_first(jobs):
+    """Indexes of jobs from the most to the least expensive; unknown lengths go first, as they may be longest."""
+    return sorted(range(len(jobs)), key=lambda index: (jobs[index].cost is not None, -(jobs[index].cost or 0)))
+
+
+def estimate_makespan(costs, workers):
+    """Largest total cost of a worker when the costs are handed out in order, each to the first free worker."""
+    loads = [0] * max(min(workers, len(costs)), 1)
+    for cost in costs:
+        heapq.heapreplace(loads, loads[0] + cost)
+    return max(loads)
+
+
+def run(pool, processes, function, job_args, video_paths):
+    """Run function(*job_args[i]) for every video video_paths[i] over pool, the longest videos first.
+
+    Returns the results in the order the videos finish. The estimated makespan is logged before the
+    videos start, and the actual makespan and the utilization of every worker once they are all done.
+    """
+    jobs = probe_all(pool, video_paths)
+    order = longest_first(jobs)
+    known = [job.cost for job in jobs if job.cost is not None]
+    # Videos of unknown length are counted as long as the longest known one
+    costs = [jobs[index].cost if jobs[index].cost is not None else max(known, default=1) for index in order]
+    total_cost = sum(costs)
+    makespan_cost = estimate_makespan(costs, processes)
+    if total_cost > 0:
+        logger.info("Scheduling %d videos on %d workers, longest first. The busiest worker gets an estimated "
+                    "%.0f%% of the work (an even split is %.0f%%).", len(jobs), processes,
+                    100 * makespan_cost / total_cost, 100 / min(processes, len(jobs)))
+
+    start = perf_counter()
+    results = []
+    busy = {}
+    for result, worker_name, seconds in pool.imap_unordered(worker.run_job,
+                                                            [(function, job_args[index]) for index in order]):
+        results.append(result)
+        busy[worker_name] = busy.get(worker_name, 0.0) + seconds
+    elapsed = perf_counter() - start
+
+    if elapsed > 0 and total_cost > 0:
+        # The estimate in seconds uses the throughput actually reached over all the workers
+        estimated = makespan_cost * sum(busy.values()) / total_cost
+        logger.info("All videos finished in %.1f s (estimated %.1f s from the frame counts).", elapsed, estimated)
+        utilization = ", ".join(f"{name} {100 * seconds / elapsed:.0f}%" for name, seconds in sorted(busy.items()))
+        idle_workers = processes - len(busy)
+        logger.info("Worker utilization: %s%s", utilization,
+                    f"; {idle_workers} workers got no video" if idle_workers > 0 else "")
+    return results
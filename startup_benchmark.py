@@ -0,0 +1,152 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from time import perf_counter
+import worker
+
+# ===================================
+#  Startup time benchmark
+# ===================================
+# Times what a user waits for before any frame is analyzed, each in a new interpreter so nothing is already
+# imported: importing the entry modules, opening the GUI window, and starting a pool of spawned workers.
+# Every measurement is compared with its budget in BUDGETS_MS.
+#
+# Usage:
+#     python startup_benchmark.py                  # results in benchmark_results/startup_<timestamp>.json
+#     python startup_benchmark.py --check          # exit with status 1 if a measurement is over its budget
+
+# Budget in milliseconds of every measurement, over the start of a bare interpreter for the imports and the GUI
+BUDGETS_MS = {
+    'import worker': 60,
+    'import env_vars': 250,
+    'import main': 600,
+    'import headless': 600,
+    'gui launch': 1500,
+    'worker spawn': 1500,
+    'first task imports': 800,
+}
+
+# Modules whose import is timed, from the lightest to the heaviest
+MODULES = ['worker', 'env_vars', 'main', 'headless']
+
+
+def run_python(code):
+    """Wall time in ms of a new interpreter running code, and its error output if it failed."""
+    start = perf_counter()
+    completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    elapsed_ms = (perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        return None, completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'failed'
+    return elapsed_ms, None
+
+
+def median_run(code, repeat):
+    """Median wall time in ms of repeat runs of code, or (None, error) if it fails."""
+    times = []
+    for _ in range(repeat):
+        elapsed_ms, error = run_python(code)
+        if error is not None:
+            return None, error
+        times.append(elapsed_ms)
+    return statistics.median(times), None
+
+
+def import_analysis():
+    """Pool task: time the import of the analysis modules in a worker that has only run its initializer."""
+    start = perf_counter()
+    import main  # noqa: F401
+    return (perf_counter() - start) * 1000
+
+
+def time_worker_spawn(processes):
+    """ms until a spawned pool of processes has every worker started, and of the first task's imports."""
+    import log_config
+    log_queue = log_config.start_listener()
+    try:
+        start = perf_counter()
+        with multiprocessing.Pool(processes, initializer=worker.initialize,
+                                  initargs=worker.initargs(log_queue)) as pool:
+            # One trivial task per worker; a worker still starting leaves its task to the others, so wait for all
+            pids = set()
+            while len(pids) < processes:
+                pids.update(pool.map(worker.ready, range(processes), chunksize=1))
+            spawn_ms = (perf_counter() - start) * 1000
+            first_task_ms = pool.apply(import_analysis)
+            pool.close()
+            pool.join()
+    finally:
+        log_config.stop_listener()
+    return spawn_ms, first_task_ms
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of the GUI and the pool workers.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of every measurement; the median is kept")
+    parser.add_argument("--processes", type=int, default=0, help="Workers to spawn (default: one per CPU core)")
+    parser.add_argument("--output", default=None,
+                        help="Results file (default: benchmark_results/startup_<timestamp>.json)")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if a budget is exceeded")
+    args = parser.parse_args(argv)
+    processes = args.processes or multiprocessing.cpu_count()
+    # Workers start like in the packaged build on every platform, and the log queue is made for them
+    multiprocessing.set_start_method('spawn', force=True)
+
+    measurements = {}
+    errors = {}
+    baseline_ms, _ = median_run("pass", args.repeat)
+    print(f"Bare interpreter start: {baseline_ms:.0f} ms")
+    for module in MODULES:
+        elapsed_ms, error = median_run(f"import {module}", args.repeat)
+        measurements[f'import {module}'] = elapsed_ms - baseline_ms if elapsed_ms is not None else None
+        errors[f'import {module}'] = error
+    # Until the first frame of the window is drawn; needs tkinter, PIL and a display
+    elapsed_ms, error = median_run("import analyzer_gui; app = analyzer_gui.SpectrumAnalyzerGUI(); "
+                                   "app.update(); app.destroy()", args.repeat)
+    measurements['gui launch'] = elapsed_ms - baseline_ms if elapsed_ms is not None else None
+    errors['gui launch'] = error
+    spawn_runs = [time_worker_spawn(processes) for _ in range(args.repeat)]
+    measurements['worker spawn'] = statistics.median(spawn_ms for spawn_ms, _ in spawn_runs)
+    measurements['first task imports'] = statistics.median(first_ms for _, first_ms in spawn_runs)
+
+    over_budget = []
+    for name, elapsed_ms in measurements.items():
+        budget = BUDGETS_MS[name]
+        if elapsed_ms is None:
+            print(f"  {name:<20} not measured: {errors[name]}")
+            continue
+        status = "ok" if elapsed_ms <= budget else "OVER BUDGET"
+        if elapsed_ms > budget:
+            over_budget.append(name)
+        print(f"  {name:<20} {elapsed_ms:>8.0f} ms  (budget {budget} ms) {status}")
+    print(f"  ({processes} spawned workers; imports and GUI launch are over the bare interpreter start)")
+
+    output = os.path.abspath(args.output or os.path.join(
+        "benchmark_results", "startup_" + datetime.now().strftime("%Y%m%d_%H%M%S") + ".json"))
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpu_count': multiprocessing.cpu_count(), 'processes': processes},
+        'interpreter_ms': baseline_ms,
+        'measurements_ms': measurements,
+        'errors': {name: error for name, error in errors.items() if error is not None},
+        'budgets_ms': BUDGETS_MS,
+        'over_budget': over_budget,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.check and over_budget:
+        sys.exit(1)
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import cv2
+import numpy as np
+
+# ===================================
+#  Synthetic spectrum analyzer videos
+# ===================================
+# Renders analyzer screens with a known trace so the pipeline can be tested and benchmarked
+# without real recordings. Every video gets a .json sidecar with the grid bounds and the true
+# vertex of the trace on every frame.
+#
+# Usage:
+#     python synthetic_video.py --out Videos/synthetic --resolutions 1280x720,1920x1080 --frames 300
+
+# Colors inside the default Env_Vars grid and wave HSV ranges
+GRID_COLOR = (55, 90, 55)  # dim green graticule
+TRACE_COLOR = (255, 255, 0)  # cyan trace
+GRID_DIVISIONS = 10
+
+
+def grid_bounds(width, height):
+    """Pixel bounds (left, top, right, bottom) of the graticule for a frame size."""
+    left = int(width * 0.1875)
+    right = int(width * 0.8125)
+    top = int(height * 0.0833)
+    bottom = int(height * 0.9167)
+    return left, top, right, bottom
+
+
+def render_frame(width, height, vertex_x, vertex_y, curvature, noise=0.0, sweep=1.0, rng=None):
+    """Draw one analyzer screen.
+
+    The trace is the parabola y = vertex_y + curvature * (x - vertex_x)^2, clipped to the grid.
+    sweep is the fraction of the grid width already redrawn after a clear (0 draws no trace).
+    noise is the standard deviation of the gaussian pixel noise added to the frame.
+    """
+    frame = np.zeros((height, width, 3), np.uint8)
+    left, top, right, bottom = grid_bounds(width, height)
+    # Lines must survive the 5x5 opening in Utilities.grid_mask
+    thickness = max(6, height // 120)
+    for division in range(GRID_DIVISIONS + 1):
+        x = left + (right - left) * division // GRID_DIVISIONS
+        y = top + (bottom - top) * division // GRID_DIVISIONS
+        cv2.line(frame, (x, top), (x, bottom), GRID_COLOR, thickness)
+        cv2.line(frame, (left, y), (right, y), GRID_COLOR, thickness)
+
+    sweep_right = left + int((right - left) * sweep)
+    if sweep_right > left + 1:
+        xs = np.arange(left, sweep_right)
+        baseline = bottom - (bottom - top) // 60
+        ys = np.clip(vertex_y + curvature * (xs - vertex_x) ** 2, top, baseline).astype(np.int32)
+        points = np.stack([xs, ys], axis=1).reshape(-1, 1, 2)
+        cv2.polylines(frame, [points], False, TRACE_COLOR, max(3, height // 240))
+
+    if noise > 0:
+        rng = rng or np.random.default_rng()
+        noisy = frame.astype(np.int16) + rng.normal(0, noise, frame.shape).astype(np.int16)
+        frame = np.clip(noisy, 0, 255).astype(np.uint8)
+    return frame
+
+
+def generate_video(path, width=1280, height=720, frames=300, fps=30, noise=4.0, hold_frames=1,
+                   clear_every=0, redraw_frames=10, seed=0):
+    """Write a synthetic analyzer video to path and return its ground truth.
+
+    The trace moves every hold_frames frames. With clear_every > 0 the screen is cleared every
+    clear_every frames and the trace is redrawn left to right over redraw_frames frames.
+    The ground truth is also written next to the video as path + '.json'.
+    """
+    rng = np.random.default_rng(seed)
+    left, top, right, bottom = grid_bounds(width, height)
+    grid_width, grid_height = right - left, bottom - top
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise Exception(f"Could not open a video writer for {path}")
+
+    truth = []
+    try:
+        for index in range(frames):
+            step = index // max(hold_frames, 1)
+            # Vertex wanders around the center of the grid; the curvature keeps the trace shape independent of size
+            vertex_x = left + grid_width * (0.5 + 0.1 * np.sin(step / 10))
+            vertex_y = top + grid_height * (0.25 + 0.05 * np.sin(step / 7))
+            curvature = 2.5 * grid_height / grid_width ** 2
+
+            sweep = 1.0
+            if clear_every > 0:
+                since_clear = index % clear_every
+                if since_clear < redraw_frames:
+                    sweep = since_clear / redraw_frames
+
+            writer.write(render_frame(width, height, vertex_x, vertex_y, curvature, noise, sweep, rng))
+            truth.append({'frame': index, 'vertex_x': float(vertex_x), 'vertex_y': float(vertex_y), 'sweep': sweep})
+    finally:
+        writer.release()
+
+    ground_truth = {
+        'width': width, 'height': height, 'fps': fps, 'frames': frames,
+        'grid': {'left': left, 'top': top, 'right': right, 'bottom': bottom},
+        'trace': truth,
+    }
+    with open(path + '.json', 'w') as file:
+        json.dump(ground_truth, file)
+    return ground_truth
+
+
+def parse_resolutions(text):
+    """'1280x720,1920x1080' -> [(1280, 720), (1920, 1080)]"""
+    return [tuple(int(value) for value in item.split('x')) for item in text.split(',') if item]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render synthetic spectrum analyzer videos.")
+    parser.add_argument("--out", default=os.path.join("Videos", "synthetic"), help="Output folder")
+    parser.add_argument("--resolutions", default="1280x720,1920x1080", help="Comma separated WIDTHxHEIGHT list")
+    parser.add_argument("--frames", type=int, nargs="+", default=[300], help="Video length(s) in frames")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--noise", type=float, default=4.0)
+    parser.add_argument("--hold-frames", type=int, default=1, help="Frames the trace stays still before moving")
+    parser.add_argument("--clear-every", type=int, default=0, help="Clear and redraw the trace every N frames")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for width, height in parse_resolutions(args.resolutions):
+        for frames in args.frames:
+            path = os.path.join(args.out, f"synthetic_{width}x{height}_{frames}f.mp4")
+            generate_video(path, width, height, frames, args.fps, args.noise, args.hold_frames, args.clear_every)
+            print(f"Wrote {path}")
@@ -0,0 +1,19 @@
+import os
+import sys
+import pytest
+
+# The modules of the application live at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_dir(tmp_path, monkeypatch):
+    """Run every test in an empty directory, so Completed/ and env_settings.json are never the project's."""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def config():
+    """AnalysisConfig of the default settings, with a usable span, center and dB per division."""
+    import analysis_config
+    return analysis_config.build(analysis_config.analysis_settings(10, 100, 10), 'contour', 'hsv')
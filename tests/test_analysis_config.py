@@ -0,0 +1,40 @@
+import cv2
+import numpy as np
+import pytest
+import analysis_config
+
+KERNELS = {
+    'square': np.ones((3, 3), np.uint8),
+    'cross': cv2.getStructuringElement(cv2.MORPH_CROSS, (5, 5)),
+    'asymmetric': np.array([[1, 1, 0], [0, 1, 0], [0, 1, 1]], np.uint8),
+    'corner': np.array([[0, 0, 0], [0, 1, 1], [0, 1, 0]], np.uint8),
+}
+
+
+@pytest.fixture
+def mask():
+    rng = np.random.default_rng(0)
+    return ((rng.random((80, 120)) > 0.97) * 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("name", KERNELS)
+@pytest.mark.parametrize("iterations", [2, 3, 5, 12])
+def test_iterated_kernel_matches_iterations(mask, name, iterations):
+    kernel = KERNELS[name]
+    combined = analysis_config.iterated_kernel(kernel, iterations)
+    np.testing.assert_array_equal(cv2.dilate(mask, combined), cv2.dilate(mask, kernel, iterations=iterations))
+    eroded = cv2.dilate(mask, np.ones((7, 7), np.uint8))
+    np.testing.assert_array_equal(cv2.erode(eroded, combined), cv2.erode(eroded, kernel, iterations=iterations))
+
+
+def test_iterated_kernel_without_a_single_kernel():
+    kernel = np.ones((4, 4), np.uint8)
+    assert analysis_config.iterated_kernel(kernel, 0) is None
+    assert analysis_config.iterated_kernel(kernel, 1) is kernel
+    # An even sized kernel has no centered anchor, so it is applied iterations times instead
+    assert analysis_config.iterated_kernel(kernel, 3) is kernel
+
+
+def test_build_rejects_an_unknown_mask_engine():
+    with pytest.raises(ValueError, match="MASK_ENGINE"):
+        analysis_config.build(analysis_config.analysis_settings(), 'fast', 'hsv')
@@ -0,0 +1,30 @@
+import numpy as np
+import binary_output
+
+
+def test_npy_appender_resumes_after_truncation(tmp_path):
+    path = str(tmp_path / 'rows.npy')
+    rows = np.arange(30, dtype=np.float64).reshape(15, 2)
+    appender = binary_output.NpyAppender(path, np.float64, (2,))
+    appender.append(rows[:10])
+    appender.flush()
+    checkpointed = appender.rows
+    # Rows written after the checkpoint, then the process dies without closing the file
+    appender.append(rows[10:13])
+    appender._file.close()
+
+    resumed = binary_output.NpyAppender(path, np.float64, (2,), resume_rows=checkpointed)
+    resumed.append(rows[10:15])
+    resumed.close()
+    np.testing.assert_array_equal(np.load(path), rows)
+
+
+def test_npy_appender_resumes_a_closed_file(tmp_path):
+    path = str(tmp_path / 'frames.npy')
+    appender = binary_output.NpyAppender(path, np.int64)
+    appender.append(np.arange(5))
+    appender.close()
+    resumed = binary_output.NpyAppender(path, np.int64, resume_rows=3)
+    resumed.append([7, 8])
+    resumed.close()
+    np.testing.assert_array_equal(np.load(path, mmap_mode='r'), [0, 1, 2, 7, 8])
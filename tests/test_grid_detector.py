@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+import grid_detector
+import synthetic_video
+import utilities
+
+
+@pytest.mark.parametrize("width, height", [(1280, 720), (1920, 1080)])
+def test_detect_grid_finds_the_rendered_graticule(config, width, height):
+    frame = synthetic_video.render_frame(width, height, width / 2, height / 2, 0.001)
+    left, top, right, bottom = synthetic_video.grid_bounds(width, height)
+    calibration = grid_detector.detect_grid(frame, synthetic_video.GRID_DIVISIONS,
+                                            mask=utilities.Utilities.grid_mask(frame, config))
+    assert calibration is not None
+    # Within half the thickness of a line of the rendered center
+    tolerance = max(6, height // 120) / 2
+    for found, drawn in zip((calibration.left, calibration.top, calibration.right, calibration.bottom),
+                            (left, top, right, bottom)):
+        assert abs(found - drawn) <= tolerance
+    assert calibration.center_x == pytest.approx((calibration.left + calibration.right) / 2)
+    assert calibration.px_per_div_x == pytest.approx(calibration.width / synthetic_video.GRID_DIVISIONS)
+
+
+def test_detect_grid_without_a_grid(config):
+    frame = np.zeros((720, 1280, 3), np.uint8)
+    assert grid_detector.detect_grid(frame, mask=utilities.Utilities.grid_mask(frame, config)) is None
+
+
+def test_find_lines_returns_run_centers():
+    profile = np.array([0, 9, 10, 9, 0, 1, 0, 0, 10, 0])
+    assert grid_detector.find_lines(profile, 0.5) == [2.0, 8.0]
+    assert grid_detector.find_lines(np.zeros(5), 0.5) == []
+
+
+def test_screen_roi_is_clamped_to_the_frame():
+    calibration = grid_detector.GridCalibration(5, 5, 95, 45, 90, 40, 9, 4, 50, 25)
+    assert grid_detector.screen_roi(calibration, (50, 100, 3), 10) == (0, 0, 100, 50)
+    assert grid_detector.screen_roi(calibration, (50, 100, 3), 2) == (3, 3, 98, 48)
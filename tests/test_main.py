@@ -0,0 +1,11 @@
+import main
+
+
+def test_split_frame_range_covers_every_frame_once():
+    ranges = main.split_frame_range(1, 60, 3)
+    assert ranges == [(1, 20), (20, 40), (40, None)]
+
+
+def test_split_frame_range_never_makes_empty_chunks():
+    assert main.split_frame_range(10, 12, 8) == [(10, 11), (11, None)]
+    assert main.split_frame_range(5, 6, 4) == [(5, None)]
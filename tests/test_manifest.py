@@ -0,0 +1,68 @@
+import os
+import pytest
+import csv_output
+import frame_analysis
+import manifest
+
+
+class FakeWriter:
+    name = 'csv'
+
+    def checkpoint(self):
+        return {'rows': 42}
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'capture.mp4'
+    path.write_bytes(os.urandom(4096))
+    return str(path)
+
+
+def checkpoint_of(video, config, span=None):
+    return manifest.VideoCheckpoint(video, span or config.span, config.center, config.dbPerHLine, config)
+
+
+def interrupted_run(video, config, fileName='run_CSV_capture.mp4'):
+    checkpoint = checkpoint_of(video, config)
+    checkpoint.start(fileName)
+    # The partial output the checkpoint refers to
+    open(csv_output.output_path(fileName) + '.part', 'w').close()
+    amplitudes = frame_analysis.AmplitudeTracker()
+    amplitudes.update(40.0)
+    amplitudes.update(20.0)
+    checkpoint.save(99, [FakeWriter()], amplitudes)
+    checkpoint.finish('stopped')
+    return fileName
+
+
+def test_stopped_video_resumes_from_its_checkpoint(video, config):
+    fileName = interrupted_run(video, config)
+    checkpoint = checkpoint_of(video, config)
+    assert not checkpoint.is_done()
+    assert checkpoint.output_name() == fileName
+    assert checkpoint.resume_state() == {'last_frame': 99, 'writers': {'csv': {'rows': 42}},
+                                         'min_amplitude': 20.0, 'max_amplitude': 40.0}
+    # Starting again keeps the checkpoint to resume from
+    checkpoint.start('another_name.mp4')
+    assert checkpoint_of(video, config).output_name() == fileName
+
+
+def test_finished_video_is_not_resumed(video, config):
+    interrupted_run(video, config)
+    checkpoint_of(video, config).finish('done')
+    checkpoint = checkpoint_of(video, config)
+    assert checkpoint.is_done()
+    assert checkpoint.resume_state() is None
+
+
+def test_checkpoint_is_ignored_when_anything_changed(video, config):
+    fileName = interrupted_run(video, config)
+    assert checkpoint_of(video, config, config.span * 2).resume_state() is None
+    with open(video, 'ab') as file:
+        file.write(b'more frames')
+    assert checkpoint_of(video, config).resume_state() is None
+    # Nor without the output written so far
+    interrupted_run(video, config, fileName)
+    os.remove(csv_output.output_path(fileName) + '.part')
+    assert checkpoint_of(video, config).resume_state() is None
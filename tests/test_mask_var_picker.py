@@ -0,0 +1,95 @@
+import json
+import numpy as np
+import pytest
+import color_classifier
+import env_vars
+import mask_var_picker
+import synthetic_video
+
+
+@pytest.fixture
+def samples(tmp_path):
+    path = str(tmp_path / 'screen.mp4')
+    synthetic_video.generate_video(path, 640, 360, frames=6, noise=0)
+    return mask_var_picker.sample_frames([path], 3)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """The tuner's perf_counter, moved by hand."""
+    now = [0.0]
+    monkeypatch.setattr(mask_var_picker, 'perf_counter', lambda: now[0])
+    return now
+
+
+def counting_pipeline(tuner):
+    calls = []
+    pipeline_overlay = tuner.pipeline_overlay
+
+    def counted():
+        calls.append(tuner.trial_config())
+        return pipeline_overlay()
+    tuner.pipeline_overlay = counted
+    return calls
+
+
+def test_pipeline_runs_once_per_change_after_the_trackbars_settle(samples, clock, config):
+    tuner = mask_var_picker.ThresholdTuner(samples, preview_width=320, config=config)
+    calls = counting_pipeline(tuner)
+    assert len(samples) == 3
+
+    # The bounds mask is drawn at once; the full resolution analysis waits for the trackbars to settle
+    image = tuner.refresh()
+    assert image is not None and image.shape[1] == 2 * 320
+    assert not calls
+    assert tuner.refresh() is None
+    clock[0] += mask_var_picker.SETTLE_SECONDS
+    assert tuner.refresh() is not None
+    assert len(calls) == 1
+    # Nothing changed, nothing is recomputed
+    clock[0] += 10
+    assert tuner.refresh() is None
+    assert len(calls) == 1
+
+    tuner.set_bound('lower', 0, 10)
+    tuner.set_bound('upper', 2, 200)
+    assert tuner.refresh() is not None
+    assert len(calls) == 1
+    clock[0] += mask_var_picker.SETTLE_SECONDS
+    assert tuner.refresh() is not None
+    assert len(calls) == 2
+    assert calls[-1].lower_wave[0] == 10 and calls[-1].upper_wave[2] == 200
+    # The mask of the new bounds is shown, on the downscaled frame
+    small_hsv = tuner._previews[0][1]
+    lower, upper = np.array(tuner.lower), np.array(tuner.upper)
+    inside = np.all((small_hsv >= lower) & (small_hsv <= upper), axis=2)
+    np.testing.assert_array_equal(tuner.bounds_mask() > 0, inside)
+
+    tuner.set_sample(2)
+    clock[0] += mask_var_picker.SETTLE_SECONDS
+    assert tuner.refresh() is not None
+    assert len(calls) == 3
+    assert tuner.frame.shape == (360, 640, 3)
+    tuner.close()
+
+
+@pytest.mark.parametrize("label, names", [
+    (color_classifier.WAVE, ('LOWER_WAVE_COLOR', 'UPPER_WAVE_COLOR')),
+    (color_classifier.GRID, ('LOWER_GRID_COLOR', 'UPPER_GRID_COLOR')),
+])
+def test_save_writes_the_bounds_to_env_settings(samples, config, monkeypatch, label, names):
+    for name in names:
+        # Restored after the test, as save() changes the settings of the process
+        monkeypatch.setattr(env_vars.Env_Vars, name, getattr(env_vars.Env_Vars, name))
+    tuner = mask_var_picker.ThresholdTuner(samples, label, config=config)
+    for channel, value in enumerate((5, 6, 7)):
+        tuner.set_bound('lower', channel, value)
+        tuner.set_bound('upper', channel, value + 100)
+    tuner.save()
+
+    with open('env_settings.json') as file:
+        settings = json.load(file)
+    assert settings[names[0]] == [5, 6, 7]
+    assert settings[names[1]] == [105, 106, 107]
+    assert getattr(env_vars.Env_Vars, names[0]).tolist() == [5, 6, 7]
+    tuner.close()
@@ -0,0 +1,46 @@
+import numpy as np
+import parabola_fit
+
+
+def test_fit_parabola_matches_polyfit():
+    rng = np.random.default_rng(0)
+    # Full resolution pixel coordinates, where the x^4 sums are large
+    x = rng.uniform(200, 1700, 500)
+    y = 0.002 * (x - 900) ** 2 + 150 + rng.normal(0, 3, x.size)
+    fit = parabola_fit.fit_parabola(x, y)
+    a, b, c = np.polyfit(x, y, 2)
+    np.testing.assert_allclose([fit.a, fit.b, fit.c], [a, b, c], rtol=1e-6)
+    assert np.isclose(fit.vertex_x, -b / (2 * a))
+    assert np.isclose(fit.vertex_y, c - b * b / (4 * a))
+
+
+def test_fit_parabola_columns_matches_polyfit_of_every_pixel():
+    rng = np.random.default_rng(1)
+    mask = np.zeros((120, 300), np.uint8)
+    columns = np.arange(20, 280)
+    rows = np.clip(0.004 * (columns - 150) ** 2 + 10, 0, 115).astype(int)
+    for thickness in range(3):
+        mask[rows + thickness, columns] = 1
+    mask[rng.integers(0, 120, 40), rng.integers(20, 280, 40)] = 1
+    y, x = np.nonzero(mask)
+    counts = np.count_nonzero(mask, axis=0)
+    row_sums = (mask * np.arange(mask.shape[0])[:, None]).sum(axis=0)
+    fit = parabola_fit.fit_parabola_columns(np.arange(mask.shape[1]), counts, row_sums)
+    np.testing.assert_allclose([fit.a, fit.b, fit.c], np.polyfit(x, y, 2), rtol=1e-6)
+
+
+def test_fit_parabolas_matches_single_fits():
+    rng = np.random.default_rng(2)
+    point_sets = [(rng.uniform(0, 100, n), rng.uniform(0, 50, n)) for n in (3, 10, 200)]
+    point_sets.append((np.array([1.0, 1.0, 2.0]), np.array([0.0, 1.0, 2.0])))
+    for batch, (x, y) in zip(parabola_fit.fit_parabolas(point_sets), point_sets):
+        single = parabola_fit.fit_parabola(x, y)
+        if single is None:
+            assert batch is None
+        else:
+            np.testing.assert_allclose(batch[:3], single[:3], rtol=1e-9, atol=1e-12)
+
+
+def test_too_few_distinct_x_values_give_no_fit():
+    assert parabola_fit.fit_parabola([1, 2], [3, 4]) is None
+    assert parabola_fit.fit_parabola([5, 5, 5, 6], [1, 2, 3, 4]) is None
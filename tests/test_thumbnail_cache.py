@@ -0,0 +1,31 @@
+import time
+import synthetic_video
+import thumbnail_cache
+
+
+def poll_until_done(loader, timeout=10.0):
+    loaded = []
+    deadline = time.monotonic() + timeout
+    while loader.pending and time.monotonic() < deadline:
+        loaded.extend(loader.poll())
+        time.sleep(0.01)
+    return loaded
+
+
+def test_frame_loader_decodes_on_its_thread_and_caches(tmp_path):
+    path = str(tmp_path / 'screen.mp4')
+    synthetic_video.generate_video(path, 640, 360, frames=3, noise=0)
+    cache = thumbnail_cache.ThumbnailCache(str(tmp_path / 'cache'), capacity=4, height=120)
+    loader = thumbnail_cache.FrameLoader(cache)
+    loader.request(path)
+    loader.request(str(tmp_path / 'missing.mp4'))
+    (video, entry, error), (missing, missing_entry, missing_error) = poll_until_done(loader)
+    loader.stop()
+    assert (video, error) == (path, None)
+    info, frame = entry
+    assert (info.frames, info.width, info.height) == (3, 640, 360)
+    assert frame.shape == (120, 213, 3)
+    assert missing_entry is None and isinstance(missing_error, OSError)
+    # The frame is now cached, so it is found without decoding the video again
+    assert cache.get(path)[0] == info
+    assert loader.pending == 0
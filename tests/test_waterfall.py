@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import waterfall
+
+COLUMNS = 6
+
+
+def reduce_rows(rows):
+    """The reference overview level: the NaN-ignoring peak of every OVERVIEW_FACTOR rows, the last group partial."""
+    factor = waterfall.OVERVIEW_FACTOR
+    return np.stack([np.fmax.reduce(rows[start:start + factor], axis=0) for start in range(0, len(rows), factor)])
+
+
+def test_overview_levels_are_peaks_of_the_level_below(tmp_path):
+    rng = np.random.default_rng(0)
+    frames = 1100
+    spectra = rng.uniform(-90, -10, (frames, COLUMNS)).astype(np.float32)
+    spectra[rng.random(spectra.shape) < 0.2] = np.nan
+    writer = waterfall.WaterfallWriter(str(tmp_path / 'w'), np.arange(COLUMNS), frames, {}, flush_seconds=1e9)
+    # Frames 500 to 503 are never measured
+    measured = [index for index in range(frames) if not 500 <= index < 504]
+    for count, index in enumerate(measured):
+        writer.write_trace(index, spectra[index])
+        # Flushing at odd row counts reduces the overview in uneven steps
+        if count % 97 == 0:
+            writer.flush()
+    writer.close()
+
+    expected = spectra.copy()
+    expected[500:504] = np.nan
+    level = np.load(waterfall.level_path(str(tmp_path / 'w'), 0))
+    np.testing.assert_array_equal(level, expected)
+    # 1100 rows, then 275, then 69
+    assert len(waterfall.level_capacities(frames)) == 3
+    for index in range(1, 3):
+        expected = reduce_rows(expected)
+        level = np.load(waterfall.level_path(str(tmp_path / 'w'), index))
+        np.testing.assert_array_equal(level, expected)
+
+
+def test_reader_window_follows_the_levels(tmp_path):
+    frames = 300
+    spectra = np.arange(frames * COLUMNS, dtype=np.float32).reshape(frames, COLUMNS)
+    writer = waterfall.WaterfallWriter(str(tmp_path / 'w'), np.arange(COLUMNS), frames, {})
+    for index in range(frames):
+        writer.write_trace(index, spectra[index])
+    writer.close()
+    reader = waterfall.WaterfallReader(str(tmp_path / 'w'))
+    np.testing.assert_array_equal(reader.window(10, 20), spectra[10:20])
+    np.testing.assert_array_equal(reader.window(0, frames, 1), reduce_rows(spectra))
+    assert os.path.exists(tmp_path / 'w' / 'header.json')
+
+
+def test_image_reads_the_level_that_fits_and_colors_by_amplitude(tmp_path):
+    frames = 300
+    writer = waterfall.WaterfallWriter(str(tmp_path / 'capture_waterfall'), np.arange(COLUMNS), frames, {})
+    for index in range(frames):
+        # Frames 100 to 149 have no trace
+        if not 100 <= index < 150:
+            writer.write_trace(index, np.full(COLUMNS, -100 + index / 5, np.float32))
+    writer.close()
+    (directory,) = waterfall.list_waterfalls(str(tmp_path))
+    reader = waterfall.WaterfallReader(directory)
+
+    image = reader.image(0, frames, 60, 100)
+    assert image.shape == (100, 60, 3) and image.dtype == np.uint8
+    assert reader.level_for(frames, 100) == 1
+    brightness = image.astype(int).sum(axis=2)[:, 0]
+    # Amplitude grows with time, and so does the brightness of the colormap; missing frames are black
+    assert brightness[5] < brightness[20] < brightness[95]
+    assert not image[40:45].any()
+    # A window past the end keeps its scale, black below the last frame
+    tail = reader.image(250, 100, 60, 100)
+    assert tail[:45].any() and not tail[55:].any()
+
+
+def test_list_waterfalls_skips_other_outputs(tmp_path):
+    os.makedirs(tmp_path / 'a_trace')
+    os.makedirs(tmp_path / 'b_waterfall')
+    assert waterfall.list_waterfalls(str(tmp_path)) == []
+    assert waterfall.list_waterfalls(str(tmp_path / 'missing')) == []
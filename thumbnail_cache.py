@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict, namedtuple
+import cv2
+import env_vars
+
+# ===================================
+#  Thumbnails and lengths of the videos in the video folder
+# ===================================
+# Decoding a frame of every video each time the GUI lists the folder is slow on a network share, so the first
+# frame of each video is saved once as a small JPEG with the video's length next to it, in THUMBNAIL_DIRECTORY.
+# Entries are keyed by the path, size and modification time of the video, so a replaced video gets a new
+# thumbnail. The last THUMBNAIL_CACHE_SIZE thumbnails used are also kept in memory.
+#
+#     loader = thumbnail_cache.ThumbnailLoader(cache, folder)   # lists and fills the cache on a thread
+#     listing, loaded = loader.poll()                           # from the Tk main loop
+#     frames = thumbnail_cache.FrameLoader(display_cache)       # loads the videos asked for on a thread
+#     frames.request(path); loaded = frames.poll()              # from the Tk main loop
+
+THUMBNAIL_DIRECTORY = os.path.join('Completed', 'thumbnails')
+
+# Length and frame size of a video, from its container header; frames and fps are 0 when unknown
+VideoInfo = namedtuple("VideoInfo", ["path", "frames", "fps", "width", "height"])
+
+
+def duration(info):
+    """Length of the video in seconds, or None when its frame count or rate is unknown."""
+    return info.frames / info.fps if info.frames > 0 and info.fps > 0 else None
+
+
+def list_videos(folder):
+    """(path, os.stat_result) of every .mp4 in folder, by name, from a single directory scan."""
+    with os.scandir(folder) as entries:
+        videos = [(entry.path, entry.stat()) for entry in entries if entry.name.endswith('.mp4') and entry.is_file()]
+    return sorted(videos, key=lambda video: os.path.basename(video[0]))
+
+
+class ThumbnailCache:
+    """Thumbnails (BGR images THUMBNAIL_HEIGHT pixels high) and VideoInfo of videos, on disk and in memory.
+
+    Safe to share between the GUI thread and a ThumbnailLoader.
+    """
+
+    def __init__(self, directory=THUMBNAIL_DIRECTORY, capacity=None, height=None):
+        self.directory = directory
+        self.capacity = max(int(capacity if capacity is not None else env_vars.Env_Vars.THUMBNAIL_CACHE_SIZE), 1)
+        self.height = int(height if height is not None else env_vars.Env_Vars.THUMBNAIL_HEIGHT)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, path, stat):
+        """Name of the cache entry of the video at path with the given os.stat_result."""
+        identity = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{self.height}"
+        return hashlib.sha1(identity.encode()).hexdigest()
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.capacity:
+                self._memory.popitem(last=False)
+
+    def get(self, path, stat=None):
+        """(VideoInfo, thumbnail) from memory or disk without decoding the video, or None if it is not cached."""
+        stat = stat if stat is not None else os.stat(path)
+        key = self.key(path, stat)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+        entry = self._read(key, path)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def info(self, path, stat=None):
+        """VideoInfo of a video from memory or disk without reading its thumbnail, or None if it is not cached."""
+        stat = stat if stat is not None else os.stat(path)
+        key = self.key(path, stat)
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            return entry[0]
+        entry = self._read(key, path, thumbnail=False)
+        return entry[0] if entry is not None else None
+
+    def load(self, path, stat=None):
+        """(VideoInfo, thumbnail) of a video, decoding its first frame only if it is not cached.
+
+        The thumbnail is None if the video has no readable frame.
+        """
+        stat = stat if stat is not None else os.stat(path)
+        entry = self.get(path, stat)
+        if entry is None:
+            entry = self._decode(path)
+            self._write(self.key(path, stat), entry)
+            self._remember(self.key(path, stat), entry)
+        return entry
+
+    def _read(self, key, path, thumbnail=True):
+        base = os.path.join(self.directory, key)
+        try:
+            with open(base + '.json', 'r') as file:
+                fields = json.load(file)
+        except (OSError, ValueError):
+            return None
+        info = VideoInfo(path, fields['frames'], fields['fps'], fields['width'], fields['height'])
+        if not thumbnail:
+            return info, None
+        thumbnail = cv2.imread(base + '.jpg') if fields.get('thumbnail') else None
+        if fields.get('thumbnail') and thumbnail is None:
+            return None
+        return info, thumbnail
+
+    def _decode(self, path):
+        cap = cv2.VideoCapture(path)
+        try:
+            info = VideoInfo(path, max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0), cap.get(cv2.CAP_PROP_FPS),
+                             int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            ret, frame = cap.read() if cap.isOpened() else (False, None)
+        finally:
+            cap.release()
+        if not ret:
+            return info, None
+        width = max(int(round(frame.shape[1] * self.height / frame.shape[0])), 1)
+        return info, cv2.resize(frame, (width, self.height), interpolation=cv2.INTER_AREA)
+
+    def _write(self, key, entry):
+        info, thumbnail = entry
+        base = os.path.join(self.directory, key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # The image goes first and the entry is renamed into place last, so an entry is always complete
+            if thumbnail is not None:
+                cv2.imwrite(base + '.tmp.jpg', thumbnail)
+                os.replace(base + '.tmp.jpg', base + '.jpg')
+            with open(base + '.json.tmp', 'w') as file:
+                json.dump({'video': os.path.basename(info.path), 'frames': info.frames, 'fps': info.fps,
+                           'width': info.width, 'height': info.height, 'thumbnail': thumbnail is not None}, file)
+            os.replace(base + '.json.tmp', base + '.json')
+        except OSError:
+            # A read-only cache directory only costs decoding the video again next time
+            pass
+
+
+class ThumbnailLoader:
+    """Lists a video folder and loads every video's thumbnail through a ThumbnailCache on a background thread.
+
+    poll() returns what is ready without blocking, so it can be called from the Tk main loop.
+    """
+
+    def __init__(self, cache, folder):
+        self.cache = cache
+        self.folder = folder
+        self._results = queue.Queue()
+        self._stop = threading.Event()
+        # Set by poll() once every video of the folder was loaded
+        self.finished = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            videos = list_videos(self.folder)
+        except OSError:
+            videos = []
+        self._results.put(('listing', [path for path, _ in videos]))
+        for path, stat in videos:
+            if self._stop.is_set():
+                return
+            try:
+                info, thumbnail = self.cache.load(path, stat)
+            except OSError:
+                continue
+            self._results.put(('video', (info, thumbnail)))
+        self._results.put(('finished', None))
+
+    def poll(self):
+        """(paths of the folder's videos once listed, else None; [(VideoInfo, thumbnail)] loaded since last poll)."""
+        listing = None
+        loaded = []
+        while True:
+            try:
+                kind, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'listing':
+                listing = value
+            elif kind == 'video':
+                loaded.append(value)
+            else:
+                self.finished = True
+        return listing, loaded
+
+    def stop(self):
+        """Stop loading after the current video."""
+        self._stop.set()
+
+
+class FrameLoader:
+    """Loads the entries of a ThumbnailCache for the videos asked for, in order, on a background thread.
+
+    request() and poll() never block, so they can be called from the Tk main loop.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        # Requests whose result poll() has not returned yet
+        self.pending = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            path = self._requests.get()
+            if path is None:
+                return
+            try:
+                self._results.put((path, self.cache.load(path), None))
+            except OSError as e:
+                self._results.put((path, None, e))
+
+    def request(self, path):
+        """Load the (VideoInfo, thumbnail) entry of the video at path."""
+        self.pending += 1
+        self._requests.put(path)
+
+    def poll(self):
+        """[(path, entry or None, OSError or None)] of the requests loaded since the last poll."""
+        loaded = []
+        while True:
+            try:
+                loaded.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        self.pending -= len(loaded)
+        return loaded
+
+    def stop(self):
+        """Stop after the requests already made."""
+        self._requests.put(None)
@@ -1,17 +1,25 @@
+import logging
 import cv2
 import numpy as np
-from scipy.optimize import curve_fit
-import env_vars
+import analysis_config
+import color_classifier
+import profiler
+import wave_trace
+
+logger = logging.getLogger(__name__)
+# Per-frame detail, sampled every FRAME_LOG_INTERVAL frames by the caller
+frame_logger = logging.getLogger('frames')
 
 
 class Utilities:
     """Utility functions for the spectrum analyzer."""
+    def grid_mask(frame, config=None):
+        """Binary mask of the grid colored pixels, with specks removed."""
+        mask = Utilities.color_mask(frame, color_classifier.GRID, config)
+        return cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
+
     def findGrid(frame):
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        mask = cv2.inRange(
-            hsv, env_vars.Env_Vars.LOWER_GRID_COLOR, env_vars.Env_Vars.UPPER_GRID_COLOR
-        )
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
+        mask = Utilities.grid_mask(frame)
         green_grid = cv2.bitwise_and(frame, frame, mask=mask)
         gray = cv2.cvtColor(green_grid, cv2.COLOR_BGR2GRAY)
         low_threshold = 10
@@ -25,14 +33,20 @@ class Utilities:
     
     def getAmplitude(px_value, dbPerHLine, gridheight): 
         dbPxHeight = (gridheight)/(dbPerHLine*10)
+        return Utilities.amplitude_at(px_value, dbPxHeight)
+
+    def amplitude_at(px_value, dbPxHeight):
+        """getAmplitude with the pixels per dB already computed (AnalysisConfig.px_per_db)."""
         wave_amplitude = px_value/dbPxHeight
         return wave_amplitude
     
     def getCenterFreq(center_freq_px, span, center, gridwidth, center_x): 
         
         hzPxWidth = gridwidth/(span) # get width of 1HZ
-        print(f"center_x: {center_x} px")
-        print(f"center_freq_px: {center_freq_px} px")
+        return Utilities.frequency_at(center_freq_px, center, hzPxWidth, center_x)
+
+    def frequency_at(center_freq_px, center, hzPxWidth, center_x):
+        """getCenterFreq with the pixels per Hz already computed (AnalysisConfig.px_per_hz)."""
         deviation_px = center_x - center_freq_px # get the deviation of the center frequency pixel value from the center line's x value
         center_freq = center+(deviation_px/hzPxWidth)*0.001 # convert the deviation in pixels to HZ and add to the center (eg 1GHZ) to find center frequency
         return center_freq
@@ -49,40 +63,66 @@ class Utilities:
         mask = cv2.inRange(hsv, lower_bound, upper_bound)
         return mask
 
+    def color_mask(frame, label, config=None):
+        """Mask of the wave (color_classifier.WAVE) or grid (GRID) colored pixels, using the config's classifier.
+
+        config is the AnalysisConfig to use, by default analysis_config.current().
+        """
+        config = config if config is not None else analysis_config.current()
+        if config.color_classifier == 'lut':
+            return color_classifier.current(config).mask(frame, label)
+        return Utilities.apply_color_filter(frame, *color_classifier.bounds(label, config))
+
     def find_largest_contour(mask):
         """Find and return the largest contour in a given binary mask."""
         contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
         return max(contours, key=cv2.contourArea) if contours else None
 
-    def find_wave(frame):
+    def find_wave(frame, points=True, color_mask=None, config=None):
+        """Find and process the wave within a video frame, with the mask engine of the AnalysisConfig.
+
+        With points=False the (rows, columns) of the mask pixels are not listed and None is returned in their place.
+        color_mask is the wave color mask of the frame, if the caller already has it.
+        config is the AnalysisConfig to use, by default analysis_config.current().
+        """
+        config = config if config is not None else analysis_config.current()
+        if config.mask_engine == 'external':
+            return Utilities.find_wave_external(frame, points, color_mask, config)
+        if config.mask_engine == 'compare':
+            return Utilities.compare_mask_engines(frame, points, color_mask, config)
+        return Utilities.find_wave_contour(frame, points, color_mask, config)
+
+    def find_wave_contour(frame, points=True, color_mask=None, config=None):
         """Find and process the wave within a video frame."""
-        mask = Utilities.apply_color_filter(
-            frame,
-            env_vars.Env_Vars.LOWER_WAVE_COLOR,
-            env_vars.Env_Vars.UPPER_WAVE_COLOR,
-        )
-        largest_contour = Utilities.find_largest_contour(mask)
+        config = config if config is not None else analysis_config.current()
+        mask = color_mask
+        if mask is None:
+            with profiler.stage('color_filter'):
+                mask = Utilities.color_mask(frame, color_classifier.WAVE, config)
+        with profiler.stage('contour'):
+            largest_contour = Utilities.find_largest_contour(mask)
 
         # Check if the largest contour is not None and has a size greater than 0
         if largest_contour is not None and largest_contour.size > 0:
             mask = np.zeros_like(mask)
             cv2.drawContours(mask, [largest_contour], -1, (255), thickness=cv2.FILLED)
 
-            # Check if KERNEL_SIZE is a NumPy array and raise an error if not
-            if not isinstance(env_vars.Env_Vars.KERNEL_SIZE, np.ndarray): 
-                raise TypeError("KERNEL_SIZE must be a numpy array") 
-
             # Connect nearby contours by dilating and then eroding
-            mask = cv2.dilate(
-                mask,
-                env_vars.Env_Vars.KERNEL_SIZE,
-                iterations=env_vars.Env_Vars.DILATE_ITERATIONS,
-            )
-            mask = cv2.erode(
-                mask,
-                env_vars.Env_Vars.KERNEL_SIZE,
-                iterations=env_vars.Env_Vars.ERODE_ITERATIONS,
-            )
+            with profiler.stage('morphology'):
+                mask = cv2.dilate(
+                    mask,
+                    config.kernel,
+                    iterations=config.dilate_iterations,
+                )
+                mask = cv2.erode(
+                    mask,
+                    config.kernel,
+                    iterations=config.erode_iterations,
+                )
+        else:
+            # No wave on this frame, there is nothing to measure
+            return mask, np.where(mask) if points else None, None, None, None, None
+
         # find the leftmost point of the mask 
         leftmost_x = None
         rightmost_x = None
@@ -98,34 +138,122 @@ class Utilities:
         
         center_x = (rightmost_x+leftmost_x)/2
         mask_width = rightmost_x-leftmost_x
-        return mask, np.where(mask), leftmost_x, leftmost_y, center_x, mask_width
+        wave_points = None
+        if points:
+            with profiler.stage('nonzero'):
+                wave_points = np.where(mask)
+        return mask, wave_points, leftmost_x, leftmost_y, center_x, mask_width
+
+    def find_wave_external(frame, points=True, color_mask=None, config=None):
+        """Same results as find_wave_contour, with less work per frame.
+
+        Only outer contours are traced (a hole is never larger than the blob around it), the dilation and
+        erosion iterations each run as one pass of the equivalent kernel, and the mask is only filled,
+        dilated, eroded and scanned inside the bounding box of the blob plus the reach of the morphology.
+        """
+        config = config if config is not None else analysis_config.current()
+        mask = color_mask
+        if mask is None:
+            with profiler.stage('color_filter'):
+                mask = Utilities.color_mask(frame, color_classifier.WAVE, config)
+        with profiler.stage('contour'):
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            largest_contour = max(contours, key=cv2.contourArea) if contours else None
+
+        if largest_contour is None or largest_contour.size == 0:
+            # No wave on this frame, there is nothing to measure
+            return mask, np.where(mask) if points else None, None, None, None, None
+
+        dilate_kernel, dilate_iterations = config.dilate_kernel, config.dilate_passes
+        erode_kernel, erode_iterations = config.erode_kernel, config.erode_passes
+
+        # Pixels further than the dilation reach from the blob stay empty, so nothing outside this box changes
+        reach_y = reach_x = 1
+        for morph_kernel, iterations in ((dilate_kernel, dilate_iterations), (erode_kernel, erode_iterations)):
+            if morph_kernel is not None:
+                reach_y += morph_kernel.shape[0] * iterations
+                reach_x += morph_kernel.shape[1] * iterations
+        x, y, w, h = cv2.boundingRect(largest_contour)
+        x0, y0 = max(x - reach_x, 0), max(y - reach_y, 0)
+        x1, y1 = min(x + w + reach_x, mask.shape[1]), min(y + h + reach_y, mask.shape[0])
+
+        with profiler.stage('morphology'):
+            blob = np.zeros((y1 - y0, x1 - x0), np.uint8)
+            cv2.drawContours(blob, [largest_contour], -1, (255), thickness=cv2.FILLED, offset=(-x0, -y0))
+            if dilate_kernel is not None:
+                blob = cv2.dilate(blob, dilate_kernel, iterations=dilate_iterations)
+            if erode_kernel is not None:
+                blob = cv2.erode(blob, erode_kernel, iterations=erode_iterations)
+            mask = np.zeros_like(mask)
+            mask[y0:y1, x0:x1] = blob
+
+        # Leftmost point (the first one in contour order) and rightmost x of the blob
+        contour_points = largest_contour[:, 0, :]
+        leftmost_index = np.argmin(contour_points[:, 0])
+        leftmost_x, leftmost_y = contour_points[leftmost_index]
+        rightmost_x = contour_points[:, 0].max()
+
+        center_x = (rightmost_x+leftmost_x)/2
+        mask_width = rightmost_x-leftmost_x
+        if not points:
+            return mask, None, leftmost_x, leftmost_y, center_x, mask_width
+        with profiler.stage('nonzero'):
+            wave_y, wave_x = np.nonzero(blob)
+        return mask, (wave_y + y0, wave_x + x0), leftmost_x, leftmost_y, center_x, mask_width
+
+    def compare_mask_engines(frame, points=True, color_mask=None, config=None):
+        """Run both mask engines on the frame, log any difference and return the find_wave_contour results."""
+        reference = Utilities.find_wave_contour(frame, points, color_mask, config)
+        candidate = Utilities.find_wave_external(frame, points, color_mask, config)
+        names = ('mask', 'wave points', 'leftmost_x', 'leftmost_y', 'center_x', 'mask_width')
+        for name, expected, actual in zip(names, reference, candidate):
+            if name == 'wave points' and points:
+                same = all(np.array_equal(a, b) for a, b in zip(expected, actual))
+            else:
+                same = np.array_equal(expected, actual) if expected is not None else actual is None
+            if not same:
+                logger.warning("Mask engines differ on %s: contour %s, external %s", name, expected, actual)
+        return reference
 
     def process_wave(frame, mask, span, center, dbPerHLine, gridheight, wave_x, wave_y, initial_x, leftmost_y, initial_y, gridwidth, center_x):
         """Analyze and extract wave characteristics."""
-        print(f"wave_x: {wave_x} px")
-        print(f"wave_y: {wave_y} px")
-        if len(wave_x) > 0 and len(wave_y) > 0:
-            # Fit the points to a parabola
-            params, _ = curve_fit(Utilities.parabola, wave_x, wave_y)
+        # Skip frames without a wave (or before a baseline was found) instead of aborting the video
+        if leftmost_y is None or initial_y is None:
+            return None
+        trace = wave_trace.from_points(wave_x, wave_y)
+        return Utilities.process_trace(trace, span, center, dbPerHLine, gridheight, leftmost_y, initial_y, gridwidth,
+                                       center_x)
+
+    def process_trace(trace, span, center, dbPerHLine, gridheight, leftmost_y, initial_y, gridwidth, center_x):
+        """process_wave from the wave_trace.ColumnTrace of the mask instead of a list of its pixels."""
+        return Utilities.measure_trace(trace, center, gridwidth/(span), (gridheight)/(dbPerHLine*10), leftmost_y,
+                                       initial_y, center_x)
 
-        # Extract the coefficients of the fitted parabola
-        a, b, c = params
+    def measure_trace(trace, center, hzPxWidth, dbPxHeight, leftmost_y, initial_y, center_x):
+        """process_trace with the pixels per Hz and per dB of the grid already computed."""
+        if leftmost_y is None or initial_y is None:
+            return None
 
-       
+        # Fit the mask pixels to a parabola (closed-form least squares, from the per-column sums)
+        with profiler.stage('parabola_fit'):
+            fit = wave_trace.fit(trace)
+        if fit is None or not np.isfinite(fit.vertex_x):
+            return None
 
         if(leftmost_y < (initial_y+initial_y*0.1)):
-             # Calculate center frequency using vertex formula (-b / 2a)
-            center_freq_px = -b/ (2 * a)  # x coorinate of the vertex of the wave
+            # Calculate center frequency using vertex formula (-b / 2a)
+            center_freq_px = fit.vertex_x  # x coorinate of the vertex of the wave
             
-            center_freq = Utilities.getCenterFreq(center_freq_px, span, center, gridwidth, center_x)
-            mask_height = Utilities.get_mask_height(mask, initial_y) #pixel height of the mask
-            amplitude = Utilities.getAmplitude(mask_height, dbPerHLine, gridheight)
+            center_freq = Utilities.frequency_at(center_freq_px, center, hzPxWidth, center_x)
+            # pixel height of the mask; the trace rows are frame coordinates, even when the mask is cropped
+            mask_height = initial_y - wave_trace.peak_row(trace) + 1
+            amplitude = Utilities.amplitude_at(mask_height, dbPxHeight)
             return center_freq, amplitude
 
 
     def get_mask_height(mask, initial_y):
         # Find the row indices of non-zero pixels in the mask
-        non_zero_rows = np.where(mask)[0]
+        non_zero_rows = np.flatnonzero(np.count_nonzero(mask, axis=1))
 
         if non_zero_rows.size > 0:
             # Calculate the minimum and maximum row indices to find the height
@@ -140,14 +268,13 @@ class Utilities:
             # If there are no non-zero pixels, return 0 as the height
             return 0
 
-    def print_wave_characteristics(min_amplitude, max_amplitude, center_freq, frame_number, fps, gridheight):
-        """Print extracted wave characteristics."""
+    def log_wave_characteristics(min_amplitude, max_amplitude, center_freq, frame_number, fps, gridheight):
+        """Log extracted wave characteristics of one frame."""
         timestamp = frame_number / fps
         # center_freq, min_amplitude, max_amplitude, center_amplitude = result
         center_amplitude = (max_amplitude + min_amplitude)/2
-        print(f"Timestamp: {timestamp} seconds")
-        print(f"Gridheight: {gridheight} px")
-        print(f"Center Frequency: {center_freq} GHZ")
-        print(f"Minimum Amplitude: {min_amplitude} dB")
-        print(f"Maximum Amplitude: {max_amplitude} dB")
-        print(f"Center Amplitude: {center_amplitude} dB\n")
+        frame_logger.info(
+            "Frame %d: timestamp %.3f s, grid height %s px, center frequency %s GHZ, "
+            "minimum amplitude %s dB, maximum amplitude %s dB, center amplitude %s dB",
+            frame_number, timestamp, gridheight, center_freq, min_amplitude, max_amplitude, center_amplitude,
+        )
@@ -0,0 +1,271 @@
+import json
+import logging
+import os
+from time import perf_counter
+import cv2
+import numpy as np
+import binary_output
+
+logger = logging.getLogger(__name__)
+
+# ===================================
+#  Waterfall (time x frequency) output
+# ===================================
+# waterfall.npy holds one row per frame of the video (row i is frame i) and one column per grid column,
+# preallocated for the whole video and written in place, so a capture of any length never has to fit in RAM.
+# overview_<k>.npy are coarser copies for zoomed-out views: each of their rows is the maximum (a peak hold)
+# of OVERVIEW_FACTOR consecutive rows of the level below, built while the video is analyzed.
+# header.json is rewritten on every flush, so a reader can follow a waterfall that is still being written.
+#
+#     reader = waterfall.WaterfallReader('Completed/<video>_waterfall')
+#     level = reader.level_for(frames, 800)
+#     rows = reader.to_db(reader.window(start, start + frames, level))
+#     image = reader.image(start, frames, 640, 400)   # what the GUI's waterfall page shows
+
+# Rows of an overview level are the maximum of OVERVIEW_FACTOR consecutive rows of the level below
+OVERVIEW_FACTOR = 4
+# Overview levels are added until the coarsest one has at most this many rows
+OVERVIEW_MIN_ROWS = 256
+# Value of frames without a trace in a uint8 waterfall; float32 waterfalls use NaN
+MISSING_CODE = 0
+
+DTYPES = ('float32', 'uint8')
+
+
+def level_path(directory, level):
+    return os.path.join(directory, 'waterfall.npy' if level == 0 else f'overview_{level}.npy')
+
+
+def list_waterfalls(folder):
+    """Directories of the waterfalls in folder, finished or still being written, by name."""
+    try:
+        with os.scandir(folder) as entries:
+            directories = [entry.path for entry in entries if entry.is_dir() and entry.name.endswith('_waterfall')
+                           and os.path.exists(os.path.join(entry.path, 'header.json'))]
+    except OSError:
+        return []
+    return sorted(directories, key=os.path.basename)
+
+
+def level_capacities(capacity):
+    """Rows of the full resolution waterfall and of each overview level, for a video of capacity frames."""
+    capacities = [capacity]
+    while capacities[-1] > OVERVIEW_MIN_ROWS:
+        capacities.append(-(-capacities[-1] // OVERVIEW_FACTOR))
+    return capacities
+
+
+class WaterfallWriter:
+    """Writes the calibrated trace of every measured frame into a preallocated, memory-mapped waterfall.
+
+    dtype 'float32' stores the amplitude in dB (NaN where there is no trace). 'uint8' stores the trace height in
+    steps of a whole number of pixels, 1 being the bottom of amplitude_range = (low dB, high dB, dB per pixel)
+    and 0 meaning no trace; the header holds the scale and offset that convert it back to dB.
+    Has the same write_trace/flush/checkpoint/close interface as binary_output.TraceWriter.
+    """
+    name = 'waterfall'
+
+    def __init__(self, directory, frequencies, frame_count, settings, dtype='float32', amplitude_range=None,
+                 flush_seconds=5.0, resume=None):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown waterfall dtype {dtype!r}, expected one of {DTYPES}.")
+        self.directory = directory
+        self.settings = settings
+        self.flush_seconds = flush_seconds
+        self.dtype = np.dtype(dtype)
+        os.makedirs(directory, exist_ok=True)
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        np.save(os.path.join(directory, 'frequencies.npy'), frequencies)
+        self.columns = frequencies.size
+
+        if self.dtype == np.uint8:
+            low, high, db_per_pixel = amplitude_range
+            pixels = int(round((high - low) / db_per_pixel)) + 1
+            self.scale = db_per_pixel * max(1, -(-pixels // 255))
+            self.offset = low - self.scale
+            self.missing = MISSING_CODE
+        else:
+            self.scale, self.offset, self.missing = 1.0, 0.0, np.nan
+
+        # Every frame before self.rows has its final value; a resumed run continues after them
+        self.rows = resume['rows'] if resume is not None else 0
+        self._levels = []
+        # Finished rows of each overview level
+        self._done = []
+        self._overview_rows = []
+        self._add_levels(max(frame_count, self.rows, 1), resume is not None)
+        self._closed = False
+        self._last_flush = perf_counter()
+
+    def _add_levels(self, capacity, resume=False):
+        """Make room for capacity frames, adding overview levels if the waterfall got longer."""
+        for level, level_capacity in enumerate(level_capacities(capacity)):
+            if level < len(self._levels):
+                self._levels[level].grow(level_capacity)
+                continue
+            self._levels.append(binary_output.MappedNpy(level_path(self.directory, level), self.dtype, self.columns,
+                                                        level_capacity, resume))
+            if level == 0:
+                done = self.rows
+            elif resume:
+                # The checkpoint flushed every finished group of rows into the level above
+                done = self._done[-1] // OVERVIEW_FACTOR
+            else:
+                # A level added while running is built from the start
+                done = 0
+            self._done.append(done)
+            if level > 0:
+                self._overview_rows.append(done)
+
+    def _encode(self, spectrum):
+        if self.dtype != np.uint8:
+            return spectrum
+        codes = np.clip(np.rint((spectrum - self.offset) / self.scale), 1, 255)
+        return np.where(np.isnan(spectrum), MISSING_CODE, codes).astype(np.uint8)
+
+    def write_trace(self, frame_index, spectrum):
+        """Store the trace of frame_index; frames skipped since the previous call are marked as having no trace."""
+        if frame_index >= self._levels[0].capacity:
+            # The frame count reported by the container can be short
+            self._add_levels(max(frame_index + 1, 2 * self._levels[0].capacity))
+        rows = self._levels[0].array
+        rows[self.rows:frame_index] = self.missing
+        rows[frame_index] = self._encode(spectrum)
+        self.rows = frame_index + 1
+        if perf_counter() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def _update_overview(self, final=False):
+        """Reduce the newly finished rows of every level into the level above it.
+
+        With final, the last partial group of rows of each level is reduced as well.
+        """
+        below = self.rows
+        for level in range(1, len(self._levels)):
+            source = self._levels[level - 1].array
+            target = self._levels[level].array
+            start, complete = self._done[level], below // OVERVIEW_FACTOR
+            if complete > start:
+                groups = source[start * OVERVIEW_FACTOR:complete * OVERVIEW_FACTOR]
+                # fmax ignores NaN, so a group keeps its trace unless none of its frames had one
+                target[start:complete] = np.fmax.reduce(groups.reshape(complete - start, OVERVIEW_FACTOR, -1), axis=1)
+                self._done[level] = complete
+            if final and below > complete * OVERVIEW_FACTOR:
+                target[complete] = np.fmax.reduce(source[complete * OVERVIEW_FACTOR:below], axis=0)
+                below = complete + 1
+            else:
+                below = complete
+            self._overview_rows[level - 1] = below
+
+    def _write_header(self, complete=False):
+        header = dict(self.settings)
+        header.update({
+            'dtype': self.dtype.name,
+            'columns': self.columns,
+            'rows': self.rows,
+            'scale': self.scale,
+            'offset': self.offset,
+            'missing': None if self.dtype != np.uint8 else MISSING_CODE,
+            'overview_factor': OVERVIEW_FACTOR,
+            'overview_rows': list(self._overview_rows),
+            'complete': complete,
+        })
+        # Write then rename, so a reader never sees a half-written header
+        path = os.path.join(self.directory, 'header.json')
+        with open(path + '.tmp', 'w') as file:
+            json.dump(header, file)
+        os.replace(path + '.tmp', path)
+
+    def flush(self):
+        self._update_overview()
+        for level in self._levels:
+            level.flush()
+        self._write_header()
+        self._last_flush = perf_counter()
+
+    def checkpoint(self):
+        """Flush and return the state needed to resume writing after the frames written so far."""
+        self.flush()
+        return {'rows': self.rows}
+
+    def close(self):
+        """Finish the overview levels and cut every file down to the frames actually written."""
+        if self._closed:
+            return
+        self._closed = True
+        self._update_overview(final=True)
+        for level, rows in zip(self._levels, [self.rows] + self._overview_rows):
+            level.finish(rows)
+        self._write_header(complete=True)
+        logger.info("Waterfall output created successfully: %s", self.directory)
+
+
+class WaterfallReader:
+    """Read-only view of a WaterfallWriter output that never copies it into memory.
+
+    Works on a waterfall that is still being written; refresh() picks up the rows written since.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.frequencies = np.load(os.path.join(directory, 'frequencies.npy'))
+        self.refresh()
+
+    def refresh(self):
+        """Reload the header and remap the files."""
+        with open(os.path.join(self.directory, 'header.json'), 'r') as file:
+            self.header = json.load(file)
+        self.level_rows = [self.header['rows']] + self.header['overview_rows']
+        self._levels = [np.load(level_path(self.directory, level), mmap_mode='r')
+                        for level in range(len(self.level_rows))]
+
+    @property
+    def rows(self):
+        """Number of frames in the waterfall."""
+        return self.level_rows[0]
+
+    def level_for(self, frames, max_rows):
+        """Finest level that shows a window of frames frames in at most max_rows rows (or the coarsest level)."""
+        level = 0
+        while level + 1 < len(self.level_rows) and frames > max_rows * OVERVIEW_FACTOR ** level:
+            level += 1
+        return level
+
+    def window(self, start_frame, end_frame, level=0):
+        """Rows of level covering frames [start_frame, end_frame), as a read-only memory-mapped view.
+
+        Row r of level k covers frames [r * OVERVIEW_FACTOR**k, (r + 1) * OVERVIEW_FACTOR**k).
+        """
+        factor = OVERVIEW_FACTOR ** level
+        first = max(start_frame, 0) // factor
+        last = min(-(-end_frame // factor), self.level_rows[level])
+        return self._levels[level][first:max(first, last)]
+
+    def to_db(self, rows):
+        """Amplitude in dB of rows read from the waterfall, NaN where there was no trace."""
+        if self.header['dtype'] != 'uint8':
+            return rows
+        decoded = self.header['offset'] + self.header['scale'] * rows.astype(np.float32)
+        decoded[rows == MISSING_CODE] = np.nan
+        return decoded
+
+    def image(self, start_frame, frames, width, height, db_range=None):
+        """BGR image (height x width) of frames [start_frame, start_frame + frames), time going down.
+
+        Only the rows of the finest level that fits the window in height rows are read. Colors span db_range
+        (low dB, high dB), by default the range of the window; frames without a trace are black.
+        """
+        level = self.level_for(frames, height)
+        rows = np.asarray(self.to_db(self.window(start_frame, start_frame + frames, level)), dtype=np.float32)
+        # A window past the last frame written keeps its scale, with the missing rows left black
+        expected = max(-(-frames // OVERVIEW_FACTOR ** level), 1)
+        if rows.shape[0] < expected:
+            rows = np.vstack([rows, np.full((expected - rows.shape[0], self.frequencies.size), np.nan, np.float32)])
+        found = np.isfinite(rows)
+        if db_range is None:
+            db_range = (rows[found].min(), rows[found].max()) if found.any() else (0.0, 1.0)
+        low, high = db_range
+        levels = np.clip((rows - low) * (255 / max(high - low, 1e-6)), 0, 255)
+        image = cv2.applyColorMap(np.where(found, levels, 0).astype(np.uint8), cv2.COLORMAP_INFERNO)
+        image[~found] = 0
+        return cv2.resize(image, (width, height), interpolation=cv2.INTER_NEAREST)
@@ -0,0 +1,75 @@
+import numpy as np
+from collections import namedtuple
+import parabola_fit
+
+# Column profile of a wave mask, in frame coordinates. Column i is frame column x_offset + i:
+#   top       first (highest) row of the mask in the column, -1 if the column is empty
+#   counts    number of mask pixels in the column
+#   row_sums  sum of the row indices of those pixels
+# top is the trace drawn on the screen; counts and row_sums are enough to fit every mask pixel exactly.
+ColumnTrace = namedtuple("ColumnTrace", ["x_offset", "top", "counts", "row_sums"])
+
+EMPTY_TRACE = ColumnTrace(0, np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float64))
+
+
+def extract(mask, x_offset=0, y_offset=0):
+    """ColumnTrace of a 0/255 mask whose top-left pixel is at (x_offset, y_offset) in the frame.
+
+    Only the columns between the first and last occupied ones are kept.
+    """
+    counts = np.count_nonzero(mask, axis=0)
+    occupied = np.flatnonzero(counts)
+    if occupied.size == 0:
+        return EMPTY_TRACE
+    first, last = occupied[0], occupied[-1] + 1
+    region = mask[:, first:last]
+    counts = counts[first:last]
+
+    # argmax returns the first row holding the column maximum, which is the top edge of the mask
+    top = np.argmax(region, axis=0).astype(np.int64) + y_offset
+    top[counts == 0] = -1
+    # Row index sums as one matrix-vector product; exact in float64 (the mask holds 255, hence the division)
+    row_sums = np.arange(region.shape[0], dtype=np.float64) @ region / 255 + counts * y_offset
+    return ColumnTrace(x_offset + int(first), top, counts, row_sums)
+
+
+def from_points(wave_x, wave_y):
+    """ColumnTrace of the mask pixels listed as (wave_x, wave_y), as returned by np.where(mask)."""
+    wave_x = np.asarray(wave_x)
+    if wave_x.size == 0:
+        return EMPTY_TRACE
+    wave_y = np.asarray(wave_y)
+    x_offset = int(wave_x.min())
+    columns = wave_x - x_offset
+    counts = np.bincount(columns)
+    row_sums = np.bincount(columns, weights=wave_y)
+    top = np.full(counts.size, np.iinfo(np.int64).max, np.int64)
+    np.minimum.at(top, columns, wave_y)
+    top[counts == 0] = -1
+    return ColumnTrace(x_offset, top, counts, row_sums)
+
+
+def columns(trace):
+    """Frame x coordinate of every column of the trace."""
+    return np.arange(trace.x_offset, trace.x_offset + trace.top.size)
+
+
+def fit(trace):
+    """Least squares parabola through every mask pixel of the trace, or None if it is undetermined."""
+    return parabola_fit.fit_parabola_columns(columns(trace), trace.counts, trace.row_sums)
+
+
+def peak_row(trace):
+    """Highest (smallest) row of the mask, or None if the trace is empty."""
+    occupied = trace.top[trace.counts > 0]
+    return int(occupied.min()) if occupied.size else None
+
+
+def resample(trace, x0, x1):
+    """Top edge of the trace on frame columns x0..x1-1 as float64, NaN where there is no trace."""
+    values = np.full(x1 - x0, np.nan)
+    start, end = max(x0, trace.x_offset), min(x1, trace.x_offset + trace.top.size)
+    if start < end:
+        top = trace.top[start - trace.x_offset:end - trace.x_offset]
+        values[start - x0:end - x0] = np.where(top >= 0, top, np.nan)
+    return values
@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+from time import perf_counter
+
+# ===================================
+#  Entry points of the pool worker processes
+# ===================================
+# With the spawn start method (Windows, and the packaged build), every worker starts a new interpreter and imports
+# the module of each function it is sent. Pool tasks and the initializer therefore live in this module, which only
+# imports the standard library: the analysis modules (OpenCV, numpy, ...) are imported by the first task that
+# needs them, and the GUI is never imported by a worker.
+#
+#     with multiprocessing.Pool(processes, initializer=worker.initialize, initargs=worker.initargs(log_queue)) as pool:
+#         pool.imap_unordered(..., worker.process_video_file, ...)
+
+# The parent's AnalysisConfig, pickled; the first task installs it, as unpickling it imports numpy and OpenCV
+_config = None
+
+
+def initargs(log_queue, monitor=None, processes=0, config=None):
+    """Arguments of initialize: the log queue, the settings and AnalysisConfig of this process, the GUI's monitor.
+
+    config defaults to analysis_config.current().
+    """
+    import pickle
+    import analysis_config
+    import env_vars
+    config = config if config is not None else analysis_config.current()
+    progress_args = monitor.worker_args(processes) if monitor is not None else ()
+    return (log_queue, env_vars.snapshot(), pickle.dumps(config)) + tuple(progress_args)
+
+
+def initialize(log_queue, settings=None, config=None, *progress_args):
+    """Pool initializer: take the parent's settings, log through its queue and report progress to its GUI."""
+    global _config
+    import env_vars
+    if settings is not None:
+        # Settings edited in the GUI reach the workers even if env_settings.json was not saved
+        env_vars.apply_settings(settings)
+    else:
+        env_vars.ensure_loaded()
+    _config = config
+    import progress
+    progress.configure_worker(log_queue, *progress_args)
+
+
+def install_config():
+    """Install the AnalysisConfig received by initialize, once per worker, before analyzing anything."""
+    global _config
+    if _config is not None:
+        import pickle
+        import analysis_config
+        analysis_config.install(pickle.loads(_config))
+        _config = None
+
+
+def process_video_file(video_file, span, center, dbPerHLine, show_video=True, preview_interval=0):
+    """Analyze a video of the VIDEO_FOLDER; see main.process_video_file_worker."""
+    install_config()
+    import main
+    return main.process_video_file_worker(video_file, span, center, dbPerHLine, show_video, preview_interval)
+
+
+def video_to_csv(video_file, span, center, dbPerHLine, show_video=True, preview_interval=0):
+    """Analyze a video given by its path; see main.video_to_csv_worker."""
+    install_config()
+    import main
+    return main.video_to_csv_worker(video_file, span, center, dbPerHLine, show_video, preview_interval)
+
+
+def analyze_chunk(chunk):
+    """Analyze one (video_file, start_frame, end_frame, analyzer) chunk of a video; see main.analyze_frame_range."""
+    install_config()
+    import main
+    return main.analyze_frame_range(*chunk)
+
+
+def probe(video_path):
+    """VideoJob of a video for the longest-first order; see scheduler.probe."""
+    import scheduler
+    return scheduler.probe(video_path)
+
+
+def run_job(job):
+    """Run a (function, args) job and report which worker ran it and for how long; see scheduler.run."""
+    function, args = job
+    start = perf_counter()
+    result = function(*args)
+    return result, multiprocessing.current_process().name, perf_counter() - start
+
+
+def ready(_=None):
+    """Trivial task, to time how long a worker takes to start; returns the worker's process id."""
+    return os.getpid()